@@ -0,0 +1,333 @@
+"""
+This script builds occupancy and revenue reports from the bookings of a Cinematicket
+database.
+
+The scan is split into chunks of bookings and sanses by id range. The chunks run in a
+pool of worker processes, each over its own read-only connection. Every chunk returns
+partial sums per movie, show day, hall and subscription, and the parent process adds
+them up. In WAL mode readers never block writers, and each chunk is one short read
+transaction, so a report can run next to live ticket sales.
+
+Classes:
+- AnalyticsReport: The merged aggregates and the scan statistics.
+
+Functions:
+- build_report(db_path=None, workers=None, chunk_size=..., since=None, until=None):
+Scans the database and returns its AnalyticsReport.
+- main(argv=None): Command line entry point. Prints the report as JSON.
+
+Usage:
+    python analytics.py --db big.db --workers 4
+    python analytics.py --since 2024-01-01 --until 2024-12-31 --output 2024.json
+
+Note:
+- Occupancy is seats sold over the hall size, where the hall size is the seats sold
+plus the seats left (Sanses.hall_capacity counts the seats still for sale).
+- Days are show days (Sanses.Release_date); --since and --until filter on them.
+- Revenue is seats times the sanse's ticket_price. Bookings of deleted sanses are
+left out.
+- The chunks see slightly different moments of a busy database. Bookings made after
+the scan started are not counted; their seats may already be missing from the seats
+left of a sanse scanned later.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from users import normalize_date, resolve_db_path
+
+DEFAULT_CHUNK_SIZE = 100_000
+DIMENSIONS = ("movie", "day", "hall", "subscription")
+UNKNOWN_SUBSCRIPTION = "Unknown"
+# The fields of every aggregate, in order
+SCREENINGS, SEATS_LEFT, BOOKINGS, SEATS_SOLD, REVENUE = range(5)
+EARLIEST_DAY = "0000-00-00"
+LATEST_DAY = "9999-99-99"
+
+BOOKINGS_CHUNK_QUERY = """
+    SELECT s.Movie_Name, s.Release_date, s.hall, COALESCE(u.Subscription, ?),
+           COUNT(*), SUM(b.seats), SUM(b.seats * s.ticket_price)
+    FROM bookings b
+    JOIN Sanses s ON s.id = b.sanse_id
+    LEFT JOIN users u ON u.id = b.user_id
+    WHERE b.id BETWEEN ? AND ? AND s.Release_date BETWEEN ? AND ?
+    GROUP BY b.sanse_id, u.Subscription
+"""
+SANSES_CHUNK_QUERY = """
+    SELECT Movie_Name, Release_date, hall, COUNT(*), SUM(hall_capacity)
+    FROM Sanses
+    WHERE id BETWEEN ? AND ? AND Release_date BETWEEN ? AND ?
+    GROUP BY Movie_Name, Release_date, hall
+"""
+
+
+def connect_read_only(db_path):
+    """
+    Opens a connection that cannot write, so a report can never lock the tables.
+
+    Args:
+        db_path (str): The database file.
+
+    Returns:
+        sqlite3.Connection: The read-only connection.
+    """
+    uri = f"{Path(os.path.abspath(db_path)).as_uri()}?mode=ro"
+    connection = sqlite3.connect(uri, uri=True, timeout=5.0)
+    connection.execute("PRAGMA query_only = ON")
+    return connection
+
+
+def _empty_partial():
+    """
+    Returns:
+        dict: Dimension -> {key: aggregate list}, all empty.
+    """
+    return {dimension: {} for dimension in DIMENSIONS}
+
+
+def _add(partial, dimension, key, values, offset):
+    """
+    Adds values into the aggregate of one key, starting at field offset.
+    """
+    aggregate = partial[dimension].get(key)
+    if aggregate is None:
+        aggregate = partial[dimension][key] = [0] * 5
+    for index, value in enumerate(values, offset):
+        aggregate[index] += value
+
+
+def scan_chunk(task):
+    """
+    Aggregates one id range of bookings or sanses. Runs in a worker process.
+
+    Args:
+        task (tuple): (table, db_path, first_id, last_id, since, until), where table
+            is "bookings" or "Sanses".
+
+    Returns:
+        dict: The partial aggregates of the range.
+    """
+    table, db_path, first_id, last_id, since, until = task
+    partial = _empty_partial()
+    connection = connect_read_only(db_path)
+    try:
+        if table == "bookings":
+            rows = connection.execute(BOOKINGS_CHUNK_QUERY, (
+                UNKNOWN_SUBSCRIPTION, first_id, last_id, since, until))
+            for movie, day, hall, subscription, bookings, seats, revenue in rows:
+                values = (bookings, seats, revenue)
+                _add(partial, "movie", movie, values, BOOKINGS)
+                _add(partial, "day", day, values, BOOKINGS)
+                _add(partial, "hall", hall, values, BOOKINGS)
+                _add(partial, "subscription", subscription, values, BOOKINGS)
+        else:
+            rows = connection.execute(SANSES_CHUNK_QUERY, (first_id, last_id, since, until))
+            for movie, day, hall, screenings, seats_left in rows:
+                values = (screenings, seats_left)
+                _add(partial, "movie", movie, values, SCREENINGS)
+                _add(partial, "day", day, values, SCREENINGS)
+                _add(partial, "hall", hall, values, SCREENINGS)
+    finally:
+        connection.close()
+    return partial
+
+
+def merge_partials(total, partial):
+    """
+    Adds one chunk's partial aggregates into the running totals.
+
+    Args:
+        total (dict): The running totals, updated in place.
+        partial (dict): A result of scan_chunk().
+
+    Returns:
+        dict: total.
+    """
+    for dimension, aggregates in partial.items():
+        for key, values in aggregates.items():
+            _add(total, dimension, key, values, 0)
+    return total
+
+
+def plan_chunks(db_path, chunk_size=DEFAULT_CHUNK_SIZE, since=None, until=None):
+    """
+    Splits the bookings and Sanses tables into id ranges.
+
+    Bookings made after this call get ids above the last range and are not scanned.
+
+    Returns:
+        list: The scan_chunk() tasks.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    since = normalize_date(since) if since else EARLIEST_DAY
+    until = normalize_date(until) if until else LATEST_DAY
+    tasks = []
+    connection = connect_read_only(db_path)
+    try:
+        for table in ("bookings", "Sanses"):
+            first_id, last_id = connection.execute(
+                f"SELECT MIN(id), MAX(id) FROM {table}").fetchone()
+            if first_id is None:
+                continue
+            for start in range(first_id, last_id + 1, chunk_size):
+                tasks.append((table, db_path, start, min(start + chunk_size - 1, last_id),
+                              since, until))
+    finally:
+        connection.close()
+    return tasks
+
+
+class AnalyticsReport:
+    """
+    The merged aggregates of a scan.
+
+    Attributes:
+        aggregates (dict): Dimension -> {key: [screenings, seats_left, bookings,
+            seats_sold, revenue]}.
+        chunks (int): The number of chunks scanned.
+        workers (int): The number of worker processes.
+        seconds (float): The wall-clock duration of the scan.
+    """
+    def __init__(self, aggregates, chunks=0, workers=1, seconds=0.0):
+        self.aggregates = aggregates
+        self.chunks = chunks
+        self.workers = workers
+        self.seconds = seconds
+
+    @staticmethod
+    def _occupancy(values):
+        """
+        Returns:
+            dict: The fields of one aggregate, with its occupancy.
+        """
+        seats_total = values[SEATS_SOLD] + values[SEATS_LEFT]
+        return {
+            "screenings": values[SCREENINGS],
+            "bookings": values[BOOKINGS],
+            "seats_sold": values[SEATS_SOLD],
+            "seats_total": seats_total,
+            "occupancy": round(values[SEATS_SOLD] / seats_total, 4) if seats_total else 0.0,
+            "revenue": values[REVENUE],
+        }
+
+    def totals(self):
+        """
+        Returns:
+            dict: The occupancy and revenue over every sanse in the report.
+        """
+        values = [0] * 5
+        for aggregate in self.aggregates["hall"].values():
+            for index, value in enumerate(aggregate):
+                values[index] += value
+        return self._occupancy(values)
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The report in a JSON-serialisable form. Movies are ordered by revenue,
+                days and halls by key, subscriptions by seats sold.
+        """
+        aggregates = self.aggregates
+        seats_sold = sum(values[SEATS_SOLD] for values in aggregates["subscription"].values())
+        return {
+            "totals": self.totals(),
+            "movies": [
+                {"movie": movie, **self._occupancy(values)}
+                for movie, values in sorted(aggregates["movie"].items(),
+                                            key=lambda item: (-item[1][REVENUE], item[0]))
+            ],
+            "days": [{"day": day, **self._occupancy(values)}
+                     for day, values in sorted(aggregates["day"].items())],
+            "halls": [{"hall": hall, **self._occupancy(values)}
+                      for hall, values in sorted(aggregates["hall"].items())],
+            "subscriptions": [
+                {
+                    "subscription": subscription,
+                    "bookings": values[BOOKINGS],
+                    "seats_sold": values[SEATS_SOLD],
+                    "revenue": values[REVENUE],
+                    "share": round(values[SEATS_SOLD] / seats_sold, 4) if seats_sold else 0.0,
+                }
+                for subscription, values in sorted(
+                    aggregates["subscription"].items(),
+                    key=lambda item: (-item[1][SEATS_SOLD], item[0]))
+            ],
+            "scan": {
+                "chunks": self.chunks,
+                "workers": self.workers,
+                "seconds": round(self.seconds, 4),
+            },
+        }
+
+
+def build_report(db_path=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, since=None,
+                 until=None):
+    """
+    Scans a database in chunks and merges the chunks' aggregates.
+
+    Args:
+        db_path (str, optional): The database file. Default is the configured database.
+        workers (int, optional): The worker processes. Default is the number of CPUs;
+            1 scans in this process.
+        chunk_size (int, optional): The ids per chunk. Default is 100,000.
+        since (str, optional): The first show day to include (YYYY-MM-DD).
+        until (str, optional): The last show day to include (YYYY-MM-DD).
+
+    Returns:
+        AnalyticsReport: The per-movie, per-day, per-hall and per-subscription figures.
+    """
+    db_path = os.path.abspath(resolve_db_path(db_path))
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    start = time.perf_counter()
+    tasks = plan_chunks(db_path, chunk_size, since, until)
+    workers = max(1, min(workers, len(tasks)))
+    total = _empty_partial()
+    if workers == 1:
+        for task in tasks:
+            merge_partials(total, scan_chunk(task))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for future in as_completed([executor.submit(scan_chunk, task) for task in tasks]):
+                merge_partials(total, future.result())
+    return AnalyticsReport(total, len(tasks), workers, time.perf_counter() - start)
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Args:
+        argv (list, optional): The arguments to parse. Default is sys.argv[1:].
+
+    Returns:
+        int: The exit status.
+    """
+    parser = argparse.ArgumentParser(description="Occupancy and revenue reports.")
+    parser.add_argument("--db", help="The database file (default: $CINEMATICKET_DB).")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPUs).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--since", help="The first show day (YYYY-MM-DD).")
+    parser.add_argument("--until", help="The last show day (YYYY-MM-DD).")
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    args = parser.parse_args(argv)
+    report = build_report(args.db, args.workers, args.chunk_size, args.since, args.until)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report.as_dict(), output, indent=2)
+    else:
+        json.dump(report.as_dict(), sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
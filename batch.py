@@ -0,0 +1,343 @@
+"""
+This script replays scripted sessions against the 'users.py' layer without the menus.
+
+Each line of the input is one operation. Operations run through one User object in
+transactions of batch_size operations, so a replay costs one commit per batch rather
+than one per write. Every operation runs in its own savepoint: a failed operation is
+rolled back and reported, and the rest of its batch still commits.
+
+Classes:
+- OperationStats: Counts and time of one kind of operation.
+- BatchReport: The outcome of a run, per operation and overall.
+- BatchRunner: Applies the operations and keeps the logged-in sessions.
+
+Functions:
+- run_batch(path, db_path=None, batch_size=500, password_iterations=...):
+Replays a JSONL (or CSV) file and returns its BatchReport.
+- main(argv=None): Command line entry point. Prints the report as JSON.
+
+Operations ("op" field, then the operation's fields):
+- register: username, password, birthdate, role_user (default "User"), number_phone
+- login: username, password
+- add_card: username, card_name, card_number, card_expire_date, current_card_balance,
+card_cvv2
+- recharge: username, card (the 1-based position in the user's card list), amount
+- buy: username, sanse_id, seats (default 1)
+- add_sanse: movie_name, release_date, hall_capacity, age_limit, and optionally hall
+and ticket_price
+- delete_sanse: sanse_id
+
+Usage:
+    python batch.py nightly.jsonl --batch-size 500
+    python batch.py trace.jsonl --db replay.db --password-iterations 1000 --strict
+
+Note:
+- add_card, recharge and buy act for a user logged in earlier in the same run.
+- A login that fails, a recharge the card cannot cover and a purchase that is not
+reserved (sold out, age restricted, unknown sanse) count as failed operations.
+- --strict exits with status 1 when any operation failed, for scheduled jobs.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from itertools import islice
+
+from bulk_import import read_records, validate_card, validate_sanse
+from users import PASSWORD_ITERATIONS, ReservationStatus, User, age_on, normalize_date
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_FAILURES = 100
+
+
+class OperationStats:
+    """
+    The counters of one kind of operation.
+
+    Attributes:
+        ok (int): The operations that succeeded.
+        failed (int): The operations that failed and were rolled back.
+        total_ns (int): The time spent applying them, commits excluded.
+    """
+    __slots__ = ("ok", "failed", "total_ns")
+
+    def __init__(self):
+        self.ok = 0
+        self.failed = 0
+        self.total_ns = 0
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The counters and the operations per second.
+        """
+        calls = self.ok + self.failed
+        return {
+            "ok": self.ok,
+            "failed": self.failed,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "ops_per_sec": round(calls / (self.total_ns / 1e9), 1) if self.total_ns else 0.0,
+        }
+
+
+class BatchReport:
+    """
+    The outcome of one run.
+
+    Attributes:
+        operations (dict): Operation name -> OperationStats.
+        failures (list): (line number, operation, reason) of the first
+            MAX_REPORTED_FAILURES failed operations.
+        failed (int): The number of failed operations.
+        batches (int): The number of committed batches.
+        seconds (float): The wall-clock duration of the run, commits included.
+    """
+    def __init__(self):
+        self.operations = {}
+        self.failures = []
+        self.failed = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    @property
+    def total(self):
+        """
+        Returns:
+            int: The number of operations applied, failed ones included.
+        """
+        return sum(stats.ok + stats.failed for stats in self.operations.values())
+
+    def record(self, operation, elapsed_ns, line_number, reason=None):
+        """
+        Counts one operation; a reason marks it as failed.
+        """
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        stats.total_ns += elapsed_ns
+        if reason is None:
+            stats.ok += 1
+            return
+        stats.failed += 1
+        self.failed += 1
+        if len(self.failures) < MAX_REPORTED_FAILURES:
+            self.failures.append((line_number, operation, reason))
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The report in a JSON-serialisable form.
+        """
+        return {
+            "operations": self.total,
+            "failed": self.failed,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 4),
+            "ops_per_sec": round(self.total / self.seconds, 1) if self.seconds else 0.0,
+            "per_operation": {name: stats.as_dict()
+                              for name, stats in sorted(self.operations.items())},
+            "failures": [{"line": line, "op": operation, "reason": reason}
+                         for line, operation, reason in self.failures],
+        }
+
+
+class BatchRunner:
+    """
+    Applies scripted operations through one pooled User connection.
+
+    Attributes:
+        db_path (str): The database file, or None for the configured database.
+        batch_size (int): The operations per transaction.
+        password_iterations (int): The PBKDF2 cost of the passwords registered.
+        sessions (dict): Username -> UserSession of the users logged in so far.
+    """
+    def __init__(self, db_path=None, batch_size=DEFAULT_BATCH_SIZE,
+                 password_iterations=PASSWORD_ITERATIONS):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.password_iterations = password_iterations
+        self.sessions = {}
+
+    def run(self, records):
+        """
+        Applies the operations in transactions of batch_size operations.
+
+        Args:
+            records (iterable): (line number, record dict) pairs, as read_records() yields.
+
+        Returns:
+            BatchReport: The per-operation counts, failures and throughput.
+        """
+        report = BatchReport()
+        start = time.perf_counter()
+        records = iter(records)
+        with User(self.db_path) as myuser:
+            myuser.password_iterations = self.password_iterations
+            myuser.migrate()
+            while True:
+                chunk = list(islice(records, self.batch_size))
+                if not chunk:
+                    break
+                with myuser.batch():
+                    for line_number, record in chunk:
+                        self.apply(myuser, line_number, record, report)
+                report.batches += 1
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def apply(self, myuser, line_number, record, report):
+        """
+        Applies one operation in its own savepoint and records its outcome.
+        """
+        operation = (record or {}).get("op")
+        handler = OPERATIONS.get(operation)
+        if handler is None:
+            reason = "malformed line" if record is None else f"unknown op: {operation!r}"
+            report.record(str(operation), 0, line_number, reason)
+            return
+        start = time.perf_counter_ns()
+        try:
+            with myuser.transaction():
+                reason = handler(self, myuser, record)
+        except (ValueError, KeyError, TypeError, sqlite3.IntegrityError) as error:
+            reason = f"{type(error).__name__}: {error}"
+        report.record(operation, time.perf_counter_ns() - start, line_number, reason)
+
+    def session(self, record):
+        """
+        Returns:
+            UserSession: The session of the record's username.
+
+        Raises:
+            KeyError: If that user has not logged in during this run.
+        """
+        username = record["username"]
+        if username not in self.sessions:
+            raise KeyError(f"{username} is not logged in")
+        return self.sessions[username]
+
+
+def _register(runner, myuser, record):
+    """
+    Registers a user.
+    """
+    myuser.register_user(
+        str(record["username"]), str(record["password"]), normalize_date(record["birthdate"]),
+        record.get("role_user") or "User", record.get("number_phone"),
+    )
+
+
+def _login(runner, myuser, record):
+    """
+    Logs a user in and keeps the session for their later operations.
+    """
+    session = myuser.authenticate(str(record["username"]), str(record["password"]))
+    if session is None:
+        return "wrong username or password"
+    runner.sessions[session.username] = session
+    return None
+
+
+def _add_card(runner, myuser, record):
+    """
+    Adds a bank card to a logged-in user.
+    """
+    myuser.add_bank_card(runner.session(record).id, *validate_card(record))
+
+
+def _recharge(runner, myuser, record):
+    """
+    Moves money from a logged-in user's card into their wallet.
+    """
+    user_id = runner.session(record).id
+    card_id = myuser.card_id_from_ordinal(user_id, int(record["card"]))
+    if card_id is None:
+        return f"no card at position {record['card']}"
+    if not myuser.update_wallet_balance(record["amount"], card_id, user_id):
+        return "insufficient card balance"
+    return None
+
+
+def _buy(runner, myuser, record):
+    """
+    Buys seats for a logged-in user.
+    """
+    session = runner.session(record)
+    status = myuser.buy_sanse(int(record["sanse_id"]), session.id, age_on(session.birthdate),
+                              int(record.get("seats") or 1))
+    return None if status is ReservationStatus.RESERVED else status.value
+
+
+def _add_sanse(runner, myuser, record):
+    """
+    Adds a sanse.
+    """
+    myuser.add_sanse(*validate_sanse(record))
+
+
+def _delete_sanse(runner, myuser, record):
+    """
+    Deletes a sanse.
+    """
+    myuser.delete_sanse(int(record["sanse_id"]))
+
+
+OPERATIONS = {
+    "register": _register,
+    "login": _login,
+    "add_card": _add_card,
+    "recharge": _recharge,
+    "buy": _buy,
+    "add_sanse": _add_sanse,
+    "delete_sanse": _delete_sanse,
+}
+
+
+def run_batch(path, db_path=None, batch_size=DEFAULT_BATCH_SIZE,
+              password_iterations=PASSWORD_ITERATIONS):
+    """
+    Replays an operations file.
+
+    Args:
+        path (str): The JSONL file (or CSV with an "op" column).
+        db_path (str, optional): The database file. Default is the configured database.
+        batch_size (int, optional): The operations per transaction. Default is 500.
+        password_iterations (int, optional): The PBKDF2 cost of registered passwords.
+
+    Returns:
+        BatchReport: The per-operation counts, failures and throughput.
+    """
+    runner = BatchRunner(db_path, batch_size, password_iterations)
+    return runner.run(read_records(path))
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Args:
+        argv (list, optional): The arguments to parse. Default is sys.argv[1:].
+
+    Returns:
+        int: The exit status.
+    """
+    parser = argparse.ArgumentParser(description="Replay scripted sessions from a JSONL file.")
+    parser.add_argument("path")
+    parser.add_argument("--db", help="The database file (default: $CINEMATICKET_DB).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--password-iterations", type=int, default=PASSWORD_ITERATIONS)
+    parser.add_argument("--strict", action="store_true",
+                        help="Exit with status 1 if any operation failed.")
+    args = parser.parse_args(argv)
+    report = run_batch(args.path, args.db, args.batch_size, args.password_iterations)
+    json.dump(report.as_dict(), sys.stdout, indent=2)
+    print()
+    return 1 if args.strict and report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,512 @@
+"""
+This script measures the cost of the hot paths in 'users.py'.
+
+Functions:
+- bench_passwords(costs, logins, threads):
+Registers one user per PBKDF2 cost and reports how many logins per second
+the system sustains at that cost.
+- bench_reservations(buyers, capacity, threads):
+Sends concurrent buyers at one hot sanse and reports reservations per second.
+- bench_transfers(transfers, users, threads):
+Runs concurrent card-to-wallet recharges and reports transfers per second.
+- bench_suite(sizes, ops, scan_ops, password_iterations, seed):
+Times each hot User method one call at a time on databases of 1k, 100k and 1M rows
+and reports latency percentiles and ops/sec per method and size.
+- compare_suites(baseline, current, threshold):
+Lines up two suite reports and flags the methods whose median latency regressed.
+- import_times(module, top):
+Runs `python -X importtime` in a fresh interpreter and summarizes where import time goes.
+- time_to_first_menu(runs, db_path):
+Starts 'main.py' `runs` times and measures how long until the first menu prompt.
+- bench_startup(runs, top, db_path):
+Combines both into the startup report, checked against STARTUP_TARGET_MS.
+- main(argv=None): Command line entry point. Prints the results as JSON.
+
+Usage:
+    python benchmarks.py passwords --costs 100000 200000 400000 --logins 200 --threads 4
+    python benchmarks.py reservations --buyers 5000 --capacity 4000 --threads 4
+    python benchmarks.py transfers --transfers 5000 --users 100 --threads 4
+    python benchmarks.py suite --sizes 1000 100000 1000000 --output before.json
+    python benchmarks.py suite --output after.json --compare before.json
+    python benchmarks.py startup --runs 5 --db mydatabase.db
+
+Note:
+- Every benchmark runs against a fresh database file in a temporary directory,
+so it never touches 'mydatabase.db'.
+- The suite is seeded and records the commit, Python and SQLite versions with the
+results, so reports from different commits on the same machine are comparable.
+`--compare` exits with status 1 when a method's median latency grows by more
+than `--threshold` (default 20%).
+- `startup` exits with status 1 when the median time to the first menu is over
+STARTUP_TARGET_MS, or when one of LAZY_MODULES is imported before the menu.
+With PYTHONDONTWRITEBYTECODE set, run `python -m compileall .` first, or the import
+times include compiling the sources.
+- Use the passwords report to choose CINEMATICKET_PASSWORD_ITERATIONS: the
+highest cost whose logins per second still covers the expected peak login rate.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from datagen import USERNAME_FORMAT, generate
+from users import Admin, ReservationStatus, User, get_pool, hash_password
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STARTUP_TARGET_MS = 250
+FIRST_MENU_PROMPT = b"Please enter the desired number: "
+# Modules the menus use only for some actions; importing main must not load them
+LAZY_MODULES = ("bulk_import", "prettytable", "concurrent.futures", "cProfile", "pstats",
+                "json")
+
+
+def bench_passwords(costs, logins=200, threads=4):
+    """
+    Measures login throughput at each PBKDF2 cost.
+
+    Args:
+        costs (list): The PBKDF2 iteration counts to measure.
+        logins (int, optional): The number of logins per cost. Default is 200.
+        threads (int, optional): The number of concurrent sessions. Default is 4.
+
+    Returns:
+        list: One dict per cost with iterations, logins, threads, seconds and logins_per_sec.
+    """
+    results = []
+    for iterations in costs:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "bench.db")
+            pool = get_pool(db_path, size=threads)
+            with User(db_path) as myuser:
+                myuser.migrate()
+                myuser.password_iterations = iterations
+                myuser.register_user(BENCH_USERNAME, BENCH_PASSWORD, "2000-01-01", "User")
+
+            def login_session(count, iterations=iterations, db_path=db_path):
+                with User(db_path) as session_user:
+                    session_user.password_iterations = iterations
+                    for _ in range(count):
+                        if session_user.authenticate(BENCH_USERNAME, BENCH_PASSWORD) is None:
+                            raise RuntimeError("benchmark login failed")
+
+            shares = [logins // threads + (1 if i < logins % threads else 0)
+                      for i in range(threads)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                for future in [executor.submit(login_session, share) for share in shares]:
+                    future.result()
+            elapsed = time.perf_counter() - start
+            pool.close()
+        results.append({
+            "iterations": iterations,
+            "logins": logins,
+            "threads": threads,
+            "seconds": round(elapsed, 4),
+            "logins_per_sec": round(logins / elapsed, 1),
+        })
+    return results
+
+
+def bench_reservations(buyers=5000, capacity=4000, threads=4):
+    """
+    Measures reservation throughput against a single hot sanse.
+
+    Args:
+        buyers (int, optional): The number of single-seat purchase attempts. Default is 5000.
+        capacity (int, optional): The hall capacity of the sanse. Default is 4000.
+        threads (int, optional): The number of concurrent buyers. Default is 4.
+
+    Returns:
+        dict: attempts, reserved, sold_out, seconds and reservations_per_sec.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "bench.db")
+        pool = get_pool(db_path, size=threads)
+        with Admin(db_path) as myadmin:
+            myadmin.migrate()
+            myadmin.admin_add_sanse("Hot Movie", "2023-01-01", capacity, 0)
+
+        def buy(count, db_path=db_path):
+            with User(db_path) as buyer:
+                return [buyer.reserve_sans(1, 1) for _ in range(count)]
+
+        shares = [buyers // threads + (1 if i < buyers % threads else 0) for i in range(threads)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            outcomes = [status for statuses in executor.map(buy, shares) for status in statuses]
+        elapsed = time.perf_counter() - start
+        pool.close()
+    return {
+        "attempts": buyers,
+        "reserved": outcomes.count(ReservationStatus.RESERVED),
+        "sold_out": outcomes.count(ReservationStatus.SOLD_OUT),
+        "threads": threads,
+        "seconds": round(elapsed, 4),
+        "reservations_per_sec": round(buyers / elapsed, 1),
+    }
+
+
+def bench_transfers(transfers=5000, users=100, threads=4):
+    """
+    Measures card-to-wallet transfer throughput with concurrent sessions.
+
+    Args:
+        transfers (int, optional): The number of transfers. Default is 5000.
+        users (int, optional): The number of users (one card each). Default is 100.
+        threads (int, optional): The number of concurrent sessions. Default is 4.
+
+    Returns:
+        dict: transfers, succeeded, threads, seconds and transfers_per_sec.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "bench.db")
+        pool = get_pool(db_path, size=threads)
+        with User(db_path) as myuser:
+            myuser.migrate()
+            with myuser.transaction():
+                myuser.cursor.executemany(
+                    """INSERT INTO bank_cards(user_id, card_name, card_number, card_expire_date,
+                        current_card_balance, card_cvv2) VALUES (?, 'bench', ?, '28/01', ?, 1234)""",
+                    [(user_id, "1" * 16, 10 ** 9) for user_id in range(1, users + 1)],
+                )
+
+        def recharge(thread_index, db_path=db_path):
+            # Card N belongs to user N, so spread the transfers round-robin over users
+            with User(db_path) as session_user:
+                return [session_user.update_wallet_balance(1, number % users + 1,
+                                                           number % users + 1)
+                        for number in range(thread_index, transfers, threads)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            outcomes = [ok for oks in executor.map(recharge, range(threads)) for ok in oks]
+        elapsed = time.perf_counter() - start
+        pool.close()
+    return {
+        "transfers": len(outcomes),
+        "succeeded": outcomes.count(True),
+        "threads": threads,
+        "seconds": round(elapsed, 4),
+        "transfers_per_sec": round(len(outcomes) / elapsed, 1),
+    }
+
+
+SUITE_SIZES = (1_000, 100_000, 1_000_000)
+SUITE_PERCENTILES = (50, 90, 99)
+
+
+def summarize(samples_ns):
+    """
+    Summarizes per-call latencies.
+
+    Args:
+        samples_ns (list): Call durations in nanoseconds.
+
+    Returns:
+        dict: calls, mean_us, p50_us, p90_us, p99_us, max_us and ops_per_sec.
+    """
+    ordered = sorted(samples_ns)
+    summary = {"calls": len(ordered), "mean_us": round(sum(ordered) / len(ordered) / 1000, 2)}
+    for percentile in SUITE_PERCENTILES:
+        # Nearest-rank percentile
+        rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+        summary[f"p{percentile}_us"] = round(ordered[rank - 1] / 1000, 2)
+    summary["max_us"] = round(ordered[-1] / 1000, 2)
+    summary["ops_per_sec"] = round(len(ordered) / (sum(ordered) / 1e9), 1)
+    return summary
+
+
+def environment():
+    """
+    Returns:
+        dict: The commit, Python, SQLite and machine details a suite run depends on.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=HERE, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def bench_suite(sizes=SUITE_SIZES, ops=1000, scan_ops=5, password_iterations=1000, seed=0):
+    """
+    Times the hot User methods one call at a time at each database size.
+
+    Every method is called `ops` times (get_all_sanses, which reads the whole table,
+    `scan_ops` times) with arguments drawn from a seeded generator, on a single
+    connection, so the numbers are per-call latencies without contention.
+
+    Args:
+        sizes (list, optional): Rows per table for each run. Default is 1k, 100k and 1M.
+        ops (int, optional): Calls per method. Default is 1000.
+        scan_ops (int, optional): Calls of get_all_sanses. Default is 5.
+        password_iterations (int, optional): The PBKDF2 cost. It is kept low by default
+            so the database work is visible; `passwords` measures the hashing cost.
+        seed (int, optional): The random seed. Default is 0.
+
+    Returns:
+        dict: "environment", "parameters" and "results" (one entry per method and size).
+    """
+    results = []
+    stored_hash = hash_password(BENCH_PASSWORD, password_iterations)
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "bench.db")
+            pool = get_pool(db_path, size=1)
+            # One card per user, so card N belongs to user N
+            generate(db_path, users=rows, sanses=rows, bookings=0, card_weights=(0, 1),
+                     wallet_share=0, subscription_share=0, seed=seed,
+                     password_hash=stored_hash)
+            rng = random.Random(seed)
+            user_ids = [rng.randint(1, rows) for _ in range(ops)]
+            sanse_ids = [rng.randint(1, rows) for _ in range(ops)]
+            with User(db_path) as myuser:
+                myuser.password_iterations = password_iterations
+                operations = {
+                    "register_user": (ops, lambda i: myuser.register_user(
+                        f"new{i}", BENCH_PASSWORD, "2000-01-01", "User")),
+                    "authenticate": (ops, lambda i: myuser.authenticate(
+                        USERNAME_FORMAT.format(user_ids[i]), BENCH_PASSWORD)),
+                    "add_bank_card": (ops, lambda i: myuser.add_bank_card(
+                        user_ids[i], "extra", "9" * 16, "28/01", 100, 1234)),
+                    "select_bank_card": (ops, lambda i: myuser.select_bank_card(user_ids[i])),
+                    "update_wallet_balance": (ops, lambda i: myuser.update_wallet_balance(
+                        1, user_ids[i], user_ids[i])),
+                    "get_all_sanses": (scan_ops, lambda i: myuser.get_all_sanses()),
+                    "buy_sanse": (ops, lambda i: myuser.buy_sanse(sanse_ids[i], user_ids[i], 30)),
+                }
+                for name, (calls, operation) in operations.items():
+                    samples = []
+                    for i in range(calls):
+                        start = time.perf_counter_ns()
+                        operation(i)
+                        samples.append(time.perf_counter_ns() - start)
+                    results.append({"operation": name, "rows": rows, **summarize(samples)})
+            pool.close()
+    return {
+        "environment": environment(),
+        "parameters": {"sizes": list(sizes), "ops": ops, "scan_ops": scan_ops,
+                       "password_iterations": password_iterations, "seed": seed},
+        "results": results,
+    }
+
+
+def compare_suites(baseline, current, threshold=0.2):
+    """
+    Compares two bench_suite() reports method by method and size by size.
+
+    Args:
+        baseline (dict): The earlier report.
+        current (dict): The new report.
+        threshold (float, optional): The relative growth in median latency that counts
+            as a regression. Default is 0.2 (20%).
+
+    Returns:
+        list: One dict per (operation, rows) present in both reports, with the old and
+            new p50_us and ops_per_sec, the relative p50 change and a regression flag.
+    """
+    before = {(entry["operation"], entry["rows"]): entry for entry in baseline["results"]}
+    comparison = []
+    for entry in current["results"]:
+        old = before.get((entry["operation"], entry["rows"]))
+        if old is None:
+            continue
+        change = (entry["p50_us"] - old["p50_us"]) / old["p50_us"] if old["p50_us"] else 0.0
+        comparison.append({
+            "operation": entry["operation"],
+            "rows": entry["rows"],
+            "p50_us": [old["p50_us"], entry["p50_us"]],
+            "ops_per_sec": [old["ops_per_sec"], entry["ops_per_sec"]],
+            "p50_change": round(change, 3),
+            "regression": change > threshold,
+        })
+    return comparison
+
+
+def import_times(module="main", top=15):
+    """
+    Imports a module in a fresh interpreter with `-X importtime`.
+
+    Args:
+        module (str, optional): The module to import. Default is "main".
+        top (int, optional): How many of the slowest modules to list. Default is 15.
+
+    Returns:
+        dict: The total import time, the slowest modules by their own import time,
+            and the LAZY_MODULES that were loaded.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=HERE, check=True,
+    ).stderr
+    entries = []
+    for line in stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = fields
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    names = {name for name, _, _ in entries}
+    total_us = next(cumulative for name, _, cumulative in entries if name == module)
+    slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 2),
+        "modules": len(entries),
+        "slowest": [{"module": name, "self_ms": round(self_us / 1000, 2),
+                     "cumulative_ms": round(cumulative_us / 1000, 2)}
+                    for name, self_us, cumulative_us in slowest],
+        "lazy_modules_loaded": [name for name in LAZY_MODULES if name in names],
+    }
+
+
+def time_to_first_menu(runs=5, db_path=None):
+    """
+    Starts 'main.py' repeatedly and times each start up to its first menu prompt.
+
+    Args:
+        runs (int, optional): The number of starts. Default is 5.
+        db_path (str, optional): An existing database to start against. By default
+            each measurement uses a new file, so the first start includes creating
+            the schema and later ones show the start on a migrated database.
+
+    Returns:
+        dict: The first start and a summary of the later ones, in microseconds.
+    """
+    samples_ns = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ, CINEMATICKET_DB=db_path or os.path.join(temp_dir, "start.db"),
+                   TERM=os.environ.get("TERM", "dumb"))
+        for _ in range(runs):
+            start = time.perf_counter_ns()
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(HERE, "main.py")], cwd=temp_dir, env=env,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            )
+            output = b""
+            while FIRST_MENU_PROMPT not in output:
+                chunk = os.read(process.stdout.fileno(), 4096)
+                if not chunk:
+                    break
+                output += chunk
+            elapsed_ns = time.perf_counter_ns() - start
+            process.communicate(b"0\n", timeout=30)
+            if FIRST_MENU_PROMPT not in output:
+                raise RuntimeError(f"main.py exited before its first menu: {output[-200:]!r}")
+            samples_ns.append(elapsed_ns)
+    return {
+        "first_start_us": round(samples_ns[0] / 1000, 2),
+        "starts": summarize(samples_ns[1:] or samples_ns),
+    }
+
+
+def bench_startup(runs=5, top=15, db_path=None):
+    """
+    Reports where 'main.py' spends its start, against STARTUP_TARGET_MS.
+
+    Args:
+        runs (int, optional): The number of timed starts. Default is 5.
+        top (int, optional): How many of the slowest imports to list. Default is 15.
+        db_path (str, optional): An existing database to start against.
+
+    Returns:
+        dict: The environment, the target, the import report and the menu timings.
+    """
+    return {
+        "environment": environment(),
+        "target_ms": STARTUP_TARGET_MS,
+        "imports": import_times("main", top),
+        "first_menu": time_to_first_menu(runs, db_path),
+    }
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Args:
+        argv (list, optional): The arguments to parse. Default is sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks for the users.py hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    passwords = commands.add_parser("passwords", help="Logins per second at each hash cost.")
+    passwords.add_argument("--costs", type=int, nargs="+",
+                           default=[50_000, 100_000, 200_000, 400_000])
+    passwords.add_argument("--logins", type=int, default=200)
+    passwords.add_argument("--threads", type=int, default=4)
+    reservations = commands.add_parser("reservations",
+                                       help="Reservations per second on one hot sanse.")
+    reservations.add_argument("--buyers", type=int, default=5000)
+    reservations.add_argument("--capacity", type=int, default=4000)
+    reservations.add_argument("--threads", type=int, default=4)
+    transfers = commands.add_parser("transfers", help="Card-to-wallet transfers per second.")
+    transfers.add_argument("--transfers", type=int, default=5000)
+    transfers.add_argument("--users", type=int, default=100)
+    transfers.add_argument("--threads", type=int, default=4)
+    suite = commands.add_parser("suite", help="Latency percentiles of the hot User methods.")
+    suite.add_argument("--sizes", type=int, nargs="+", default=list(SUITE_SIZES))
+    suite.add_argument("--ops", type=int, default=1000)
+    suite.add_argument("--scan-ops", type=int, default=5)
+    suite.add_argument("--password-iterations", type=int, default=1000)
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--output", help="Also write the report to this JSON file.")
+    suite.add_argument("--compare", help="A previous report to compare against.")
+    suite.add_argument("--threshold", type=float, default=0.2,
+                       help="Median latency growth that counts as a regression.")
+    startup = commands.add_parser("startup", help="Import times and time to the first menu.")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--top", type=int, default=15)
+    startup.add_argument("--db", help="Start against this existing database file.")
+    args = parser.parse_args(argv)
+
+    if args.command == "passwords":
+        report = bench_passwords(args.costs, args.logins, args.threads)
+    elif args.command == "reservations":
+        report = bench_reservations(args.buyers, args.capacity, args.threads)
+    elif args.command == "transfers":
+        report = bench_transfers(args.transfers, args.users, args.threads)
+    elif args.command == "suite":
+        report = bench_suite(args.sizes, args.ops, args.scan_ops, args.password_iterations,
+                             args.seed)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output:
+                json.dump(report, output, indent=2)
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as baseline:
+                report = {"comparison": compare_suites(json.load(baseline), report,
+                                                       args.threshold)}
+    elif args.command == "startup":
+        report = bench_startup(args.runs, args.top, args.db)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if args.command == "suite" and args.compare:
+        return 1 if any(entry["regression"] for entry in report["comparison"]) else 0
+    if args.command == "startup":
+        too_slow = report["first_menu"]["starts"]["p50_us"] > STARTUP_TARGET_MS * 1000
+        return 1 if too_slow or report["imports"]["lazy_modules_loaded"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
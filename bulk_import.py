@@ -0,0 +1,439 @@
+"""
+This script bulk-loads data into the SQLite database from CSV or JSONL files.
+
+Classes:
+- ImportReport: Counts imported and rejected rows and the import throughput.
+
+Functions:
+- read_records(path): Streams the records of a CSV or JSONL file.
+- validate_sanse(record): Checks one showtime record and converts it to a row.
+- import_sanses(path, db_path=None, batch_size=1000):
+Streams a showtime file into the Sanses table in batch-sized transactions.
+- read_accounts(path): Streams user accounts with their bank cards.
+- validate_account(record): Checks one account record and its cards.
+- import_accounts(path, db_path=None, batch_size=5000, password_iterations=...):
+Streams user accounts and their cards into the users and bank_cards tables.
+- main(argv=None): Command line entry point.
+
+Usage:
+    python bulk_import.py sanses schedule.csv --batch-size 1000
+    python bulk_import.py accounts customers.jsonl --batch-size 5000 --password-iterations 10000
+
+Note:
+- Files are read as a stream, so memory stays bounded by the batch size.
+- CSV files need a header row; JSONL files hold one JSON object per line.
+- Showtime fields are movie_name, release_date (YYYY-MM-DD), hall_capacity and age_limit,
+plus the optional hall (default 1) and ticket_price (default 0).
+- Invalid rows are rejected with their line number and reason; valid rows still load.
+- Account fields are username, password, birthdate, number_phone and role_user. In JSONL
+an account lists its cards under "cards"; in CSV each row may also carry one card
+(card_name, card_number, card_expire_date, current_card_balance, card_cvv2) and
+consecutive rows with the same username belong to the same account.
+- Passwords that are already pbkdf2_sha256 hashes are kept; plaintext passwords are
+hashed on the shared worker pool. A lower --password-iterations makes large migrations
+fast; those hashes are upgraded to the current cost on each user's first login.
+- Usernames that already exist, or repeat within the file, are reported as duplicates
+and skipped without aborting their batch.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import repeat
+
+from users import (
+    PASSWORD_HASH_SCHEME, PASSWORD_ITERATIONS, Admin, User, UserRole, hash_password,
+    normalize_date, password_executor,
+)
+
+ACCOUNT_FIELDS = ("username", "password", "birthdate", "number_phone", "role_user")
+CARD_FIELDS = (
+    "card_name", "card_number", "card_expire_date", "current_card_balance", "card_cvv2",
+)
+
+
+class ImportReport:
+    """
+    The outcome of one import.
+
+    Attributes:
+        imported (int): The number of rows written.
+        rejected (list): (line number, reason) for every row that failed validation.
+        duplicates (list): (line number, username) for every account skipped as a duplicate.
+        cards_imported (int): The number of bank cards written by an account import.
+        seconds (float): The wall-clock duration of the import.
+    """
+    def __init__(self):
+        self.imported = 0
+        self.rejected = []
+        self.duplicates = []
+        self.cards_imported = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_sec(self):
+        """
+        Returns:
+            float: The number of imported rows per second.
+        """
+        return self.imported / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The report in a JSON-serialisable form.
+        """
+        return {
+            "imported": self.imported,
+            "cards_imported": self.cards_imported,
+            "duplicates": len(self.duplicates),
+            "rejected": len(self.rejected),
+            "seconds": round(self.seconds, 4),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "rejected_rows": [{"line": line, "reason": reason} for line, reason in self.rejected],
+            "duplicate_rows": [{"line": line, "username": username}
+                               for line, username in self.duplicates],
+        }
+
+
+def read_records(path):
+    """
+    Streams the records of a CSV (with header) or JSONL file.
+
+    Args:
+        path (str): The file to read. Files ending in .jsonl or .json are read as JSONL.
+
+    Yields:
+        tuple: (line number, dict with lower-cased keys). A JSONL line that does not
+            parse yields (line number, None).
+    """
+    with open(path, newline="", encoding="utf-8") as source:
+        if path.endswith((".jsonl", ".json")):
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield line_number, None
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, None
+                    continue
+                yield line_number, {str(key).strip().lower(): value
+                                    for key, value in record.items()}
+        else:
+            reader = csv.DictReader(source)
+            for record in reader:
+                yield reader.line_num, {str(key).strip().lower(): value
+                                        for key, value in record.items()}
+
+
+def _required(record, field):
+    """
+    Returns a record field that must be present and non-empty.
+    """
+    value = record.get(field)
+    if value is None or str(value).strip() == "":
+        raise ValueError(f"missing {field}")
+    return value
+
+
+def _int_field(record, field, minimum, maximum=None):
+    """
+    Returns a record field as an integer within [minimum, maximum].
+    """
+    value = _required(record, field)
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{field} is not a whole number: {value!r}") from None
+    if number < minimum or (maximum is not None and number > maximum):
+        raise ValueError(f"{field} out of range: {number}")
+    return number
+
+
+def _optional_int_field(record, field, default, minimum):
+    """
+    Returns an optional record field as an integer of at least minimum, or the default.
+    """
+    value = record.get(field)
+    if value is None or str(value).strip() == "":
+        return default
+    return _int_field(record, field, minimum)
+
+
+def validate_sanse(record):
+    """
+    Checks one showtime record and converts it to a Sanses row.
+
+    Args:
+        record (dict): The record, with movie_name, release_date, hall_capacity and
+            age_limit, and optionally hall and ticket_price.
+
+    Returns:
+        tuple: (movie_name, release_date, hall_capacity, age_limit, hall, ticket_price).
+
+    Raises:
+        ValueError: If a field is missing or invalid; the message says which.
+    """
+    if record is None:
+        raise ValueError("malformed line")
+    movie_name = str(_required(record, "movie_name")).strip()
+    try:
+        release_date = normalize_date(_required(record, "release_date"))
+    except ValueError as error:
+        if str(error).startswith("missing"):
+            raise
+        raise ValueError(f"release_date is not YYYY-MM-DD: {record['release_date']!r}") from None
+    hall_capacity = _int_field(record, "hall_capacity", 0)
+    age_limit = _int_field(record, "age_limit", 0, 99)
+    hall = _optional_int_field(record, "hall", 1, 1)
+    ticket_price = _optional_int_field(record, "ticket_price", 0, 0)
+    return movie_name, release_date, hall_capacity, age_limit, hall, ticket_price
+
+
+def import_sanses(path, db_path=None, batch_size=1000):
+    """
+    Streams a showtime file into the Sanses table.
+
+    Valid rows are inserted with executemany, one transaction per batch_size rows,
+    so loading a schedule costs one commit per batch instead of one per showtime.
+
+    Args:
+        path (str): The CSV or JSONL file.
+        db_path (str, optional): The database file. Default is the configured database.
+        batch_size (int, optional): The rows per transaction. Default is 1000.
+
+    Returns:
+        ImportReport: The counts, rejected rows and throughput.
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+    with Admin(db_path) as myadmin:
+        myadmin.migrate()
+        batch = []
+        for line_number, record in read_records(path):
+            try:
+                batch.append(validate_sanse(record))
+            except ValueError as error:
+                report.rejected.append((line_number, str(error)))
+                continue
+            if len(batch) >= batch_size:
+                report.imported += myadmin.bulk_add_sanses(batch)
+                batch = []
+        if batch:
+            report.imported += myadmin.bulk_add_sanses(batch)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def read_accounts(path):
+    """
+    Streams user accounts with their bank cards.
+
+    Args:
+        path (str): The CSV or JSONL file.
+
+    Yields:
+        tuple: (line number of the account's first row, record dict with a "cards" list),
+            or (line number, None) for a malformed line.
+    """
+    if path.endswith((".jsonl", ".json")):
+        for line_number, record in read_records(path):
+            if record is not None:
+                record["cards"] = [
+                    {str(key).strip().lower(): value for key, value in card.items()}
+                    for card in record.get("cards") or () if isinstance(card, dict)
+                ]
+            yield line_number, record
+        return
+    pending = None
+    for line_number, record in read_records(path):
+        card = None
+        if any(str(record.get(field) or "").strip() for field in CARD_FIELDS):
+            card = {field: record.get(field) for field in CARD_FIELDS}
+        if pending is not None and record.get("username") == pending[1]["username"]:
+            if card is not None:
+                pending[1]["cards"].append(card)
+            continue
+        if pending is not None:
+            yield pending
+        account = {field: record.get(field) for field in ACCOUNT_FIELDS}
+        account["cards"] = [card] if card is not None else []
+        pending = (line_number, account)
+    if pending is not None:
+        yield pending
+
+
+def validate_card(card):
+    """
+    Checks one bank card record and converts it to a bank_cards row.
+
+    Args:
+        card (dict): The card fields.
+
+    Returns:
+        tuple: (card_name, card_number, card_expire_date, current_card_balance, card_cvv2).
+
+    Raises:
+        ValueError: If a field is missing or invalid.
+    """
+    card_name = str(_required(card, "card_name")).strip()
+    card_number = str(_required(card, "card_number")).strip()
+    if len(card_number) != 16 or not card_number.isdigit():
+        raise ValueError(f"card_number must be 16 digits: {card_number!r}")
+    card_expire_date = str(_required(card, "card_expire_date")).strip()
+    parts = card_expire_date.split("/")
+    if len(parts) != 2 or not all(len(part) == 2 and part.isdigit() for part in parts):
+        raise ValueError(f"card_expire_date must be YY/MM: {card_expire_date!r}")
+    current_card_balance = _int_field(card, "current_card_balance", 0)
+    card_cvv2 = _int_field(card, "card_cvv2", 1000, 9999)
+    return card_name, card_number, card_expire_date, current_card_balance, card_cvv2
+
+
+def validate_account(record):
+    """
+    Checks one account record and its cards.
+
+    Args:
+        record (dict): The account fields plus a "cards" list.
+
+    Returns:
+        tuple: (username, password, birthdate, number_phone, role_user, cards), where
+            password is plaintext or an existing hash and cards is a list of card rows.
+
+    Raises:
+        ValueError: If a field is missing or invalid.
+    """
+    if record is None:
+        raise ValueError("malformed line")
+    username = str(_required(record, "username")).strip()
+    password = str(_required(record, "password"))
+    if not password.startswith(PASSWORD_HASH_SCHEME + "$") and len(password) < 5:
+        raise ValueError("password must be at least 5 characters long")
+    try:
+        birthdate = normalize_date(_required(record, "birthdate"))
+    except ValueError as error:
+        if str(error).startswith("missing"):
+            raise
+        raise ValueError(f"birthdate is not YYYY-MM-DD: {record['birthdate']!r}") from None
+    number_phone = str(record.get("number_phone") or "").strip() or None
+    role_user = str(record.get("role_user") or UserRole.USER.value).strip()
+    if role_user not in {role.value for role in UserRole}:
+        raise ValueError(f"unknown role_user: {role_user!r}")
+    cards = [validate_card(card) for card in record.get("cards") or ()]
+    return username, password, birthdate, number_phone, role_user, cards
+
+
+HASH_CHUNK_SIZE = 256
+
+
+def _hash_chunk(passwords, iterations):
+    """
+    Hashes a chunk of plaintext passwords; existing hashes are returned unchanged.
+    """
+    return [password if password.startswith(PASSWORD_HASH_SCHEME + "$")
+            else hash_password(password, iterations) for password in passwords]
+
+
+def _load_accounts(myuser, batch, report, password_iterations):
+    """
+    Deduplicates, hashes and writes one batch of validated accounts.
+    """
+    lines, unique = {}, []
+    for line_number, account in batch:
+        if account[0] in lines:
+            report.duplicates.append((line_number, account[0]))
+            continue
+        lines[account[0]] = line_number
+        unique.append(account)
+    # Skip hashing accounts that are known duplicates; the transaction checks again
+    existing = myuser.existing_usernames(lines)
+    unique = [account for account in unique if account[0] not in existing]
+    # One task per chunk keeps the worker pool busy without a future per password
+    passwords = [account[1] for account in unique]
+    chunks = [passwords[start:start + HASH_CHUNK_SIZE]
+              for start in range(0, len(passwords), HASH_CHUNK_SIZE)]
+    hashes = [password_hash for hashed in password_executor().map(
+        _hash_chunk, chunks, repeat(password_iterations)) for password_hash in hashed]
+    accounts = [(account[0], password_hash, *account[2:])
+                for account, password_hash in zip(unique, hashes)]
+    users, cards, raced = myuser.bulk_register_users(accounts)
+    report.imported += users
+    report.cards_imported += cards
+    report.duplicates.extend(
+        (lines[username], username) for username in sorted(existing | raced, key=lines.get)
+    )
+
+
+def import_accounts(path, db_path=None, batch_size=5000,
+                    password_iterations=PASSWORD_ITERATIONS):
+    """
+    Streams user accounts and their bank cards into the database.
+
+    Each batch is hashed on the shared worker pool and then written in one
+    transaction, with user IDs resolved in memory so the cards can be inserted
+    with executemany.
+
+    Args:
+        path (str): The CSV or JSONL file.
+        db_path (str, optional): The database file. Default is the configured database.
+        batch_size (int, optional): The accounts per transaction. Default is 5000.
+        password_iterations (int, optional): The PBKDF2 cost for plaintext passwords.
+
+    Returns:
+        ImportReport: Users and cards imported, duplicates, rejected rows and throughput.
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+    with User(db_path) as myuser:
+        myuser.migrate()
+        batch = []
+        for line_number, record in read_accounts(path):
+            try:
+                batch.append((line_number, validate_account(record)))
+            except ValueError as error:
+                report.rejected.append((line_number, str(error)))
+                continue
+            if len(batch) >= batch_size:
+                _load_accounts(myuser, batch, report, password_iterations)
+                batch = []
+        if batch:
+            _load_accounts(myuser, batch, report, password_iterations)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    """
+    Command line entry point. Prints the import report as JSON.
+
+    Args:
+        argv (list, optional): The arguments to parse. Default is sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Bulk-load data from CSV or JSONL files.")
+    parser.add_argument("--db", help="The database file (default: $CINEMATICKET_DB).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sanses = commands.add_parser("sanses", help="Import showtimes into the Sanses table.")
+    sanses.add_argument("path")
+    sanses.add_argument("--batch-size", type=int, default=1000)
+    accounts = commands.add_parser("accounts", help="Import users and their bank cards.")
+    accounts.add_argument("path")
+    accounts.add_argument("--batch-size", type=int, default=5000)
+    accounts.add_argument("--password-iterations", type=int, default=PASSWORD_ITERATIONS)
+    args = parser.parse_args(argv)
+
+    if args.command == "sanses":
+        report = import_sanses(args.path, args.db, args.batch_size)
+    elif args.command == "accounts":
+        report = import_accounts(args.path, args.db, args.batch_size,
+                                 args.password_iterations)
+    json.dump(report.as_dict(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+This script generates realistic, large synthetic databases for benchmarks and load tests.
+
+Functions:
+- generate(db_path, users=..., sanses=..., bookings=..., seed=0, ...):
+Creates a new database file and fills it with users, bank cards, wallets (with their
+ledger entries), subscriptions, sanses and bookings through batched bulk inserts.
+- main(argv=None): Command line entry point. Prints the row counts as JSON.
+
+Usage:
+    python datagen.py big.db --users 1000000 --sanses 100000 --bookings 5000000 --seed 7
+
+Note:
+- The output only depends on the arguments: the same seed gives the same database on
+every machine. Dates are generated around --base-date (UTC), never around today.
+- Every user gets the password "password" (GENERATED_PASSWORD). One hash is computed
+and shared, because hashing millions of passwords would dominate the run time.
+- Cards per user follow --card-weights (weights for 0, 1, 2, ... cards); --wallet-share
+of the users with a card own a funded wallet, and --subscription-share hold a Golden
+subscription, some of them already expired.
+- Bookings pick sanses with a Zipf-like popularity (weight 1 / rank ** --skew over a
+shuffled ranking), so a few sanses sell out while the long tail stays empty. Bookings
+that would oversell a sanse are skipped and reported.
+- The generator refuses to touch an existing file, so it can never overwrite
+'mydatabase.db'.
+"""
+
+import argparse
+import calendar
+import json
+import os
+import random
+import sys
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate
+
+from users import DEFAULT_SUBSCRIPTION, NO_SUBSCRIPTION_NOTICE, User, hash_password
+
+USERNAME_FORMAT = "user{}"
+GENERATED_PASSWORD = "password"
+DEFAULT_BASE_DATE = date(2024, 1, 1)
+DEFAULT_CARD_WEIGHTS = (10, 55, 25, 10)
+HALL_CAPACITIES = (40, 80, 120, 200, 300)
+AGE_LIMITS = (0, 0, 7, 12, 12, 16, 18)
+HALLS = 8
+TICKET_PRICES = (60_000, 80_000, 100_000, 150_000)
+SEAT_COUNTS = (1, 2, 3, 4)
+SEAT_WEIGHTS = (60, 25, 10, 5)
+TITLE_WORDS = (
+    "Night", "Silent", "Last", "Red", "Lost", "City", "River", "Storm", "Iron", "Golden",
+    "Shadow", "Winter", "Ocean", "Secret", "Long", "Distant", "Broken", "Wild", "Glass",
+    "Summer",
+)
+DAY = 86400
+
+
+def _epoch(day):
+    """
+    Returns:
+        int: The UTC epoch time of midnight at the start of a date.
+    """
+    return calendar.timegm(day.timetuple())
+
+
+def _timestamp(epoch):
+    """
+    Returns:
+        str: An epoch time as "YYYY-MM-DD HH:MM:SS" (UTC), like the stored date strings.
+    """
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _insert_batches(db, sql, rows, batch_size):
+    """
+    Inserts rows from an iterator with executemany, one transaction per batch.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with db.transaction():
+                db.cursor.executemany(sql, batch)
+            total += len(batch)
+            batch.clear()
+    if batch:
+        with db.transaction():
+            db.cursor.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+
+def generate(db_path, users=10_000, sanses=1_000, bookings=50_000,
+             card_weights=DEFAULT_CARD_WEIGHTS, wallet_share=0.3, subscription_share=0.2,
+             skew=1.1, seed=0, base_date=DEFAULT_BASE_DATE, batch_size=50_000,
+             password_hash=None):
+    """
+    Creates a synthetic database.
+
+    Args:
+        db_path (str): The database file to create. It must not exist yet.
+        users (int, optional): The number of users. Default is 10,000.
+        sanses (int, optional): The number of sanses. Default is 1,000.
+        bookings (int, optional): The number of booking attempts. Default is 50,000.
+        card_weights (tuple, optional): Relative weights of owning 0, 1, 2, ... cards.
+        wallet_share (float, optional): Share of card owners with a funded wallet.
+        subscription_share (float, optional): Share of users with a Golden subscription.
+        skew (float, optional): The Zipf exponent of sanse popularity; 0 is uniform.
+        seed (int, optional): The random seed. Default is 0.
+        base_date (date, optional): The "today" the data is generated around.
+        batch_size (int, optional): Rows per insert transaction. Default is 50,000.
+        password_hash (str, optional): The stored hash for every user. Default is a
+            seeded hash of GENERATED_PASSWORD at a low cost.
+
+    Returns:
+        dict: Rows per table, skipped (sold out) bookings, seconds and rows_per_sec.
+
+    Raises:
+        FileExistsError: If db_path already exists.
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists; datagen only creates new files")
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    base_epoch = _epoch(base_date)
+    password_hash = password_hash or hash_password(GENERATED_PASSWORD, 1000, rng.randbytes(16))
+    report = {}
+
+    with User(db_path) as db:
+        db.migrate()
+        # A freshly generated file can simply be regenerated, so skip the fsyncs
+        db.connector.execute("PRAGMA synchronous=OFF")
+
+        # Users with their cards. Card IDs are assigned in insertion order on a new
+        # file, so the first card of every user is known without reading it back.
+        first_card = array("q", bytes(8 * (users + 1)))
+        cards = []
+        card_counts = range(len(card_weights))
+        card_cum_weights = list(accumulate(card_weights))
+
+        def user_rows():
+            for user_id in range(1, users + 1):
+                birth = base_date - timedelta(days=rng.randint(10 * 365, 70 * 365))
+                registered = base_epoch - rng.randint(0, 3 * 365 * DAY)
+                subscription, notice = DEFAULT_SUBSCRIPTION, NO_SUBSCRIPTION_NOTICE
+                expires_at = None
+                if rng.random() < subscription_share:
+                    expires_at = base_epoch + rng.randint(-15 * DAY, 30 * DAY)
+                    subscription, notice = "Golden", _timestamp(expires_at)
+                for _ in range(rng.choices(card_counts, cum_weights=card_cum_weights)[0]):
+                    cards.append((user_id, rng.choice(TITLE_WORDS),
+                                  f"6037{rng.randrange(10 ** 12):012d}",
+                                  f"{rng.randint(25, 30)}/{rng.randint(1, 12):02d}",
+                                  rng.randint(0, 5_000_000), rng.randint(100, 9999)))
+                    if not first_card[user_id]:
+                        first_card[user_id] = len(cards) + report.get("bank_cards", 0)
+                yield (USERNAME_FORMAT.format(user_id), password_hash, birth.isoformat(),
+                       f"09{rng.randrange(10 ** 9):09d}", _timestamp(registered),
+                       subscription, notice, "User", expires_at)
+
+        def flush_cards():
+            report["bank_cards"] = report.get("bank_cards", 0) + _insert_batches(
+                db,
+                """INSERT INTO bank_cards(user_id, card_name, card_number, card_expire_date,
+                    current_card_balance, card_cvv2) VALUES (?, ?, ?, ?, ?, ?)""",
+                cards, batch_size,
+            )
+            cards.clear()
+
+        report["users"] = 0
+        rows = user_rows()
+        while True:
+            # Insert users and then their cards batch by batch, so the pending
+            # cards never grow beyond about one batch of users
+            chunk = [row for _, row in zip(range(batch_size), rows)]
+            if not chunk:
+                break
+            report["users"] += _insert_batches(
+                db,
+                """INSERT INTO users(username, password, birthdate, number_phone,
+                    registration_date, Subscription, subscription_balance, role_user,
+                    subscription_expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                chunk, batch_size,
+            )
+            flush_cards()
+
+        # Funded wallets, each with the recharge that funded it in the ledger
+        wallets = [(user_id, first_card[user_id], rng.randint(1_000, 500_000),
+                    base_epoch - rng.randint(0, 90 * DAY))
+                   for user_id in range(1, users + 1)
+                   if first_card[user_id] and rng.random() < wallet_share]
+        report["wallets"] = _insert_batches(
+            db, "INSERT INTO wallets(user_id, balance) VALUES (?, ?)",
+            ((user_id, balance) for user_id, _, balance, _ in wallets), batch_size,
+        )
+        report["wallet_ledger"] = _insert_batches(
+            db,
+            """INSERT INTO wallet_ledger(user_id, card_id, amount, balance_after, created_at)
+                VALUES (?, ?, ?, ?, ?)""",
+            ((user_id, card_id, balance, balance, created_at)
+             for user_id, card_id, balance, created_at in wallets),
+            batch_size,
+        )
+        del wallets
+
+        # Bookings by skewed popularity, never beyond a sanse's capacity
+        capacity = array("l", (rng.choice(HALL_CAPACITIES) for _ in range(sanses + 1)))
+        sold = array("l", bytes(capacity.itemsize * (sanses + 1)))
+        ranking = list(range(1, sanses + 1))
+        rng.shuffle(ranking)
+        popularity = list(accumulate(1 / rank ** skew for rank in range(1, sanses + 1)))
+        report["skipped_bookings"] = 0
+
+        def booking_rows():
+            remaining = bookings if sanses and users else 0
+            while remaining:
+                count = min(remaining, batch_size)
+                remaining -= count
+                picks = rng.choices(ranking, cum_weights=popularity, k=count)
+                seats = rng.choices(SEAT_COUNTS, SEAT_WEIGHTS, k=count)
+                for sanse_id, seat_count in zip(picks, seats):
+                    if sold[sanse_id] + seat_count > capacity[sanse_id]:
+                        report["skipped_bookings"] += 1
+                        continue
+                    sold[sanse_id] += seat_count
+                    yield (sanse_id, rng.randint(1, users), seat_count,
+                           base_epoch - rng.randint(0, 60 * DAY))
+
+        report["bookings"] = _insert_batches(
+            db, "INSERT INTO bookings(sanse_id, user_id, seats, booked_at) VALUES (?, ?, ?, ?)",
+            booking_rows(), batch_size,
+        )
+
+        # Sanses last, so their remaining capacity reflects the bookings
+        report["sanses"] = _insert_batches(
+            db,
+            """INSERT INTO Sanses(id, Movie_Name, Release_date, hall_capacity, age_limit,
+                                  hall, ticket_price)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            ((sanse_id,
+              f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {sanse_id}",
+              (base_date + timedelta(days=rng.randint(-365, 60))).isoformat(),
+              capacity[sanse_id] - sold[sanse_id], rng.choice(AGE_LIMITS),
+              rng.randint(1, HALLS), rng.choice(TICKET_PRICES))
+             for sanse_id in range(1, sanses + 1)),
+            batch_size,
+        )
+        with db.transaction():
+            db.bump_catalogue_version()
+        db.connector.execute("PRAGMA synchronous=NORMAL")
+        db.connector.execute("PRAGMA optimize")
+
+    seconds = time.perf_counter() - start
+    total = sum(report[table] for table in
+                ("users", "bank_cards", "wallets", "wallet_ledger", "bookings", "sanses"))
+    report["seconds"] = round(seconds, 3)
+    report["rows_per_sec"] = round(total / seconds, 1) if seconds else 0.0
+    return report
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Args:
+        argv (list, optional): The arguments to parse. Default is sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic ticketing database.")
+    parser.add_argument("db_path", help="The database file to create.")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--sanses", type=int, default=1_000)
+    parser.add_argument("--bookings", type=int, default=50_000)
+    parser.add_argument("--card-weights", type=float, nargs="+",
+                        default=list(DEFAULT_CARD_WEIGHTS),
+                        help="Relative weights of owning 0, 1, 2, ... cards.")
+    parser.add_argument("--wallet-share", type=float, default=0.3)
+    parser.add_argument("--subscription-share", type=float, default=0.2)
+    parser.add_argument("--skew", type=float, default=1.1,
+                        help="Zipf exponent of sanse popularity (0 = uniform).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-date", type=date.fromisoformat, default=DEFAULT_BASE_DATE)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args(argv)
+    report = generate(args.db_path, args.users, args.sanses, args.bookings,
+                      tuple(args.card_weights), args.wallet_share, args.subscription_share,
+                      args.skew, args.seed, args.base_date, args.batch_size)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
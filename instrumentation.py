@@ -0,0 +1,400 @@
+"""
+This script records how long every SQL statement issued through 'users.py' takes.
+
+SQLiteConnection creates its cursors as InstrumentedCursor, so every execute() and
+executemany() is counted without touching the methods that issue them.
+
+Classes:
+- LatencyHistogram: Fixed-size log-scale histogram for latency percentiles.
+- StatementStats: Calls, latency, fetch time and rows of one normalized statement.
+- QueryStats: The process-wide registry of StatementStats plus the slow-query log.
+- InstrumentedCursor: sqlite3.Cursor subclass that reports to a QueryStats.
+
+Functions:
+- query_stats(): Returns the process-wide QueryStats.
+- snapshot(): Returns the current statistics as a JSON-serializable dict.
+- write_snapshot(path): Writes snapshot() to a JSON file.
+- collect_statements(): Context manager that also tallies the statements run by the
+current thread inside a with-block (used by tracing.py to attribute queries to actions).
+
+Configuration (environment variables):
+- CINEMATICKET_QUERY_STATS: "0" turns instrumentation off (plain cursors). Default on.
+- CINEMATICKET_SLOW_QUERY_MS: Statements slower than this many milliseconds (execute
+plus fetch) go to the slow-query log with their EXPLAIN QUERY PLAN. Default 50.
+
+Note:
+- Recording costs a couple of microseconds per statement: one dict lookup and a few
+integer updates under a lock. Histograms have a fixed size, so memory stays bounded
+however long the process runs.
+- Latency percentiles cover the execute step. For SELECTs most of the work may happen
+while fetching, which is counted in total_ms and fetch_ms.
+- The query plan of a statement is captured once, the first time it is slow, and
+uses the parameters of that call. Slow queries are also logged as warnings on the
+"cinematicket.slow_query" logger.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+QUERY_STATS_ENV = "CINEMATICKET_QUERY_STATS"
+SLOW_QUERY_MS_ENV = "CINEMATICKET_SLOW_QUERY_MS"
+DEFAULT_SLOW_QUERY_MS = 50.0
+MAX_STATEMENTS = 500
+SLOW_LOG_SIZE = 100
+OTHER_STATEMENTS = "<other statements>"
+
+slow_query_logger = logging.getLogger("cinematicket.slow_query")
+_collectors = threading.local()
+
+
+def instrumentation_enabled():
+    """
+    Returns:
+        bool: False if $CINEMATICKET_QUERY_STATS is "0", otherwise True.
+    """
+    return os.environ.get(QUERY_STATS_ENV, "1") != "0"
+
+
+class LatencyHistogram:
+    """
+    Log-scale histogram of nanosecond latencies with four buckets per power of two.
+
+    Percentiles are the upper bound of the bucket they fall in, so they are within
+    about 25% of the exact value, at a fixed cost of 256 counters.
+    """
+    __slots__ = ("counts", "total")
+    SUB_BUCKETS = 4
+
+    def __init__(self):
+        self.counts = [0] * (64 * self.SUB_BUCKETS)
+        self.total = 0
+
+    @classmethod
+    def bucket(cls, value):
+        """
+        Returns:
+            int: The bucket index of a non-negative latency in nanoseconds.
+        """
+        bits = value.bit_length()
+        if bits <= 2:
+            return value
+        return bits * cls.SUB_BUCKETS + ((value >> (bits - 3)) & 3)
+
+    @classmethod
+    def upper_bound(cls, index):
+        """
+        Returns:
+            int: The largest latency (in nanoseconds) that falls in a bucket.
+        """
+        bits, sub = divmod(index, cls.SUB_BUCKETS)
+        if bits == 0:
+            return index
+        return ((4 | sub) + 1 << (bits - 3)) - 1
+
+    def record(self, value):
+        self.counts[self.bucket(value)] += 1
+        self.total += 1
+
+    def percentile(self, percentile):
+        """
+        Args:
+            percentile (float): Between 0 and 100.
+
+        Returns:
+            int: The latency in nanoseconds at that percentile, or 0 without samples.
+        """
+        if not self.total:
+            return 0
+        rank = max(1, -(-self.total * percentile // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.upper_bound(index)
+        return self.upper_bound(len(self.counts) - 1)
+
+
+class StatementStats:
+    """
+    The counters of one normalized SQL statement.
+
+    Attributes:
+        sql (str): The statement with whitespace collapsed.
+        calls (int): How many times it was executed (executemany counts once).
+        rows (int): Rows returned (SELECT, counted when fetched) or changed (DML).
+        execute_ns (int): Total time spent in execute()/executemany().
+        fetch_ns (int): Total time spent fetching its rows.
+        max_ns (int): The slowest execute plus fetch of a single call.
+        histogram (LatencyHistogram): The distribution of execute latencies.
+        plan (list): The EXPLAIN QUERY PLAN details, captured when first slow.
+    """
+    __slots__ = ("sql", "calls", "rows", "execute_ns", "fetch_ns", "max_ns", "histogram",
+                 "plan")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.rows = 0
+        self.execute_ns = 0
+        self.fetch_ns = 0
+        self.max_ns = 0
+        self.histogram = LatencyHistogram()
+        self.plan = None
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The counters, in milliseconds and microseconds, for snapshot().
+        """
+        return {
+            "sql": self.sql,
+            "calls": self.calls,
+            "rows": self.rows,
+            "total_ms": round((self.execute_ns + self.fetch_ns) / 1e6, 3),
+            "fetch_ms": round(self.fetch_ns / 1e6, 3),
+            "mean_us": round(self.execute_ns / self.calls / 1000, 2) if self.calls else 0.0,
+            "p50_us": round(self.histogram.percentile(50) / 1000, 2),
+            "p90_us": round(self.histogram.percentile(90) / 1000, 2),
+            "p99_us": round(self.histogram.percentile(99) / 1000, 2),
+            "max_us": round(self.max_ns / 1000, 2),
+        }
+
+
+class QueryStats:
+    """
+    Thread-safe registry of per-statement statistics and the recent slow queries.
+
+    Attributes:
+        slow_threshold_ns (int): The execute plus fetch time that makes a call slow.
+        slow_queries (deque): The last SLOW_LOG_SIZE slow calls.
+    """
+    def __init__(self, slow_threshold_ms=None):
+        if slow_threshold_ms is None:
+            slow_threshold_ms = float(os.environ.get(SLOW_QUERY_MS_ENV, DEFAULT_SLOW_QUERY_MS))
+        self.slow_threshold_ns = int(slow_threshold_ms * 1e6)
+        self.slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+        self._statements = {}
+        self._normalized = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def statement(self, sql):
+        """
+        Returns:
+            StatementStats: The counters of a statement, created on first use.
+        """
+        stats = self._normalized.get(sql)
+        if stats is not None:
+            return stats
+        normalized = " ".join(sql.split())
+        with self._lock:
+            stats = self._statements.get(normalized)
+            if stats is None:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    # Dynamic SQL must not grow the registry without bound
+                    normalized = OTHER_STATEMENTS
+                    stats = self._statements.get(normalized)
+                if stats is None:
+                    stats = self._statements[normalized] = StatementStats(normalized)
+            if len(self._normalized) < 4 * MAX_STATEMENTS:
+                self._normalized[sql] = stats
+        return stats
+
+    def record_execute(self, stats, elapsed_ns, rows):
+        with self._lock:
+            stats.calls += 1
+            stats.execute_ns += elapsed_ns
+            stats.histogram.record(elapsed_ns)
+            if rows > 0:
+                stats.rows += rows
+            if elapsed_ns > stats.max_ns:
+                stats.max_ns = elapsed_ns
+
+    def record_fetch(self, stats, elapsed_ns, rows, call_ns):
+        with self._lock:
+            stats.fetch_ns += elapsed_ns
+            stats.rows += rows
+            if call_ns > stats.max_ns:
+                stats.max_ns = call_ns
+
+    def record_slow(self, stats, connection, sql, parameters, elapsed_ns):
+        """
+        Adds a call to the slow-query log, capturing the statement's plan once.
+        """
+        if stats.plan is None and parameters is not None:
+            try:
+                stats.plan = [row[-1] for row in connection.execute(
+                    f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()]
+            except sqlite3.Error:
+                # Statements such as BEGIN or PRAGMA have no query plan
+                stats.plan = []
+        entry = {
+            "sql": stats.sql,
+            "ms": round(elapsed_ns / 1e6, 3),
+            "at": round(time.time(), 3),
+            "plan": stats.plan,
+        }
+        self.slow_queries.append(entry)
+        slow_query_logger.warning("slow query (%.1f ms): %s plan=%s",
+                                  entry["ms"], stats.sql, stats.plan)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Every statement's counters (most total time first), the slow-query
+                log and the threshold, ready for json.dump().
+        """
+        with self._lock:
+            statements = [stats.as_dict() for stats in self._statements.values()]
+            slow_queries = list(self.slow_queries)
+        statements.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return {
+            "since": round(self.started_at, 3),
+            "slow_threshold_ms": self.slow_threshold_ns / 1e6,
+            "statements": statements,
+            "slow_queries": slow_queries,
+        }
+
+    def reset(self):
+        """
+        Forgets every counter and slow query.
+        """
+        with self._lock:
+            self._statements.clear()
+            self._normalized.clear()
+            self.slow_queries.clear()
+            self.started_at = time.time()
+
+
+_query_stats = QueryStats()
+
+
+def query_stats():
+    """
+    Returns:
+        QueryStats: The process-wide registry used by InstrumentedCursor.
+    """
+    return _query_stats
+
+
+def snapshot():
+    """
+    Returns:
+        dict: query_stats().snapshot().
+    """
+    return _query_stats.snapshot()
+
+
+def write_snapshot(path):
+    """
+    Writes the current statistics to a JSON file.
+
+    Args:
+        path (str): The output file.
+    """
+    import json
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(snapshot(), output, indent=2)
+
+
+@contextmanager
+def collect_statements():
+    """
+    Tallies the statements the current thread runs inside the with-block.
+
+    Yields:
+        dict: Normalized SQL -> [calls, nanoseconds], filled in as statements run.
+    """
+    collected = {}
+    previous = getattr(_collectors, "current", None)
+    _collectors.current = collected
+    try:
+        yield collected
+    finally:
+        _collectors.current = previous
+
+
+def _collect(sql, calls, elapsed_ns):
+    collected = getattr(_collectors, "current", None)
+    if collected is not None:
+        entry = collected.get(sql)
+        if entry is None:
+            entry = collected[sql] = [0, 0]
+        entry[0] += calls
+        entry[1] += elapsed_ns
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    A cursor that reports every statement to the process-wide QueryStats.
+
+    Fetch time and fetched rows are added to the statement last executed on the
+    cursor, and a call is checked against the slow threshold after each step.
+    """
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._stats = None
+        self._sql = None
+        self._parameters = None
+        self._call_ns = 0
+        self._logged = False
+
+    def _executed(self, sql, parameters, elapsed_ns):
+        stats = _query_stats.statement(sql)
+        self._stats, self._sql, self._parameters = stats, sql, parameters
+        self._call_ns, self._logged = elapsed_ns, False
+        _query_stats.record_execute(stats, elapsed_ns, self.rowcount)
+        _collect(stats.sql, 1, elapsed_ns)
+        self._check_slow()
+
+    def _fetched(self, rows, elapsed_ns):
+        if self._stats is None:
+            return
+        self._call_ns += elapsed_ns
+        _query_stats.record_fetch(self._stats, elapsed_ns, rows, self._call_ns)
+        _collect(self._stats.sql, 0, elapsed_ns)
+        self._check_slow()
+
+    def _check_slow(self):
+        if not self._logged and self._call_ns > _query_stats.slow_threshold_ns:
+            self._logged = True
+            _query_stats.record_slow(self._stats, self.connection, self._sql,
+                                     self._parameters, self._call_ns)
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter_ns()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._executed(sql, parameters, time.perf_counter_ns() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter_ns()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            # The parameters were consumed, so a slow executemany has no plan
+            self._executed(sql, None, time.perf_counter_ns() - start)
+
+    def fetchone(self):
+        start = time.perf_counter_ns()
+        row = super().fetchone()
+        self._fetched(row is not None, time.perf_counter_ns() - start)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter_ns()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), time.perf_counter_ns() - start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter_ns()
+        rows = super().fetchall()
+        self._fetched(len(rows), time.perf_counter_ns() - start)
+        return rows
@@ -5,8 +5,10 @@ bank card management, wallet management, and subscription management.
 
 Functions:
 - clear_terminal(): Clears the terminal screen based on the user's operating system.
-- main(): Entry point of the program. Initializes a user dictionary
-and enters an infinite loop to manage user interactions.
+- browse_sanses(myadmin, page_size): Pages through the sanses with next/previous navigation.
+- main(): Entry point of the program. Creates the user and admin objects
+and runs the menu loop.
+- main_menu(myuser, myadmin): The infinite loop that manages user interactions.
 
 Usage:
 1. Run the script to start the user management system.
@@ -16,6 +18,9 @@ for managing their information, bank cards, wallet, and subscriptions.
 
 Note:
 - User data is stored in an SQLite database.
+- Every menu action's database work runs inside trace("<action>") (see tracing.py):
+CINEMATICKET_TRACE=1 records per-action latency histograms, written to a JSON report
+on exit, and CINEMATICKET_PROFILE=<action> runs that action under cProfile.
 - Bank card information includes card name, card number,
 expiration date, current card balance, and CVV2.
 - Wallet functionality allows users to recharge their wallet balance
@@ -25,7 +30,17 @@ using bank cards and buy subscriptions.
 
 import os
 import datetime
-from users import User,Admin
+from tracing import TRACE_ENV, trace, tracer
+from users import (
+    User, Admin, ReservationStatus, DEFAULT_PAGE_SIZE, age_on, normalize_date, sanses_table,
+)
+
+RESERVATION_MESSAGES = {
+    ReservationStatus.RESERVED: "Ticket purchased successfully!",
+    ReservationStatus.SOLD_OUT: "Sorry, this sanse is sold out.",
+    ReservationStatus.AGE_RESTRICTED: "You are under the age limit for this movie.",
+    ReservationStatus.NOT_FOUND: "There is no sanse with this id.",
+}
 
 
 def clear_terminal():
@@ -43,15 +58,59 @@ def clear_terminal():
         _ = os.system("clear")
 
 
+def browse_sanses(myadmin, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Shows the sanses one page at a time with next/previous navigation.
+
+    Args:
+        myadmin (Admin): The object used for admin operations.
+        page_size (int, optional): The rows per page. Default is DEFAULT_PAGE_SIZE.
+    """
+    with trace("admin.sanse.browse"):
+        page = myadmin.get_sanses_page(limit=page_size)
+    while True:
+        clear_terminal()
+        print(sanses_table(page.rows))
+        choice = input("N. Next page  P. Previous page  Q. Back: ").upper()
+        if choice == "N" and page.next_cursor is not None:
+            with trace("admin.sanse.browse"):
+                page = myadmin.get_sanses_page(after=page.next_cursor, limit=page_size)
+        elif choice == "P" and page.prev_cursor is not None:
+            with trace("admin.sanse.browse"):
+                page = myadmin.get_sanses_page(before=page.prev_cursor, limit=page_size)
+        elif choice == "Q":
+            break
+
+
 def main():
     """
     Entry point of the program.
-    This function initializes an empty dictionary to store users and enters
-    an infinite loop to continue running the program until interrupted.
+    This function borrows pooled database connections for the user and admin
+    objects, runs the menu loop and hands the connections back on exit.
     """
-    global current_card_balance_for_wallet_recharge
     myuser = User()
     myadmin = Admin()
+    try:
+        # Create or upgrade the schema; a current database costs one pragma read
+        myuser.migrate()
+        # Downgrade expired subscriptions once per start, so profile views stay read-only
+        myuser.sweep_expired_subscriptions()
+        main_menu(myuser, myadmin)
+    finally:
+        myuser.close()
+        myadmin.close()
+        if tracer.enabled:
+            print(f"Action timings written to {tracer.write()} ({TRACE_ENV}=1).")
+
+
+def main_menu(myuser, myadmin):
+    """
+    Runs the interactive menu loop until the user chooses to exit.
+
+    Args:
+        myuser (User): The object used for user operations.
+        myadmin (Admin): The object used for admin operations.
+    """
     exit_flag = False  # Flag variable for controlling loop exit
     while not exit_flag:
         clear_terminal()
@@ -91,7 +150,8 @@ def main():
                 number_phone = None
 
             # Creating a new user using the database
-            myuser.register_user(username, password, birthdate, role_user, number_phone)
+            with trace("register"):
+                myuser.register_user(username, password, birthdate, role_user, number_phone)
 
             # Printing a success message
             clear_terminal()
@@ -102,19 +162,14 @@ def main():
             username = input("Please enter your username: ")
             password = input("Please enter your password: ")
 
-            found_user = None  # Variable for storing the found user
-            select_data = myuser.select_data(username, password)
+            # One indexed lookup returns the profile and role of the matching user
+            with trace("login"):
+                session = myuser.authenticate(username, password)
 
-            # Check if the provided username and password match a user in the database
-            if select_data:
-                found_user = myuser.select_user(username, password)
+            if session:
                 clear_terminal()
-
-            if found_user:
-                server_role = found_user[0]
-                role = myuser.get_server_role(server_role)
-                if role[0] == "User":
-                    print("\nLogin Successful Dear", found_user[1])
+                if session.role == "User":
+                    print("\nLogin Successful Dear", session.username)
                     while True:
                         print("User Menu:")
                         print("1. Display user information")
@@ -127,13 +182,13 @@ def main():
 
                         if user_choice == "1":
                             # Displaying user information (username and phone number)
-                            print("Username: ", found_user[1])
-                            print("Birthdate: ", found_user[3])
-                            print("Phone Number: ", found_user[4])
-                            print("Registration Date: ", found_user[5])
-                            print("Your subscription type: ", found_user[6])
-                            check_subscription = myuser.check_subscription(found_user[0])
-                            print("Days left until the end of the subscription:",check_subscription)
+                            print("Username: ", session.username)
+                            print("Birthdate: ", session.birthdate)
+                            print("Phone Number: ", session.number_phone)
+                            print("Registration Date: ", session.registration_date)
+                            days_left = session.days_left()
+                            print("Your subscription type: ", session.subscription)
+                            print("Days left until the end of the subscription:", days_left)
                         elif user_choice == "2":
                             # Editing user information
                             new_username = input(
@@ -142,8 +197,9 @@ def main():
                             new_number_phone = input(
                                 "New phone number (leave blank to keep current): "
                             )
-                            find_id = found_user[0]
-                            myuser.update_info(new_username, new_number_phone, find_id)
+                            find_id = session.id
+                            with trace("profile.update"):
+                                myuser.update_info(new_username, new_number_phone, find_id)
                             print("Information updated successfully.")
                             clear_terminal()
 
@@ -153,10 +209,11 @@ def main():
 
                             # Check if the new password and confirmation match
                             if new_password == confirm_password:
-                                find_id = found_user[0]
-                                myuser.change_password(
-                                    new_password, confirm_password, find_id
-                                )
+                                find_id = session.id
+                                with trace("password.change"):
+                                    myuser.change_password(
+                                        new_password, confirm_password, find_id
+                                    )
                                 print("Password changed successfully.")
                             else:
                                 print("Passwords do not match. Please try again.")
@@ -239,22 +296,24 @@ def main():
                                             )
                                             continue
                                     # Add the bank card to the user's account
-                                    myuser.add_bank_card(
-                                        found_user[0],
-                                        card_name,
-                                        card_number,
-                                        "/".join(card_expire_date),
-                                        current_card_balance,
-                                        card_cvv2,
-                                    )
+                                    with trace("card.add"):
+                                        myuser.add_bank_card(
+                                            session.id,
+                                            card_name,
+                                            card_number,
+                                            "/".join(card_expire_date),
+                                            current_card_balance,
+                                            card_cvv2,
+                                        )
                                     print("Bank card added successfully.")
                                     clear_terminal()
                                 elif bank_choice == "2":
                                     clear_terminal()
                                     # Retrieve and display all bank cards associated with the user
-                                    bank_cards = myuser.select_bank_card()
+                                    with trace("card.list"):
+                                        bank_cards = myuser.select_bank_card(session.id)
                                     for card in bank_cards:
-                                        print("Card Id : ", card[0])
+                                        print("Card Id : ", card[6])
                                         print("Card Name : ", card[2])
                                         print("Card Number : ", card[3])
                                         print("Card Expire Date : ", card[4])
@@ -262,16 +321,21 @@ def main():
                                         print()  # Add a line break between each bank card
                                 elif bank_choice == "3":
                                     while True:
-                                        card_id = int(input("Choose your card id: "))
-                                        result = myuser.check_card_id(card_id)
+                                        ordinal = int(input("Choose your card id: "))
+                                        with trace("card.lookup"):
+                                            card_id = myuser.card_id_from_ordinal(
+                                                session.id, ordinal
+                                            )
+                                            result = myuser.check_card_id(card_id, session.id)
                                         if result:
                                             card_name = input("New name for your card: ")
                                             card_number = input(
                                                 "New card number (16 digits): "
                                             )
-                                            myuser.update_info_bank_cards(
-                                                card_name, card_number, card_id
-                                            )
+                                            with trace("card.update"):
+                                                myuser.update_info_bank_cards(
+                                                    card_name, card_number, card_id, session.id
+                                                )
                                             break
                                         else:
                                             print(
@@ -280,17 +344,21 @@ def main():
                                             continue
                                     clear_terminal()
                                 elif bank_choice == "4":
-                                    card_id = int(
-                                        input("Enter The ID of your bank card to delete: ")
-                                    )
+                                    ordinal = int(input("Enter The ID of your bank card to delete: "))
                                     # Delete the specified bank card from the user's account
-                                    myuser.delete_bank_card(card_id)
+                                    with trace("card.delete"):
+                                        card_id = myuser.card_id_from_ordinal(session.id, ordinal)
+                                        if card_id is None:
+                                            print("id for bank card is wrong.")
+                                        else:
+                                            myuser.delete_bank_card(card_id, session.id)
                                     clear_terminal()
                                 elif bank_choice == "5":
                                     clear_terminal()
                                     print("Welcome to Wallet Manager!")
                                     while True:
-                                        wallet_balance = myuser.show_wallet_balance()
+                                        with trace("wallet.show"):
+                                            wallet_balance = myuser.show_wallet_balance(session.id)
                                         print("Wallet Balance : ", wallet_balance[0])
                                         print("\n1. Recharge wallet")
                                         print("2. Buy a subscription for an account")
@@ -308,22 +376,28 @@ def main():
                                             user_choice = input("please enter your choice: ")
                                             if user_choice == "1":
                                                 clear_terminal()
-                                                bank_cards = myuser.select_bank_card()
+                                                with trace("card.list"):
+                                                    bank_cards = myuser.select_bank_card(session.id)
+                                                card_balances = {}
                                                 for card in bank_cards:
-                                                    print("Card Id : ", card[0])
+                                                    print("Card Id : ", card[6])
                                                     print("Card Name : ", card[2])
                                                     print("Card Number : ", card[3])
                                                     print("Card Expire Date : ", card[4])
-                                                    current_card_balance_for_wallet_recharge=card[5]
+                                                    card_balances[card[0]] = card[5]
                                                     print("Card Balance : ", card[5])
                                                 while True:
-                                                    card_id_wallet = int(input(
-                                                        "Choose your card id: "
-                                                        ))
+                                                    ordinal = int(input("Choose your card id: "))
                                                     clear_terminal()
-                                                    result = myuser.check_card_id(card_id_wallet)
+                                                    with trace("card.lookup"):
+                                                        card_id_wallet = myuser.card_id_from_ordinal(
+                                                            session.id, ordinal)
+                                                        result = myuser.check_card_id(
+                                                            card_id_wallet, session.id)
                                                     if result:
-                                                        wallet_balance= myuser.show_wallet_balance()
+                                                        with trace("wallet.show"):
+                                                            wallet_balance = myuser.show_wallet_balance(
+                                                                session.id)
                                                         print("Wallet Balance: ", wallet_balance[0])
                                                         break
                                                     else:
@@ -334,18 +408,21 @@ def main():
                                                         continue
                                                 while True:
                                                     print("Your card balance: "
-                                                        , current_card_balance_for_wallet_recharge)
+                                                        , card_balances[card_id_wallet])
                                                     wallet_recharge = input(
                                                         "How much do you want to transfer \
                                                             from the balance of \
                                                                 the card to the wallet?")
-                                                    if int(wallet_recharge) <= int(
-                                                            current_card_balance_for_wallet_recharge
-                                                            ):
-                                                        new_card_balance = int(
-                                                            current_card_balance_for_wallet_recharge) - int(wallet_recharge)
-                                                        myuser.update_wallet_balance(wallet_recharge, card_id_wallet,
-                                                                                    new_card_balance)
+                                                    # The balance check happens in SQL,
+                                                    # against the card's current balance
+                                                    recharged = False
+                                                    if int(wallet_recharge) > 0:
+                                                        with trace("wallet.recharge"):
+                                                            recharged = myuser.update_wallet_balance(
+                                                                wallet_recharge, card_id_wallet,
+                                                                session.id)
+                                                    if recharged:
+                                                        print("Recharged wallet balance Successful!")
                                                         break
                                                     else:
                                                         print(
@@ -358,7 +435,9 @@ def main():
                                             print("Available subscriptions:\n1. Silver\n2. Golden")
                                             new_subscription = input("Please Choose \
                                                 and type your Subscription name for your account: ")
-                                            myuser.update_subscription(new_subscription, found_user[0])
+                                            with trace("subscription.buy"):
+                                                myuser.update_subscription(
+                                                    new_subscription, session.id)
                                         elif wallet_choice == "3":
                                             clear_terminal()
                                             break
@@ -370,30 +449,53 @@ def main():
                             clear_terminal()
                         elif user_choice == "5":
                             clear_terminal()
-                            myadmin.admin_get_all_sanses()
+                            # Only the sanses this user can actually buy
+                            with trace("sanse.list_available"):
+                                available = myuser.get_available_sanses(session.birthdate)
+                            print(sanses_table(available))
                             sanse_id=input("\nPlease enter id movie for buy: ")
-                            buy_movie=myuser.buy_sanse(sanse_id)
-                            print(buy_movie)
+                            with trace("sanse.buy"):
+                                buy_movie=myuser.buy_sanse(
+                                    sanse_id, session.id, age_on(session.birthdate)
+                                )
+                            print(RESERVATION_MESSAGES[buy_movie])
                         elif user_choice == "6":
                             # Log out the user
                             break
-                elif role[0] == "Admin":
-                    print("\nLogin Successful Dear", found_user[1])
+                elif session.role == "Admin":
+                    print("\nLogin Successful Dear", session.username)
                     while True:
                         print("Admin Menu:")
                         print("1. Add Sanses")
                         print("2. Delete Sanse")
                         print("3. Show Sanses")
                         print("4. Log out")
+                        print("5. Import Sanses from a CSV/JSONL file")
                         admin_choice = input("Please enter the desired number for admin: ")
                         if admin_choice == "1":
                             while True:
                                 clear_terminal()
                                 movie_name = input("Enter movie name: ")
-                                release_date = input("Enter release date: ")
+                                while True:
+                                    release_date = input("Enter release date (YYYY-MM-DD): ")
+                                    try:
+                                        release_date = normalize_date(release_date)
+                                        break
+                                    except ValueError:
+                                        print("release date input is wrong. please try again!")
                                 hall_capacity = int(input("Enter hall capacity: "))
                                 age_limit = int(input("Enter age limit: "))
-                                myadmin.admin_add_sanse(movie_name, release_date, hall_capacity, age_limit)
+                                hall = int(input("Enter hall number (default 1): ") or 1)
+                                ticket_price = int(
+                                    input("Enter ticket price (default 0): ") or 0)
+                                try:
+                                    with trace("admin.sanse.add"):
+                                        myadmin.admin_add_sanse(movie_name, release_date,
+                                                                hall_capacity, age_limit,
+                                                                hall, ticket_price)
+                                except ValueError as error:
+                                    print(error)
+                                    continue
                                 print("Add Sanses was Successful!")
                                 add_more = input("Do you want to Add more sanse? Y/N: ")
                                 if add_more.upper() == "Y":
@@ -404,7 +506,8 @@ def main():
                         elif admin_choice == "2":
                             while True:
                                 sans_id = int(input("Enter sans ID: "))
-                                myadmin.admin_delete_sanse(sans_id)
+                                with trace("admin.sanse.delete"):
+                                    myadmin.admin_delete_sanse(sans_id)
                                 print("Delete Sanses was Successful!")
                                 delete_more = input("Do you want to Delete more sanse? Y/N: ")
                                 if delete_more.upper() == "Y":
@@ -413,10 +516,25 @@ def main():
                                     break
                             clear_terminal()
                         elif admin_choice == "3":
-                            clear_terminal()
-                            myadmin.admin_get_all_sanses()
+                            browse_sanses(myadmin)
                         elif admin_choice == "4":
                             break
+                        elif admin_choice == "5":
+                            clear_terminal()
+                            path = input("Enter the path of the file to import: ")
+                            # The importer (csv, argparse, ...) loads only when used
+                            from bulk_import import import_sanses
+                            try:
+                                with trace("admin.sanse.import"):
+                                    report = import_sanses(path)
+                            except OSError as error:
+                                print(f"Could not read the file: {error}")
+                                continue
+                            print(f"Imported {report.imported} sanses "
+                                  f"({report.rows_per_sec:.0f} rows/s), "
+                                  f"rejected {len(report.rejected)}.")
+                            for line_number, reason in report.rejected:
+                                print(f"  line {line_number}: {reason}")
         else:
             print("Login Failed!!")
 
@@ -0,0 +1,296 @@
+"""
+This script holds the ordered schema migrations of the Cinematicket database.
+
+The schema version lives in the database header (`PRAGMA user_version`).
+sqlite_connection.migrate() reads it and applies the migrations after it, all in one
+transaction, then stores the new version. Once a database is current, a start
+costs that one pragma read and runs no DDL.
+
+Classes:
+- SchemaVersionError: The database was migrated by a newer version of the program.
+
+Functions:
+- normalize_date(value): Zero-pads a YYYY-MM-DD date. It lives here so the migrations
+need no import of 'users.py', which re-exports it.
+
+Constants:
+- MIGRATIONS: The migration functions, oldest first. Migration n (1-based) brings a
+database from version n - 1 to version n.
+- SCHEMA_VERSION: The version of a fully migrated database.
+
+Note:
+- Never edit or reorder a migration that has shipped; append a new one instead.
+- Databases created before versioning report version 0 but may already have some of
+the tables, so the early migrations use IF NOT EXISTS and check the columns they add.
+"""
+
+from datetime import date, datetime
+from sqlite3 import DatabaseError
+
+
+def normalize_date(value):
+    """
+    Normalizes a date such as "2023-8-15" to zero-padded "2023-08-15".
+
+    Args:
+        value (str): The date (format: YYYY-MM-DD, padding optional).
+
+    Returns:
+        str: The date in YYYY-MM-DD format.
+
+    Raises:
+        ValueError: If the value is not a date.
+    """
+    parts = str(value).strip().split("-")
+    if len(parts) != 3 or len(parts[0]) != 4 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"not a YYYY-MM-DD date: {value!r}")
+    return date(int(parts[0]), int(parts[1]), int(parts[2])).isoformat()
+
+
+class SchemaVersionError(DatabaseError):
+    """
+    Raised when a database's schema version is newer than this program knows.
+    """
+
+
+def create_base_tables(cursor):
+    """
+    The users, bank_cards and Sanses tables.
+    """
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS users(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            birthdate DATE,
+            number_phone Text,
+            registration_date TEXT,
+            Subscription TEXT DEFAULT 'Silver',
+            subscription_balance TEXT DEFAULT 'You have not purchased any special subscription',
+            role_user TEXT DEFAULT 'User'
+            )
+        """
+    )
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS bank_cards(
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    card_name TEXT NOT NULL,
+                    card_number TEXT NOT NULL,
+                    card_expire_date TEXT NOT NULL,
+                    current_card_balance INTEGER NOT NULL,
+                    card_CVV2 INTEGER NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users(id))
+        """
+    )
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS Sanses(
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Movie_Name	TEXT NOT NULL,
+                    Release_date	TEXT NOT NULL,
+                    hall_capacity	INTEGER NOT NULL,
+                    age_limit	INTEGER NOT NULL)
+        """
+    )
+
+
+def create_wallet_tables(cursor):
+    """
+    The per-user wallets and their append-only ledger.
+
+    The old single-row "Wallet_balance" table is dropped later, by drop_global_wallet().
+    """
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS wallets(
+                    user_id INTEGER PRIMARY KEY,
+                    balance INTEGER NOT NULL DEFAULT 0 CHECK (balance >= 0),
+                    FOREIGN KEY (user_id) REFERENCES users(id))
+        """
+    )
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS wallet_ledger(
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    card_id INTEGER,
+                    amount INTEGER NOT NULL,
+                    balance_after INTEGER NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users(id))
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_wallet_ledger_user ON wallet_ledger(user_id, id)"
+    )
+
+
+def create_bookings(cursor):
+    """
+    The tickets sold by reserve_sans().
+    """
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS bookings(
+                    id INTEGER PRIMARY KEY,
+                    sanse_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    seats INTEGER NOT NULL,
+                    booked_at INTEGER NOT NULL,
+                    FOREIGN KEY (sanse_id) REFERENCES Sanses(id),
+                    FOREIGN KEY (user_id) REFERENCES users(id))
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_sanse ON bookings(sanse_id)")
+
+
+def create_query_indexes(cursor):
+    """
+    The indexes behind the card screens and the sanse listings.
+    """
+    # Covering index for the per-user card screens: the lookup by user_id is a
+    # range scan that never touches the table rows, however large the table grows
+    cursor.execute(
+        """CREATE INDEX IF NOT EXISTS idx_bank_cards_user ON bank_cards(
+                    user_id, id, card_name, card_number, card_expire_date,
+                    current_card_balance)
+        """
+    )
+    # Keyset pagination by release date walks this index (rowid breaks ties)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sanses_release ON Sanses(Release_date)")
+    # Partial index over the sanses with seats left, ordered by release date with
+    # the age limit alongside
+    cursor.execute(
+        """CREATE INDEX IF NOT EXISTS idx_sanses_available
+            ON Sanses(Release_date, age_limit) WHERE hall_capacity > 0"""
+    )
+
+
+def add_subscription_expiry(cursor):
+    """
+    The epoch subscription_expires_at column, backfilled from the subscription_balance
+    dates and indexed for sweep_expired_subscriptions().
+    """
+    cursor.execute("PRAGMA table_info(users)")
+    if "subscription_expires_at" not in {column[1] for column in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE users ADD COLUMN subscription_expires_at INTEGER")
+        cursor.execute(
+            """SELECT id, subscription_balance FROM users
+                WHERE subscription_balance GLOB '[0-9][0-9][0-9][0-9]-*'"""
+        )
+        backfill = []
+        for user_id, expiration_date_str in cursor.fetchall():
+            try:
+                expiration_date = datetime.strptime(expiration_date_str, "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                continue
+            backfill.append((int(expiration_date.timestamp()), user_id))
+        cursor.executemany("UPDATE users SET subscription_expires_at = ? WHERE id = ?", backfill)
+    # Only paid subscriptions carry an expiry, so only they are indexed
+    cursor.execute(
+        """CREATE INDEX IF NOT EXISTS idx_users_subscription_expiry
+            ON users(subscription_expires_at) WHERE subscription_expires_at IS NOT NULL"""
+    )
+
+
+def add_catalogue_version(cursor):
+    """
+    The catalogue_version row that triggers bump on every write to Sanses, from any
+    process; SanseCache compares against it.
+    """
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS catalogue_version(
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL)
+        """
+    )
+    cursor.execute("INSERT OR IGNORE INTO catalogue_version(id, version) VALUES (1, 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS sanses_version_{event.lower()}
+                AFTER {event} ON Sanses
+                BEGIN UPDATE catalogue_version SET version = version + 1; END"""
+        )
+
+
+def add_sanse_hall_and_price(cursor):
+    """
+    The hall a sanse plays in and its ticket price, for the occupancy and revenue
+    reports of analytics.py. Existing sanses get hall 1 and price 0.
+    """
+    cursor.execute("ALTER TABLE Sanses ADD COLUMN hall INTEGER NOT NULL DEFAULT 1")
+    cursor.execute("ALTER TABLE Sanses ADD COLUMN ticket_price INTEGER NOT NULL DEFAULT 0")
+
+
+def normalize_release_dates(cursor):
+    """
+    Rewrites stored release dates such as "2023-8-15" to zero-padded YYYY-MM-DD, as
+    add_sanse() now stores them, so date ranges and keyset pages compare them as text.
+    Values that are not dates are left alone.
+    """
+    cursor.execute("SELECT id, Release_date FROM Sanses WHERE Release_date NOT GLOB "
+                   "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'")
+    updates = []
+    for sanse_id, release_date in cursor.fetchall():
+        try:
+            updates.append((normalize_date(release_date), sanse_id))
+        except ValueError:
+            continue
+    cursor.executemany("UPDATE Sanses SET Release_date = ? WHERE id = ?", updates)
+
+
+def narrow_catalogue_triggers(cursor):
+    """
+    Bumps catalogue_version only for changes the catalogue caches keep.
+
+    Seat sales update hall_capacity, which the caches read live, so they no longer
+    bump the version and make every cache reload. Inserts bump it once per statement
+    in add_sanse()/bulk_add_sanses() instead of once per row.
+    """
+    cursor.execute("DROP TRIGGER IF EXISTS sanses_version_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS sanses_version_update")
+    cursor.execute(
+        """CREATE TRIGGER sanses_version_update
+            AFTER UPDATE OF Movie_Name, Release_date, age_limit ON Sanses
+            BEGIN UPDATE catalogue_version SET version = version + 1; END"""
+    )
+
+
+def add_seats_version(cursor):
+    """
+    A seats_version counter beside the catalogue version, bumped by a trigger on every
+    hall_capacity change, so the caches can tell that seat counts moved without
+    reloading the rest of the catalogue.
+    """
+    cursor.execute("PRAGMA table_info(catalogue_version)")
+    if "seats_version" not in {column[1] for column in cursor.fetchall()}:
+        cursor.execute(
+            "ALTER TABLE catalogue_version ADD COLUMN seats_version INTEGER NOT NULL DEFAULT 0"
+        )
+    cursor.execute(
+        """CREATE TRIGGER IF NOT EXISTS sanses_seats_update
+            AFTER UPDATE OF hall_capacity ON Sanses
+            BEGIN UPDATE catalogue_version SET seats_version = seats_version + 1; END"""
+    )
+
+
+def drop_global_wallet(cursor):
+    """
+    Drops the old single-row "Wallet_balance" table. Its value had no owner, shared by
+    every user, and each recharge overwrote it with the amount recharged rather than
+    adding to it, so it is not a balance anyone holds and is not moved into a wallet.
+    """
+    cursor.execute("DROP TABLE IF EXISTS Wallet_balance")
+
+
+MIGRATIONS = (
+    create_base_tables,
+    create_wallet_tables,
+    create_bookings,
+    create_query_indexes,
+    add_subscription_expiry,
+    add_catalogue_version,
+    add_sanse_hall_and_price,
+    normalize_release_dates,
+    narrow_catalogue_triggers,
+    add_seats_version,
+    drop_global_wallet,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
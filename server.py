@@ -0,0 +1,809 @@
+"""
+This script serves the ticketing operations of 'users.py' as a local HTTP/JSON API,
+so real (or load test) traffic can be put in front of the system.
+
+The server uses only the standard library. It speaks HTTP/1.1 with keep-alive on an
+asyncio event loop and runs the database work through a TicketService (see 'service.py'),
+so the number of concurrent connections is independent of the database worker count.
+
+Endpoints (request and response bodies are JSON; see SCHEMAS for the request fields):
+- POST   /users                      Register a user.
+- POST   /sessions                   Log in; returns a bearer token.
+- DELETE /sessions                   Log out.
+- GET    /me                         The logged-in user's profile.
+- PATCH  /me                         Change username and/or phone number.
+- PUT    /me/password                Change the password.
+- GET    /cards                      List the user's bank cards.
+- POST   /cards                      Add a bank card.
+- PATCH  /cards/<id>                 Change a card's name and/or number.
+- DELETE /cards/<id>                 Delete a card.
+- GET    /wallet                     The wallet balance.
+- POST   /wallet/recharge            Move money from a card into the wallet.
+- GET    /subscription               The subscription and days left.
+- PUT    /subscription               Buy a subscription.
+- GET    /sanses                     One keyset page (after, before, limit, order_by).
+- GET    /sanses/available           The sanses the user can buy now.
+- GET    /sanses/<id>                One sanse.
+- POST   /sanses                     Add a sanse (admins only).
+- DELETE /sanses/<id>                Delete a sanse (admins only).
+- POST   /sanses/<id>/bookings       Buy seats for a sanse.
+- GET    /stats                      Per-statement SQL statistics (admins only).
+
+Every endpoint except POST /users and POST /sessions needs an
+"Authorization: Bearer <token>" header. Errors are {"error": "<message>"} with a
+4xx/5xx status; an overloaded server answers 503 with a Retry-After header. Unexpected
+errors are logged on the "cinematicket.server" logger and answered with 500.
+
+Usage:
+    python server.py --port 8080 --workers 4 --max-pending 256 --db mydatabase.db
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import secrets
+import sqlite3
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qsl
+
+from instrumentation import snapshot
+from service import DEFAULT_MAX_PENDING, ServiceBusyError, TicketService
+from users import (
+    ADMIN_CODE, DEFAULT_PAGE_SIZE, DEFAULT_POOL_SIZE, SANSE_ORDERINGS, PoolTimeoutError,
+    ReservationStatus, SubscriptionSweeper, User, UserRole, age_on, normalize_date, resolve_db_path,
+)
+
+MAX_BODY_BYTES = 1 << 20
+MAX_PAGE_SIZE = 500
+KEEP_ALIVE_TIMEOUT = 15.0  # seconds an idle keep-alive connection is kept open
+SWEEP_INTERVAL = 60.0  # seconds between expired-subscription sweeps
+SESSION_PRUNE_INTERVAL = 60.0  # seconds between sweeps of the expired bearer tokens
+
+logger = logging.getLogger("cinematicket.server")
+
+# Request body schemas: field -> (type, required)
+SCHEMAS = {
+    "register": {"username": (str, True), "password": (str, True), "birthdate": (str, True),
+                 "number_phone": (str, False), "admin_code": (str, False)},
+    "login": {"username": (str, True), "password": (str, True)},
+    "profile": {"username": (str, False), "number_phone": (str, False)},
+    "password": {"password": (str, True)},
+    "card": {"card_name": (str, True), "card_number": (str, True),
+             "card_expire_date": (str, True), "balance": (int, True), "cvv2": (int, True)},
+    "card_update": {"card_name": (str, False), "card_number": (str, False)},
+    "recharge": {"card_id": (int, True), "amount": (int, True)},
+    "subscription": {"subscription": (str, True)},
+    "sanse": {"movie_name": (str, True), "release_date": (str, True),
+              "hall_capacity": (int, True), "age_limit": (int, True),
+              "hall": (int, False), "ticket_price": (int, False)},
+    "booking": {"seats": (int, False)},
+}
+
+RESERVATION_STATUS_CODES = {
+    ReservationStatus.RESERVED: HTTPStatus.CREATED,
+    ReservationStatus.SOLD_OUT: HTTPStatus.CONFLICT,
+    ReservationStatus.AGE_RESTRICTED: HTTPStatus.FORBIDDEN,
+    ReservationStatus.NOT_FOUND: HTTPStatus.NOT_FOUND,
+}
+
+
+class HTTPError(Exception):
+    """
+    An error answered to the client as {"error": message} with the given status.
+    """
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+def validate(body, schema_name):
+    """
+    Checks a request body against one of the SCHEMAS.
+
+    Args:
+        body (dict): The decoded JSON body.
+        schema_name (str): The key of the schema in SCHEMAS.
+
+    Returns:
+        dict: The body, with missing optional fields set to None.
+
+    Raises:
+        HTTPError: 400 if a field is missing, unknown or of the wrong type.
+    """
+    schema = SCHEMAS[schema_name]
+    if not isinstance(body, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "The body must be a JSON object")
+    unknown = set(body) - set(schema)
+    if unknown:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown fields: {', '.join(sorted(unknown))}")
+    values = {}
+    for field, (kind, required) in schema.items():
+        value = body.get(field)
+        if value is None:
+            if required:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"Missing field: {field}")
+        elif not isinstance(value, kind) or isinstance(value, bool):
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            f"Field {field} must be of type {kind.__name__}")
+        values[field] = value
+    return values
+
+
+def session_json(session):
+    """
+    Returns:
+        dict: The public profile fields of a UserSession.
+    """
+    return {
+        "id": session.id,
+        "username": session.username,
+        "birthdate": session.birthdate,
+        "number_phone": session.number_phone,
+        "registration_date": str(session.registration_date),
+        "subscription": session.subscription,
+        "role": session.role,
+    }
+
+
+def sanse_json(row):
+    """
+    Returns:
+        dict: A sanse row as a JSON object.
+    """
+    sanse_id, movie_name, release_date, hall_capacity, age_limit = row
+    return {"id": sanse_id, "movie_name": movie_name, "release_date": release_date,
+            "hall_capacity": hall_capacity, "age_limit": age_limit}
+
+
+def encode_cursor(cursor):
+    """
+    Returns:
+        str: A keyset cursor as a query string value, e.g. "2024-01-01,17", or None.
+    """
+    return None if cursor is None else ",".join(str(key) for key in cursor)
+
+
+def decode_cursor(value, order_by):
+    """
+    Parses a cursor made by encode_cursor().
+
+    Raises:
+        HTTPError: 400 if the cursor does not match the ordering.
+    """
+    if value is None:
+        return None
+    parts = value.split(",")
+    if len(parts) != len(SANSE_ORDERINGS[order_by]):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid cursor")
+    try:
+        return (*parts[:-1], int(parts[-1]))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid cursor") from None
+
+
+class TicketServer:
+    """
+    HTTP/1.1 JSON front end for a TicketService.
+
+    Sessions are kept in memory: a bearer token maps to the UserSession returned by
+    User.authenticate() and expires with it. Expired tokens are dropped when they are
+    used, and all of them every SESSION_PRUNE_INTERVAL seconds on login.
+
+    Every route handler takes the decoded request (plus the integer path arguments)
+    and returns (HTTPStatus, payload). Handlers that need a login answer 401 without a
+    valid token and 403 for non-admins on admin routes. A body that does not match its
+    schema gets 400; dispatch() adds 503 when the service is overloaded and 500 for
+    unexpected errors.
+
+    Attributes:
+        service (TicketService): The service that runs the database work.
+        sessions (dict): Bearer token -> UserSession.
+    """
+    def __init__(self, service):
+        self.service = service
+        self.sessions = {}
+        self._pruned_at = time.monotonic()
+        self.routes = [
+            ("POST", ("users",), self.register),
+            ("POST", ("sessions",), self.login),
+            ("DELETE", ("sessions",), self.logout),
+            ("GET", ("me",), self.profile),
+            ("PATCH", ("me",), self.update_profile),
+            ("PUT", ("me", "password"), self.change_password),
+            ("GET", ("cards",), self.list_cards),
+            ("POST", ("cards",), self.add_card),
+            ("PATCH", ("cards", int), self.update_card),
+            ("DELETE", ("cards", int), self.delete_card),
+            ("GET", ("wallet",), self.wallet),
+            ("POST", ("wallet", "recharge"), self.recharge),
+            ("GET", ("subscription",), self.subscription),
+            ("PUT", ("subscription",), self.buy_subscription),
+            ("GET", ("sanses",), self.list_sanses),
+            ("GET", ("sanses", "available"), self.available_sanses),
+            ("GET", ("sanses", int), self.get_sanse),
+            ("POST", ("sanses",), self.add_sanse),
+            ("DELETE", ("sanses", int), self.delete_sanse),
+            ("POST", ("sanses", int, "bookings"), self.book),
+            ("GET", ("stats",), self.stats),
+        ]
+
+    # Connection handling
+    async def handle_connection(self, reader, writer):
+        """
+        Serves requests on one connection until the client closes it, asks for
+        "Connection: close", or stays idle for KEEP_ALIVE_TIMEOUT seconds.
+        """
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError:
+                    # readline() raises ValueError past the stream's line limit
+                    self.write_response(writer, HTTPStatus.BAD_REQUEST,
+                                        {"error": "Request line too long"}, False)
+                    await writer.drain()
+                    break
+                if not request_line.strip():
+                    break
+                keep_alive = await self.handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, request_line, reader, writer):
+        """
+        Reads one request, dispatches it and writes the response.
+
+        Returns:
+            bool: True if the connection should be kept open.
+        """
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            self.write_response(writer, HTTPStatus.BAD_REQUEST, {"error": "Bad request line"},
+                                False)
+            return False
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                self.write_response(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                    {"error": "Header line too long"}, False)
+                return False
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        try:
+            length = int(headers.get("content-length", 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.write_response(writer, HTTPStatus.BAD_REQUEST,
+                                {"error": "Invalid Content-Length"}, False)
+            return False
+        if length > MAX_BODY_BYTES:
+            self.write_response(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                {"error": "Request body too large"}, False)
+            return False
+        raw_body = await reader.readexactly(length) if length else b""
+        status, payload, extra_headers = await self.dispatch(method, target, headers, raw_body)
+        self.write_response(writer, status, payload, keep_alive, extra_headers)
+        return keep_alive
+
+    @staticmethod
+    def write_response(writer, status, payload, keep_alive, extra_headers=None):
+        """
+        Writes a JSON response (or an empty one for 204).
+        """
+        body = b"" if payload is None else json.dumps(payload).encode()
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in (extra_headers or {}).items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def dispatch(self, method, target, headers, raw_body):
+        """
+        Routes a request to its handler and turns errors into JSON responses.
+
+        Returns:
+            tuple: (HTTPStatus, payload or None, extra headers).
+        """
+        path, _, query = target.partition("?")
+        try:
+            handler, args = self.route(method, path)
+            request = {"headers": headers, "query": dict(parse_qsl(query)), "body": None}
+            if raw_body:
+                try:
+                    request["body"] = json.loads(raw_body)
+                except ValueError:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "The body is not valid JSON") from None
+            status, payload = await handler(request, *args)
+            return status, payload, {}
+        except HTTPError as error:
+            return error.status, {"error": error.message}, error.headers
+        except (ServiceBusyError, PoolTimeoutError):
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server busy"}, {"Retry-After": "1"}
+        except sqlite3.IntegrityError as error:
+            return HTTPStatus.CONFLICT, {"error": str(error)}, {}
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, {"error": str(error)}, {}
+        except Exception:
+            logger.exception("Unhandled error on %s %s", method, path)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}, {}
+
+    def route(self, method, path):
+        """
+        Finds the handler for a method and path.
+
+        Returns:
+            tuple: (handler, the integer path arguments).
+
+        Raises:
+            HTTPError: 404 for an unknown path, 405 for a known path with another method.
+        """
+        parts = tuple(filter(None, path.split("/")))
+        path_matched = False
+        for route_method, pattern, handler in self.routes:
+            if len(pattern) != len(parts):
+                continue
+            args = []
+            for expected, part in zip(pattern, parts):
+                if expected is int and part.isdigit():
+                    args.append(int(part))
+                elif expected != part:
+                    break
+            else:
+                if route_method == method:
+                    return handler, args
+                path_matched = True
+        if path_matched:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {path}")
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No such endpoint: {path}")
+
+    def session(self, request, admin=False):
+        """
+        Returns the UserSession of the request's bearer token.
+
+        Raises:
+            HTTPError: 401 without a valid token, 403 if admin is required and missing.
+        """
+        scheme, _, token = request["headers"].get("authorization", "").partition(" ")
+        session = self.sessions.get(token) if scheme.lower() == "bearer" else None
+        if session is not None and session.is_expired():
+            del self.sessions[token]
+            session = None
+        if session is None:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Log in first",
+                            {"WWW-Authenticate": "Bearer"})
+        if admin and session.role != UserRole.ADMIN.value:
+            raise HTTPError(HTTPStatus.FORBIDDEN, "Admins only")
+        return session
+
+    def prune_sessions(self):
+        """
+        Drops every expired bearer token, at most once per SESSION_PRUNE_INTERVAL, so
+        tokens that are never used again do not pile up.
+        """
+        now = time.monotonic()
+        if now - self._pruned_at < SESSION_PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        for token in [token for token, session in self.sessions.items()
+                      if session.is_expired()]:
+            del self.sessions[token]
+
+    # Accounts
+    async def register(self, request):
+        """
+        POST /users: Registers a user, as an admin when admin_code is right.
+
+        Body: username, password, birthdate (YYYY-MM-DD), and optionally number_phone
+        and admin_code.
+
+        Returns:
+            tuple: 201 with the username and role. 403 for a wrong admin code, 409 if
+                the username is taken.
+        """
+        body = validate(request["body"], "register")
+        role = UserRole.USER.value
+        if body["admin_code"] is not None:
+            if body["admin_code"] != ADMIN_CODE:
+                raise HTTPError(HTTPStatus.FORBIDDEN, "Wrong admin code")
+            role = UserRole.ADMIN.value
+        await self.service.register_user(body["username"], body["password"],
+                                         normalize_date(body["birthdate"]), role,
+                                         body["number_phone"])
+        return HTTPStatus.CREATED, {"username": body["username"], "role": role}
+
+    async def login(self, request):
+        """
+        POST /sessions: Logs in and opens a bearer token session.
+
+        Body: username and password.
+
+        Returns:
+            tuple: 201 with the token and the user's profile. 401 for a wrong username
+                or password.
+        """
+        body = validate(request["body"], "login")
+        session = await self.service.authenticate(body["username"], body["password"])
+        if session is None:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Wrong username or password")
+        self.prune_sessions()
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = session
+        return HTTPStatus.CREATED, {"token": token, "user": session_json(session)}
+
+    async def logout(self, request):
+        """
+        DELETE /sessions: Drops the request's bearer token.
+
+        Returns:
+            tuple: 204.
+        """
+        self.session(request)
+        self.sessions.pop(request["headers"]["authorization"].partition(" ")[2], None)
+        return HTTPStatus.NO_CONTENT, None
+
+    async def profile(self, request):
+        """
+        GET /me: The logged-in user's profile, answered from the session.
+
+        Returns:
+            tuple: 200 with the profile.
+        """
+        return HTTPStatus.OK, session_json(self.session(request))
+
+    async def update_profile(self, request):
+        """
+        PATCH /me: Changes the username and/or phone number.
+
+        Body: optionally username and number_phone.
+
+        Returns:
+            tuple: 200 with the updated profile. 404 if the user no longer exists, 409
+                if the username is taken.
+        """
+        session = self.session(request)
+        body = validate(request["body"], "profile")
+        stored = await self.service.update_info(body["username"], body["number_phone"],
+                                                session.id)
+        if stored is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "User does not exist")
+        session.username, session.number_phone = stored
+        return HTTPStatus.OK, session_json(session)
+
+    async def change_password(self, request):
+        """
+        PUT /me/password: Changes the password.
+
+        Body: password.
+
+        Returns:
+            tuple: 204.
+        """
+        session = self.session(request)
+        body = validate(request["body"], "password")
+        await self.service.change_password(body["password"], body["password"], session.id)
+        return HTTPStatus.NO_CONTENT, None
+
+    # Bank cards
+    async def list_cards(self, request):
+        """
+        GET /cards: The user's bank cards, ordered by card ID.
+
+        Returns:
+            tuple: 200 with the cards.
+        """
+        session = self.session(request)
+        rows = await self.service.select_bank_card(session.id)
+        return HTTPStatus.OK, {"cards": [
+            {"id": card_id, "card_name": name, "card_number": number,
+             "card_expire_date": expire, "balance": balance, "ordinal": ordinal}
+            for card_id, _, name, number, expire, balance, ordinal in rows
+        ]}
+
+    async def add_card(self, request):
+        """
+        POST /cards: Adds a bank card.
+
+        Body: card_name, card_number, card_expire_date, balance and cvv2.
+
+        Returns:
+            tuple: 201.
+        """
+        session = self.session(request)
+        body = validate(request["body"], "card")
+        await self.service.add_bank_card(session.id, body["card_name"], body["card_number"],
+                                         body["card_expire_date"], body["balance"],
+                                         body["cvv2"])
+        return HTTPStatus.CREATED, None
+
+    async def owned_card(self, session, card_id):
+        """
+        Raises:
+            HTTPError: 404 if the session's user has no card with this ID.
+        """
+        if await self.service.check_card_id(card_id, session.id) is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No card with ID {card_id}")
+
+    async def update_card(self, request, card_id):
+        """
+        PATCH /cards/<id>: Changes a card's name and/or number.
+
+        Body: optionally card_name and card_number.
+
+        Returns:
+            tuple: 204. 404 if the user has no card with this ID.
+        """
+        session = self.session(request)
+        body = validate(request["body"], "card_update")
+        await self.owned_card(session, card_id)
+        await self.service.update_info_bank_cards(body["card_name"], body["card_number"],
+                                                  card_id, session.id)
+        return HTTPStatus.NO_CONTENT, None
+
+    async def delete_card(self, request, card_id):
+        """
+        DELETE /cards/<id>: Deletes a card.
+
+        Returns:
+            tuple: 204. 404 if the user has no card with this ID.
+        """
+        session = self.session(request)
+        await self.owned_card(session, card_id)
+        await self.service.delete_bank_card(card_id, session.id)
+        return HTTPStatus.NO_CONTENT, None
+
+    # Wallet and subscriptions
+    async def wallet(self, request):
+        """
+        GET /wallet: The wallet balance.
+
+        Returns:
+            tuple: 200 with the balance.
+        """
+        session = self.session(request)
+        (balance,) = await self.service.show_wallet_balance(session.id)
+        return HTTPStatus.OK, {"balance": balance}
+
+    async def recharge(self, request):
+        """
+        POST /wallet/recharge: Moves money from one of the user's cards into the wallet.
+
+        Body: card_id and amount.
+
+        Returns:
+            tuple: 200 with the new balance. 409 for an unknown card or a card balance
+                that is too low.
+        """
+        session = self.session(request)
+        body = validate(request["body"], "recharge")
+        if not await self.service.update_wallet_balance(body["amount"], body["card_id"],
+                                                        session.id):
+            raise HTTPError(HTTPStatus.CONFLICT, "Unknown card or insufficient card balance")
+        (balance,) = await self.service.show_wallet_balance(session.id)
+        return HTTPStatus.OK, {"balance": balance}
+
+    async def subscription(self, request):
+        """
+        GET /subscription: The subscription and its days left, answered from the
+        session.
+
+        Returns:
+            tuple: 200 with the subscription and days_left.
+        """
+        session = self.session(request)
+        days_left = session.days_left()
+        return HTTPStatus.OK, {"subscription": session.subscription, "days_left": days_left}
+
+    async def buy_subscription(self, request):
+        """
+        PUT /subscription: Buys a subscription.
+
+        Body: subscription.
+
+        Returns:
+            tuple: 200 with the new subscription and days_left.
+        """
+        session = self.session(request)
+        body = validate(request["body"], "subscription")
+        expires_at = await self.service.update_subscription(body["subscription"], session.id)
+        session.set_subscription(body["subscription"], expires_at)
+        return await self.subscription(request)
+
+    # Sanses
+    async def list_sanses(self, request):
+        """
+        GET /sanses: One keyset page of sanses.
+
+        Query: after and before (cursors from an earlier page), limit (1 to
+        MAX_PAGE_SIZE) and order_by (a SANSE_ORDERINGS key).
+
+        Returns:
+            tuple: 200 with the sanses and the next and prev cursors. 400 for a bad
+                order_by, limit or cursor.
+        """
+        self.session(request)
+        query = request["query"]
+        order_by = query.get("order_by", "id")
+        if order_by not in SANSE_ORDERINGS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            f"order_by must be one of {list(SANSE_ORDERINGS)}")
+        limit = int(query.get("limit", DEFAULT_PAGE_SIZE))
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        page = await self.service.get_sanses_page(
+            decode_cursor(query.get("after"), order_by),
+            decode_cursor(query.get("before"), order_by), limit, order_by,
+        )
+        return HTTPStatus.OK, {
+            "sanses": [sanse_json(row) for row in page.rows],
+            "next": encode_cursor(page.next_cursor),
+            "prev": encode_cursor(page.prev_cursor),
+        }
+
+    async def available_sanses(self, request):
+        """
+        GET /sanses/available: The released sanses with seats left that the user is
+        old enough for.
+
+        Returns:
+            tuple: 200 with the sanses.
+        """
+        session = self.session(request)
+        rows = await self.service.get_available_sanses(session.birthdate)
+        return HTTPStatus.OK, {"sanses": [sanse_json(row) for row in rows]}
+
+    async def get_sanse(self, request, sanse_id):
+        """
+        GET /sanses/<id>: One sanse.
+
+        Returns:
+            tuple: 200 with the sanse. 404 if it does not exist.
+        """
+        self.session(request)
+        row = await self.service.get_sanse(sanse_id)
+        if row is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No sanse with ID {sanse_id}")
+        return HTTPStatus.OK, {"sanse": sanse_json(row)}
+
+    async def add_sanse(self, request):
+        """
+        POST /sanses: Adds a sanse. Admins only.
+
+        Body: movie_name, release_date, hall_capacity, age_limit, and optionally hall
+        (default 1) and ticket_price (default 0).
+
+        Returns:
+            tuple: 201. 400 for a hall below 1 or a negative price.
+        """
+        self.session(request, admin=True)
+        body = validate(request["body"], "sanse")
+        await self.service.add_sanse(
+            body["movie_name"], body["release_date"], body["hall_capacity"], body["age_limit"],
+            1 if body["hall"] is None else body["hall"],
+            0 if body["ticket_price"] is None else body["ticket_price"],
+        )
+        return HTTPStatus.CREATED, None
+
+    async def delete_sanse(self, request, sanse_id):
+        """
+        DELETE /sanses/<id>: Deletes a sanse. Admins only.
+
+        Returns:
+            tuple: 204.
+        """
+        self.session(request, admin=True)
+        await self.service.delete_sanse(sanse_id)
+        return HTTPStatus.NO_CONTENT, None
+
+    async def book(self, request, sanse_id):
+        """
+        POST /sanses/<id>/bookings: Buys seats for a sanse.
+
+        Body: optionally seats (default 1). The body may be empty.
+
+        Returns:
+            tuple: The reservation status with the sanse ID and seats: 201 when reserved,
+                409 when sold out, 403 when the user is too young, 404 for an unknown
+                sanse. 400 if seats is below 1.
+        """
+        session = self.session(request)
+        body = validate(request["body"] or {}, "booking")
+        seats = 1 if body["seats"] is None else body["seats"]
+        if seats < 1:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "seats must be positive")
+        status = await self.service.buy_sanse(sanse_id, session.id, age_on(session.birthdate),
+                                              seats)
+        return RESERVATION_STATUS_CODES[status], {"status": status.name.lower(),
+                                                  "sanse_id": sanse_id, "seats": seats}
+
+    async def stats(self, request):
+        """
+        GET /stats: The per-statement SQL statistics. Admins only.
+
+        Returns:
+            tuple: 200 with instrumentation.snapshot().
+        """
+        self.session(request, admin=True)
+        return HTTPStatus.OK, snapshot()
+
+
+async def serve(host="127.0.0.1", port=8080, db_path=None, workers=DEFAULT_POOL_SIZE,
+                max_pending=DEFAULT_MAX_PENDING, password_iterations=None, ready=None,
+                sweep_interval=SWEEP_INTERVAL):
+    """
+    Creates the schema and serves the API until cancelled. A SubscriptionSweeper
+    downgrades expired subscriptions in the background while the server runs.
+
+    Args:
+        host (str, optional): The interface to listen on. Default is 127.0.0.1.
+        port (int, optional): The TCP port; 0 picks a free one. Default is 8080.
+        db_path (str, optional): The database file. Default is the configured database.
+        workers (int, optional): The number of database worker threads.
+        max_pending (int, optional): The most database calls queued before answering 503.
+        password_iterations (int, optional): The PBKDF2 cost for new password hashes.
+        ready (asyncio.Future, optional): Set to the bound (host, port) once listening.
+        sweep_interval (float, optional): The seconds between subscription sweeps.
+    """
+    # The service sizes the connection pool for its workers, so it comes first
+    async with TicketService(db_path, workers, max_pending,
+                             password_iterations) as service:
+        with User(db_path) as myuser:
+            myuser.migrate()
+        app = TicketServer(service)
+        sweeper = SubscriptionSweeper(sweep_interval, db_path)
+        sweeper.start()
+        try:
+            server = await asyncio.start_server(app.handle_connection, host, port)
+            if ready is not None:
+                ready.set_result(server.sockets[0].getsockname()[:2])
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.stop()
+            sweeper.join()
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Serve the ticketing API over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", help="Database file (default: $CINEMATICKET_DB or mydatabase.db)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_POOL_SIZE,
+                        help="Database worker threads")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Queued database calls before answering 503")
+    args = parser.parse_args(argv)
+    print(f"Serving {resolve_db_path(args.db)} on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.workers, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+This script exposes the database operations of 'users.py' as an asyncio API, so one
+process can serve many concurrent client sessions without a thread per session.
+
+Classes:
+- ServiceBusyError: Raised when the service already has max_pending calls queued.
+- TicketService: Async versions of the User/Admin operations (register, login, bank
+cards, wallet, subscriptions, sanses and ticket purchase).
+
+How it works:
+- Every call runs on a bounded worker pool, each call on its own pooled connection.
+- At most `workers` calls run at once; further callers wait on a semaphore inside the
+event loop, which costs a coroutine rather than a thread.
+- At most `max_pending` calls may be running or waiting. Past that the service fails
+fast with ServiceBusyError instead of letting the queue (and latency) grow without bound.
+- Password hashing runs on the shared password pool, between two short database calls,
+so a login never holds a database worker or connection while PBKDF2 runs.
+
+Usage:
+    async with TicketService() as service:
+        session = await service.authenticate("sara", "secret")
+        status = await service.buy_sanse(3, session.id, age_on(session.birthdate))
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from users import (
+    DEFAULT_PAGE_SIZE, DEFAULT_POOL_SIZE, PASSWORD_ITERATIONS, User, UserSession, get_pool,
+    hash_password, needs_rehash, password_executor, verify_password,
+)
+
+DEFAULT_MAX_PENDING = 256
+
+
+class ServiceBusyError(Exception):
+    """
+    Raised when a call arrives while max_pending calls are already queued or running.
+    """
+
+
+class TicketService:
+    """
+    Asyncio facade over the User and Admin database operations.
+
+    Method names and arguments mirror the User methods they run, so the menus and any
+    network front end share the same vocabulary.
+
+    Attributes:
+        db_path (str): The database file, or None for the configured database.
+        workers (int): The number of calls that run on the database at once.
+        max_pending (int): The most calls that may be running or waiting at once.
+        password_iterations (int): The PBKDF2 cost for new hashes, or None for the default.
+    """
+    def __init__(self, db_path=None, workers=DEFAULT_POOL_SIZE, max_pending=DEFAULT_MAX_PENDING,
+                 password_iterations=None):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_pending = max_pending
+        self.password_iterations = password_iterations
+        # Size the connection pool for the workers, growing it if the file is already open
+        get_pool(db_path, size=workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ticket-db")
+        self._running = asyncio.Semaphore(workers)
+        self._pending = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Waits for the calls in flight and stops the worker pool.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    @property
+    def pending(self):
+        """
+        int: The number of calls currently running or waiting for a worker.
+        """
+        return self._pending
+
+    def _call(self, method, args):
+        """
+        Runs one User method on a pooled connection. Executes on a worker thread.
+        """
+        with User(self.db_path) as myuser:
+            if self.password_iterations is not None:
+                myuser.password_iterations = self.password_iterations
+            return getattr(myuser, method)(*args)
+
+    async def _run(self, method, *args):
+        """
+        Queues one User method call, applying the backpressure limits.
+
+        Raises:
+            ServiceBusyError: If max_pending calls are already queued or running.
+        """
+        if self._pending >= self.max_pending:
+            raise ServiceBusyError(f"{self._pending} calls already pending")
+        self._pending += 1
+        try:
+            async with self._running:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, functools.partial(self._call, method, args)
+                )
+        finally:
+            self._pending -= 1
+
+    async def _run_password(self, function, *args):
+        """
+        Runs one hash or verify on the shared password pool, outside the database
+        workers, applying the max_pending limit.
+
+        Raises:
+            ServiceBusyError: If max_pending calls are already queued or running.
+        """
+        if self._pending >= self.max_pending:
+            raise ServiceBusyError(f"{self._pending} calls already pending")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                password_executor(), functools.partial(function, *args)
+            )
+        finally:
+            self._pending -= 1
+
+    @property
+    def _iterations(self):
+        """
+        int: The PBKDF2 cost for new hashes.
+        """
+        return self.password_iterations or PASSWORD_ITERATIONS
+
+    # Accounts
+    async def register_user(self, username, password, birthdate, role_user, number_phone=None):
+        """
+        Hashes the password on the password pool, then stores the user with
+        User.insert_user().
+
+        Raises:
+            sqlite3.IntegrityError: If the username is taken.
+        """
+        password_hash = await self._run_password(hash_password, password, self._iterations)
+        return await self._run(
+            "insert_user", username, password_hash, birthdate, role_user, number_phone
+        )
+
+    async def authenticate(self, username, password):
+        """
+        Reads the user, verifies the password off the database workers, then
+        rehashes a plaintext or outdated hash in a second short call.
+
+        Returns:
+            UserSession: The new session, or None if the credentials do not match.
+        """
+        row = await self._run("select_login", username)
+        if row is None or not await self._run_password(verify_password, password, row[-1]):
+            return None
+        if needs_rehash(row[-1], self._iterations):
+            password_hash = await self._run_password(hash_password, password, self._iterations)
+            await self._run("set_password_hash", row[0], password_hash)
+        return UserSession(row[:-1])
+
+    async def update_info(self, new_username, new_number_phone, find_id):
+        """
+        Runs User.update_info().
+
+        Returns:
+            tuple: The stored (username, number_phone), or None if the user does not exist.
+        """
+        return await self._run("update_info", new_username, new_number_phone, find_id)
+
+    async def change_password(self, new_password, confirm_password, find_id):
+        """
+        Runs User.change_password().
+
+        Returns:
+            bool: True if the password was changed.
+        """
+        return await self._run("change_password", new_password, confirm_password, find_id)
+
+    # Bank cards
+    async def add_bank_card(self, user_id, card_name, card_number, card_expire_date,
+                            current_card_balance, card_cvv2):
+        """
+        Runs User.add_bank_card().
+
+        Returns:
+            bool: True if the card was added.
+        """
+        return await self._run("add_bank_card", user_id, card_name, card_number,
+                               card_expire_date, current_card_balance, card_cvv2)
+
+    async def select_bank_card(self, user_id):
+        """
+        Runs User.select_bank_card().
+
+        Returns:
+            list: The user's cards, ordered by card ID.
+        """
+        return await self._run("select_bank_card", user_id)
+
+    async def check_card_id(self, card_id, user_id):
+        """
+        Runs User.check_card_id().
+
+        Returns:
+            tuple: (card_name, card_number) of the user's card, or None.
+        """
+        return await self._run("check_card_id", card_id, user_id)
+
+    async def update_info_bank_cards(self, card_name, card_number, card_id, user_id):
+        """
+        Runs User.update_info_bank_cards().
+
+        Returns:
+            bool: True if the card was updated.
+        """
+        return await self._run("update_info_bank_cards", card_name, card_number, card_id,
+                               user_id)
+
+    async def delete_bank_card(self, card_id, user_id):
+        """
+        Runs User.delete_bank_card().
+
+        Returns:
+            bool: True if the card was deleted, False if the user has no such card.
+        """
+        return await self._run("delete_bank_card", card_id, user_id)
+
+    # Wallet and subscriptions
+    async def show_wallet_balance(self, user_id):
+        """
+        Runs User.show_wallet_balance().
+
+        Returns:
+            tuple: A one-element tuple holding the balance.
+        """
+        return await self._run("show_wallet_balance", user_id)
+
+    async def update_wallet_balance(self, wallet_recharge, card_id_wallet, user_id):
+        """
+        Runs User.update_wallet_balance().
+
+        Returns:
+            bool: True if the transfer happened.
+        """
+        return await self._run("update_wallet_balance", wallet_recharge, card_id_wallet, user_id)
+
+    async def update_subscription(self, new_subscription, user_id):
+        """
+        Runs User.update_subscription().
+
+        Returns:
+            int: The epoch expiry of the new subscription.
+        """
+        return await self._run("update_subscription", new_subscription, user_id)
+
+    async def check_subscription(self, user_id):
+        """
+        Runs User.check_subscription().
+
+        Returns:
+            int or str: The days left on an active subscription, otherwise a notice.
+        """
+        return await self._run("check_subscription", user_id)
+
+    # Sanses
+    async def get_sanses_page(self, after=None, before=None, limit=DEFAULT_PAGE_SIZE,
+                              order_by="id"):
+        """
+        Runs User.get_sanses_page().
+
+        Returns:
+            SansePage: The rows plus the cursors of the neighbouring pages.
+        """
+        return await self._run("get_sanses_page", after, before, limit, order_by)
+
+    async def get_sanse(self, sanse_id):
+        """
+        Runs User.get_sanse().
+
+        Returns:
+            tuple: The sanse, or None.
+        """
+        return await self._run("get_sanse", sanse_id)
+
+    async def get_available_sanses(self, user_birthday, today=None):
+        """
+        Runs User.get_available_sanses().
+
+        Returns:
+            list: The released sanses with seats left that the user is old enough for.
+        """
+        return await self._run("get_available_sanses", user_birthday, today)
+
+    async def buy_sanse(self, sanse_id, user_id, user_age=None, seats=1):
+        """
+        Runs User.buy_sanse().
+
+        Returns:
+            ReservationStatus: The outcome of the reservation.
+        """
+        return await self._run("buy_sanse", sanse_id, user_id, user_age, seats)
+
+    async def add_sanse(self, movie_name, release_date, hall_capacity, age_limit, hall=1,
+                        ticket_price=0):
+        """
+        Runs User.add_sanse().
+
+        Raises:
+            ValueError: If the hall is below 1 or the price is negative.
+        """
+        return await self._run("add_sanse", movie_name, release_date, hall_capacity, age_limit,
+                               hall, ticket_price)
+
+    async def delete_sanse(self, sans_id):
+        """
+        Runs User.delete_sanse().
+        """
+        return await self._run("delete_sanse", sans_id)
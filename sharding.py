@@ -0,0 +1,275 @@
+"""
+This script spreads the showtime catalogue and its bookings over one SQLite file per
+cinema, while users, bank cards and wallets stay in the shared database.
+
+SQLite allows one writer per file. With a file per cinema, seat reservations and
+catalogue changes for different cinemas take different write locks and run in parallel;
+only account writes still share the main file. Every shard is a normal Cinematicket
+database (same migrations, same connection pool settings), so the whole User/Admin API
+works on it unchanged.
+
+Classes:
+- ShardRouter: Maps cinema IDs to their files and fans catalogue reads out over them.
+
+Usage:
+    router = ShardRouter("mydatabase.db")
+    router.add_sanse(2, "Dune", "2024-03-01", 120, 12)
+    with router.shared() as myuser:
+        session = myuser.authenticate("sara", "secret")
+    router.buy_sanse(2, 1, session.id, age_on(session.birthdate))
+    page = router.get_sanses_page(limit=20)          # all cinemas, merged
+    page = router.get_sanses_page(after=page.next_cursor, limit=20)
+
+Note:
+- A shard key is any non-negative integer: a cinema ID, or a hall ID for finer shards.
+- Sanse IDs are unique within their cinema only; rows returned by the fan-out reads are
+prefixed with the cinema ID: (cinema_id, id, Movie_Name, Release_date, hall_capacity,
+age_limit).
+- bookings.user_id in a shard refers to users.id in the shared file. SQLite cannot
+enforce that foreign key across files.
+- Shards are found by their file names (cinema-<id>.db next to the shared database,
+or in shard_dir), so every process using the same paths sees the same cinemas.
+"""
+
+import glob
+import heapq
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from users import (
+    DEFAULT_PAGE_SIZE, SANSE_ORDERINGS, Admin, SansePage, User, get_pool, resolve_db_path,
+)
+
+SHARD_FILE_FORMAT = "cinema-{}.db"
+SHARD_FILE_PATTERN = re.compile(r"^cinema-(\d+)\.db$")
+
+
+class ShardRouter:
+    """
+    Routes catalogue and booking operations to per-cinema database files.
+
+    Attributes:
+        shared_path (str): The database file of users, bank cards and wallets.
+        shard_dir (str): The directory of the cinema files.
+    """
+    def __init__(self, shared_path=None, shard_dir=None):
+        self.shared_path = os.path.abspath(resolve_db_path(shared_path))
+        self.shard_dir = os.path.abspath(shard_dir or os.path.dirname(self.shared_path))
+        self._migrated = set()
+        self._executor = None
+
+    def shard_path(self, cinema_id):
+        """
+        Returns:
+            str: The database file of a cinema.
+        """
+        if int(cinema_id) < 0:
+            raise ValueError("cinema_id must not be negative")
+        return os.path.join(self.shard_dir, SHARD_FILE_FORMAT.format(int(cinema_id)))
+
+    def cinemas(self):
+        """
+        Returns:
+            list: The IDs of the cinemas that have a file, in ascending order.
+        """
+        cinema_ids = []
+        for path in glob.glob(os.path.join(self.shard_dir, SHARD_FILE_FORMAT.format("*"))):
+            match = SHARD_FILE_PATTERN.match(os.path.basename(path))
+            if match:
+                cinema_ids.append(int(match.group(1)))
+        return sorted(cinema_ids)
+
+    def shared(self):
+        """
+        Returns:
+            User: A connection to the shared database (accounts, cards, wallets).
+        """
+        return self._open(User, self.shared_path)
+
+    def cinema(self, cinema_id, admin=False):
+        """
+        Opens a connection to a cinema's file, creating and migrating it on first use.
+
+        Args:
+            cinema_id (int): The cinema.
+            admin (bool, optional): Return an Admin instead of a User. Default is False.
+
+        Returns:
+            User or Admin: A connection to that cinema's database.
+        """
+        return self._open(Admin if admin else User, self.shard_path(cinema_id))
+
+    def _open(self, connection_class, path):
+        """
+        Opens a connection, migrating its file the first time this router uses it.
+        """
+        connection = connection_class(path)
+        if path not in self._migrated:
+            try:
+                connection.migrate()
+            except BaseException:
+                connection.close()
+                raise
+            self._migrated.add(path)
+        return connection
+
+    # Writes: each one touches a single cinema's file
+    def add_sanse(self, cinema_id, movie_name, release_date, hall_capacity, age_limit, hall=1,
+                  ticket_price=0):
+        """
+        Adds a sanse to one cinema.
+        """
+        with self.cinema(cinema_id, admin=True) as myadmin:
+            myadmin.add_sanse(movie_name, release_date, hall_capacity, age_limit, hall,
+                              ticket_price)
+
+    def bulk_add_sanses(self, cinema_id, sanses):
+        """
+        Adds many sanses to one cinema in one transaction.
+
+        Returns:
+            int: The number of sanses added.
+        """
+        with self.cinema(cinema_id, admin=True) as myadmin:
+            return myadmin.bulk_add_sanses(sanses)
+
+    def delete_sanse(self, cinema_id, sanse_id):
+        """
+        Deletes a sanse of one cinema.
+        """
+        with self.cinema(cinema_id, admin=True) as myadmin:
+            myadmin.delete_sanse(sanse_id)
+
+    def buy_sanse(self, cinema_id, sanse_id, user_id, user_age=None, seats=1):
+        """
+        Reserves seats in one cinema for a user of the shared database.
+
+        Returns:
+            ReservationStatus: The outcome of the reservation.
+        """
+        with self.cinema(cinema_id) as myuser:
+            return myuser.buy_sanse(sanse_id, user_id, user_age, seats)
+
+    def get_sanse(self, cinema_id, sanse_id):
+        """
+        Returns:
+            tuple: The sanse row from that cinema's catalogue, or None.
+        """
+        with self.cinema(cinema_id) as myuser:
+            return myuser.get_sanse(sanse_id)
+
+    # Reads across cinemas: one query per shard in parallel, merged in order
+    def _fan_out(self, read):
+        """
+        Runs read(cinema_id, connection) on every cinema in parallel.
+
+        Returns:
+            list: (cinema_id, result) pairs in cinema order.
+        """
+        cinema_ids = self.cinemas()
+        if not cinema_ids:
+            return []
+
+        def run(cinema_id):
+            """
+            Reads one cinema on its own pooled connection.
+            """
+            with self.cinema(cinema_id) as myuser:
+                return cinema_id, read(cinema_id, myuser)
+
+        if len(cinema_ids) == 1:
+            return [run(cinema_ids[0])]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(thread_name_prefix="shard-read")
+        return list(self._executor.map(run, cinema_ids))
+
+    def get_all_sanses(self):
+        """
+        Returns:
+            list: Every sanse of every cinema as (cinema_id, *row), ordered by
+                (cinema_id, id).
+        """
+        return [(cinema_id, *row)
+                for cinema_id, rows in self._fan_out(lambda _, db: db.get_all_sanses())
+                for row in rows]
+
+    def get_available_sanses(self, user_birthday, today=None):
+        """
+        Returns:
+            list: The sanses of every cinema the user can buy, as (cinema_id, *row),
+                ordered by release date.
+        """
+        results = self._fan_out(
+            lambda _, db: db.get_available_sanses(user_birthday, today))
+        return list(heapq.merge(
+            *([(cinema_id, *row) for row in rows] for cinema_id, rows in results),
+            key=lambda row: (row[3], row[0], row[1]),
+        ))
+
+    def get_sanses_page(self, after=None, limit=DEFAULT_PAGE_SIZE, order_by="id"):
+        """
+        Retrieves one page of sanses across all cinemas, in keyset order.
+
+        Every cinema returns its own next `limit` rows after the cursor and the pages
+        are merged, so a page costs one index range scan per cinema.
+
+        Args:
+            after (tuple, optional): The next_cursor of the previous page.
+            limit (int, optional): The page size. Default is DEFAULT_PAGE_SIZE.
+            order_by (str, optional): "id" or "release_date". Default is "id".
+
+        Returns:
+            SansePage: Rows of (cinema_id, *row); next_cursor is None on the last page,
+                and prev_cursor is always None (the merged listing pages forwards).
+        """
+        keys = SANSE_ORDERINGS[order_by]
+
+        def sort_key(cinema_id, row):
+            return (row[2], row[0], cinema_id) if order_by == "release_date" else (
+                row[0], cinema_id)
+
+        def shard_cursor(cinema_id):
+            # The merged order is (key..., cinema_id). Cinemas after the cursor's
+            # cinema also include rows equal to the cursor key; ids are integers, so
+            # "id >= n" is "id > n - 1"
+            if after is None:
+                return None
+            *key, after_cinema = after
+            if cinema_id > after_cinema:
+                key[-1] -= 1
+            return tuple(key)
+
+        def read(cinema_id, db):
+            page = db.get_sanses_page(after=shard_cursor(cinema_id), limit=limit + 1,
+                                      order_by=order_by)
+            return page.rows
+
+        merged = heapq.merge(
+            *([(sort_key(cinema_id, row), (cinema_id, *row)) for row in rows]
+              for cinema_id, rows in self._fan_out(read)),
+            key=lambda item: item[0],
+        )
+        page = [item for _, item in zip(range(limit + 1), merged)]
+        rows = [row for _, row in page[:limit]]
+        next_cursor = None
+        if len(page) > limit:
+            next_cursor = page[limit - 1][0][:len(keys)] + (page[limit - 1][1][0],)
+        return SansePage(rows, next_cursor, None)
+
+    def close(self):
+        """
+        Stops the fan-out workers and closes the idle pooled connections of every file.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for path in self._migrated:
+            get_pool(path).close()
+        self._migrated.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,110 @@
+"""
+This unit test file tests the occupancy and revenue reports implemented in the
+'analytics.py' script.
+
+Tested Functions and Classes:
+- build_report(): Chunked, multi-process scans merged into one report.
+- connect_read_only(): Report connections that cannot write.
+
+Usage:
+1. Run this unit test script to verify the correctness of the analytics reports.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on a fresh database file inside a temporary directory.
+"""
+
+import sqlite3
+import unittest
+
+from analytics import build_report, connect_read_only
+from test_users import TempDatabaseTestCase
+from users import Admin, User
+
+TEST_PASSWORD_ITERATIONS = 1000
+
+
+class TestBuildReport(TempDatabaseTestCase):
+    """
+    This class contains test cases for the analytics reports.
+    """
+    def setUp(self):
+        super().setUp()
+        with Admin(self.db_path) as myadmin:
+            myadmin.migrate()
+            myadmin.admin_add_sanse("Dune", "2024-01-01", 10, 0, hall=1, ticket_price=100)
+            myadmin.admin_add_sanse("Dune", "2024-01-02", 4, 0, hall=2, ticket_price=150)
+            myadmin.admin_add_sanse("Heat", "2024-01-02", 5, 0, hall=1, ticket_price=80)
+        with User(self.db_path) as myuser:
+            myuser.password_iterations = TEST_PASSWORD_ITERATIONS
+            myuser.register_user("sara", "secret", "2000-02-02", "User")
+            myuser.register_user("omid", "secret", "2000-02-02", "User")
+            sara = myuser.authenticate("sara", "secret")
+            omid = myuser.authenticate("omid", "secret")
+            myuser.update_subscription("Golden", omid.id)
+            myuser.buy_sanse(1, sara.id, seats=3)
+            myuser.buy_sanse(1, omid.id, seats=2)
+            myuser.buy_sanse(2, omid.id, seats=4)
+            myuser.buy_sanse(3, sara.id, seats=1)
+
+    def test_report_figures(self):
+        """
+        Occupancy counts the seats sold against the seats sold plus left; revenue uses
+        each sanse's ticket price.
+        """
+        report = build_report(self.db_path, workers=1).as_dict()
+        self.assertEqual(report["totals"], {
+            "screenings": 3, "bookings": 4, "seats_sold": 10, "seats_total": 19,
+            "occupancy": round(10 / 19, 4), "revenue": 5 * 100 + 4 * 150 + 80,
+        })
+        self.assertEqual(
+            [(row["movie"], row["seats_sold"], row["seats_total"], row["revenue"])
+             for row in report["movies"]],
+            [("Dune", 9, 14, 1100), ("Heat", 1, 5, 80)],
+        )
+        self.assertEqual([(row["day"], row["occupancy"]) for row in report["days"]],
+                         [("2024-01-01", 0.5), ("2024-01-02", round(5 / 9, 4))])
+        self.assertEqual([(row["hall"], row["screenings"], row["revenue"])
+                          for row in report["halls"]], [(1, 2, 580), (2, 1, 600)])
+        self.assertEqual(
+            [(row["subscription"], row["seats_sold"], row["share"])
+             for row in report["subscriptions"]],
+            [("Golden", 6, 0.6), ("Silver", 4, 0.4)],
+        )
+        since = build_report(self.db_path, workers=1, since="2024-1-2").as_dict()
+        self.assertEqual([row["day"] for row in since["days"]], ["2024-01-02"])
+        self.assertEqual(since["totals"]["seats_sold"], 5)
+
+    def test_chunks_and_workers_give_the_same_report(self):
+        """
+        Splitting the scan over small chunks and worker processes changes nothing.
+        """
+        expected = build_report(self.db_path, workers=1).as_dict()
+        report = build_report(self.db_path, workers=2, chunk_size=1)
+        self.assertEqual(report.chunks, 7)
+        self.assertEqual(report.workers, 2)
+        report = report.as_dict()
+        expected.pop("scan")
+        report.pop("scan")
+        self.assertEqual(report, expected)
+
+    def test_report_runs_beside_ticket_sales(self):
+        """
+        A report reads while a sale holds the write lock, and cannot write itself.
+        """
+        with User(self.db_path) as myuser:
+            with myuser.transaction():
+                myuser.reserve_sans(3, 1, 1)
+                report = build_report(self.db_path, workers=1)
+            self.assertEqual(report.totals()["seats_sold"], 10)
+        self.assertEqual(build_report(self.db_path, workers=1).totals()["seats_sold"], 11)
+        connection = connect_read_only(self.db_path)
+        try:
+            with self.assertRaises(sqlite3.OperationalError):
+                connection.execute("DELETE FROM bookings")
+        finally:
+            connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
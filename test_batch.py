@@ -0,0 +1,101 @@
+"""
+This unit test file tests the batch runner implemented in the 'batch.py' script.
+
+Tested Functions and Classes:
+- BatchRunner / run_batch(): Replaying scripted operations in grouped transactions.
+- sqlite_connection.batch(): Deferring the commits of the write methods.
+
+Usage:
+1. Run this unit test script to verify the correctness of the batch runner.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on a fresh database file inside a temporary directory.
+"""
+
+import json
+import os
+import unittest
+
+from batch import run_batch
+from test_users import TempDatabaseTestCase
+from users import User
+
+TEST_PASSWORD_ITERATIONS = 1000
+
+
+class TestBatchRunner(TempDatabaseTestCase):
+    """
+    This class contains test cases for the batch runner.
+    """
+    def replay(self, operations, batch_size):
+        """
+        Writes the operations to a JSONL file and replays it.
+        """
+        path = os.path.join(self.temp_dir, "ops.jsonl")
+        with open(path, "w", encoding="utf-8") as output:
+            for operation in operations:
+                output.write(json.dumps(operation) + "\n")
+        return run_batch(path, self.db_path, batch_size, TEST_PASSWORD_ITERATIONS)
+
+    def test_scripted_session_is_replayed(self):
+        """
+        A whole customer session runs; failed operations are reported and rolled back
+        without losing the rest of their batch.
+        """
+        card = {"card_name": "main", "card_number": "1" * 16, "card_expire_date": "28/01",
+                "current_card_balance": 100, "card_cvv2": 1234}
+        report = self.replay([
+            {"op": "add_sanse", "movie_name": "Dune", "release_date": "2020-01-01",
+             "hall_capacity": 1, "age_limit": 0},
+            {"op": "register", "username": "sara", "password": "secret",
+             "birthdate": "2000-02-02"},
+            {"op": "register", "username": "sara", "password": "other",
+             "birthdate": "2000-02-02"},
+            {"op": "login", "username": "sara", "password": "wrong"},
+            {"op": "login", "username": "sara", "password": "secret"},
+            {"op": "add_card", "username": "sara", **card},
+            {"op": "recharge", "username": "sara", "card": 1, "amount": 60},
+            {"op": "recharge", "username": "sara", "card": 1, "amount": 60},
+            {"op": "buy", "username": "sara", "sanse_id": 1},
+            {"op": "buy", "username": "sara", "sanse_id": 1},
+            {"op": "buy", "username": "ali", "sanse_id": 1},
+            {"op": "refund"},
+        ], batch_size=5)
+        self.assertEqual((report.total, report.failed, report.batches), (12, 6, 3))
+        self.assertEqual([(line, operation) for line, operation, _ in report.failures], [
+            (3, "register"), (4, "login"), (8, "recharge"), (10, "buy"), (11, "buy"),
+            (12, "refund"),
+        ])
+        self.assertEqual(report.failures[3][2], "sold_out")
+        self.assertEqual(report.as_dict()["per_operation"]["buy"]["ok"], 1)
+        with User(self.db_path) as myuser:
+            myuser.cursor.execute("SELECT COUNT(*) FROM users")
+            self.assertEqual(myuser.cursor.fetchone()[0], 1)
+            self.assertEqual(myuser.show_wallet_balance(1), (60,))
+            self.assertEqual(myuser.get_sanse(1)[3], 0)
+
+    def test_writes_in_a_batch_commit_once(self):
+        """
+        Inside batch() the write methods defer their commits to the end of the batch,
+        and an error rolls the whole batch back.
+        """
+        with User(self.db_path) as myuser:
+            myuser.migrate()
+            statements = []
+            myuser.connector.set_trace_callback(statements.append)
+            with myuser.batch():
+                for number in range(3):
+                    myuser.add_sanse(f"Movie {number}", "2020-01-01", 10, 0)
+                myuser.buy_sanse(1, 1)
+            myuser.connector.set_trace_callback(None)
+            self.assertEqual(statements.count("COMMIT"), 1)
+            with self.assertRaises(RuntimeError):
+                with myuser.batch():
+                    myuser.delete_sanse(1)
+                    raise RuntimeError("abort")
+            self.assertEqual([row[3] for row in myuser.get_all_sanses()], [9, 10, 10])
+
+
+if __name__ == "__main__":
+    unittest.main()
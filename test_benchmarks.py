@@ -0,0 +1,105 @@
+"""
+This unit test file tests the suite report math and the regression gate implemented
+in the 'benchmarks.py' script.
+
+Tested Functions and Classes:
+- summarize(): Nearest-rank latency percentiles and throughput.
+- compare_suites(): Median latency comparison against a threshold.
+- main(): The exit status of `suite --compare`.
+
+Usage:
+1. Run this unit test script to verify the correctness of the benchmark reports.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- The reports are fixed samples; no benchmark is actually run.
+"""
+
+import contextlib
+import io
+import json
+import os
+import unittest
+from unittest import mock
+
+import benchmarks
+from benchmarks import compare_suites, summarize
+from test_users import TempDatabaseTestCase
+
+
+def report(*entries):
+    """
+    Returns a suite report with one result per (operation, rows, p50_us, ops_per_sec).
+    """
+    return {"results": [{"operation": operation, "rows": rows, "p50_us": p50_us,
+                         "ops_per_sec": ops_per_sec}
+                        for operation, rows, p50_us, ops_per_sec in entries]}
+
+
+class TestSummarize(unittest.TestCase):
+    """
+    This class contains test cases for the latency summary.
+    """
+    def test_nearest_rank_percentiles(self):
+        """
+        Percentiles pick the nearest-rank sample whatever the input order.
+        """
+        samples = [(n + 1) * 1000 for n in range(100)]
+        summary = summarize(list(reversed(samples)))
+        self.assertEqual(summary, {
+            "calls": 100, "mean_us": 50.5, "p50_us": 50.0, "p90_us": 90.0, "p99_us": 99.0,
+            "max_us": 100.0, "ops_per_sec": round(100 / (sum(samples) / 1e9), 1),
+        })
+        single = summarize([2500])
+        self.assertEqual((single["p50_us"], single["p99_us"], single["max_us"]),
+                         (2.5, 2.5, 2.5))
+
+
+class TestCompareSuites(TempDatabaseTestCase):
+    """
+    This class contains test cases for the regression gate.
+    """
+    baseline = report(("authenticate", 1000, 100.0, 9000.0),
+                      ("get_all_sanses", 1000, 0.0, 1e6),
+                      ("buy_sanse", 1000, 50.0, 18000.0))
+
+    def test_growth_within_threshold_passes(self):
+        """
+        Medians that grow by at most the threshold, or shrink, are not regressions.
+        """
+        current = report(("authenticate", 1000, 120.0, 8000.0),
+                         ("get_all_sanses", 1000, 5.0, 2e5),
+                         ("buy_sanse", 1000, 40.0, 20000.0),
+                         ("authenticate", 100000, 500.0, 2000.0))
+        comparison = compare_suites(self.baseline, current, threshold=0.2)
+        self.assertEqual([(entry["operation"], entry["p50_change"], entry["regression"])
+                          for entry in comparison], [
+            ("authenticate", 0.2, False),
+            ("get_all_sanses", 0.0, False),
+            ("buy_sanse", -0.2, False),
+        ])
+        self.assertEqual(comparison[0]["p50_us"], [100.0, 120.0])
+        self.assertEqual(comparison[0]["ops_per_sec"], [9000.0, 8000.0])
+
+    def test_regression_is_flagged_and_fails_the_run(self):
+        """
+        A median above the threshold is flagged, and `suite --compare` exits with 1.
+        """
+        current = report(("authenticate", 1000, 100.0, 9000.0),
+                         ("buy_sanse", 1000, 61.0, 15000.0))
+        comparison = compare_suites(self.baseline, current, threshold=0.2)
+        self.assertEqual([entry["regression"] for entry in comparison], [False, True])
+        self.assertEqual(comparison[1]["p50_change"], 0.22)
+
+        baseline_path = os.path.join(self.temp_dir, "before.json")
+        with open(baseline_path, "w", encoding="utf-8") as baseline:
+            json.dump(self.baseline, baseline)
+        for suite, status in ((self.baseline, 0), (current, 1)):
+            with mock.patch.object(benchmarks, "bench_suite", return_value=suite), \
+                    contextlib.redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(benchmarks.main(["suite", "--compare", baseline_path]), status)
+            self.assertIn("comparison", json.loads(output.getvalue()))
+
+
+if __name__ == "__main__":
+    unittest.main()
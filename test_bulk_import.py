@@ -0,0 +1,173 @@
+"""
+This unit test file tests the bulk loaders implemented in the 'bulk_import.py' script.
+
+Tested Functions and Classes:
+- import_sanses(): Streaming, batched showtime import with row validation.
+- import_accounts(): Batched user and bank card import with duplicate handling.
+
+Usage:
+1. Run this unit test script to verify the correctness of the bulk loaders.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on a fresh database file inside a temporary directory.
+"""
+
+import os
+import unittest
+
+from bulk_import import import_accounts, import_sanses
+from test_users import TempDatabaseTestCase
+from users import Admin, User
+
+
+class ImportTestCase(TempDatabaseTestCase):
+    """
+    Base class that gives every test a fresh database file and fixture directory.
+    """
+    def write(self, name, content):
+        """
+        Writes a fixture file and returns its path.
+        """
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w", encoding="utf-8") as fixture:
+            fixture.write(content)
+        return path
+
+
+class TestImportSanses(ImportTestCase):
+    """
+    This class contains test cases for the showtime importer.
+    """
+    def test_csv_import_loads_valid_rows_and_reports_rejects(self):
+        """
+        Valid CSV rows load across several batches; invalid rows are reported by line.
+        """
+        path = self.write("schedule.csv", (
+            "movie_name,release_date,hall_capacity,age_limit\n"
+            "John Wick 4,2023-4-21,200,16\n"
+            "Bad Date,2023-13-01,10,0\n"
+            "Rescue Ops,2023-10-29,9,16\n"
+            ",2023-10-29,9,16\n"
+            "Shadow Strike,2023-02-25,-3,10\n"
+            "Reckless Fury,2023-01-25,0,13\n"
+        ))
+        report = import_sanses(path, self.db_path, batch_size=2)
+        self.assertEqual(report.imported, 3)
+        self.assertEqual([line for line, _ in report.rejected], [3, 5, 6])
+        with Admin(self.db_path) as myadmin:
+            self.assertEqual([row[1:3] for row in myadmin.iter_sanses()], [
+                ("John Wick 4", "2023-04-21"),
+                ("Rescue Ops", "2023-10-29"),
+                ("Reckless Fury", "2023-01-25"),
+            ])
+
+    def test_jsonl_import_rejects_malformed_lines(self):
+        """
+        JSONL lines that do not parse are rejected without stopping the import.
+        """
+        path = self.write("schedule.jsonl", (
+            '{"movie_name": "A", "release_date": "2023-01-01", "hall_capacity": 5, '
+            '"age_limit": 0}\n'
+            "not json\n"
+            '{"Movie_Name": "B", "Release_date": "2023-01-02", "hall_capacity": "7", '
+            '"age_limit": "12"}\n'
+        ))
+        report = import_sanses(path, self.db_path)
+        self.assertEqual(report.imported, 2)
+        self.assertEqual(report.rejected, [(2, "malformed line")])
+
+    def test_hall_and_ticket_price_are_stored(self):
+        """
+        The optional hall and ticket_price columns are validated and stored; blank
+        values fall back to hall 1 and price 0.
+        """
+        path = self.write("priced.csv", (
+            "movie_name,release_date,hall_capacity,age_limit,hall,ticket_price\n"
+            "Dune,2024-01-01,10,0,3,120\n"
+            "Heat,2024-01-02,5,0,,\n"
+            "Bad Hall,2024-01-03,5,0,0,50\n"
+            "Bad Price,2024-01-04,5,0,2,-1\n"
+        ))
+        report = import_sanses(path, self.db_path)
+        self.assertEqual(report.imported, 2)
+        self.assertEqual([line for line, _ in report.rejected], [4, 5])
+        with Admin(self.db_path) as myadmin:
+            rows = myadmin.cursor.execute(
+                "SELECT Movie_Name, hall, ticket_price FROM Sanses ORDER BY id").fetchall()
+            self.assertEqual(rows, [("Dune", 3, 120), ("Heat", 1, 0)])
+            with self.assertRaises(ValueError):
+                myadmin.admin_add_sanse("Dune", "2024-01-05", 10, 0, hall=0)
+            with self.assertRaises(ValueError):
+                myadmin.admin_add_sanse("Dune", "2024-01-05", 10, 0, ticket_price=-5)
+
+    def test_bulk_add_rejects_invalid_hall_and_price(self):
+        """
+        bulk_add_sanses() checks every row and adds nothing when one is invalid.
+        """
+        with Admin(self.db_path) as myadmin:
+            myadmin.migrate()
+            for bad_row in [("X", "2024-01-01", 10, 0, 0, 50), ("X", "2024-01-01", 10, 0, 2, -5)]:
+                with self.assertRaises(ValueError):
+                    myadmin.bulk_add_sanses([("Ok", "2024-01-01", 10, 0), bad_row])
+            self.assertEqual(myadmin.cursor.execute("SELECT COUNT(*) FROM Sanses").fetchone(),
+                             (0,))
+
+
+class TestImportAccounts(ImportTestCase):
+    """
+    This class contains test cases for the account importer.
+    """
+    def test_csv_accounts_link_cards_and_skip_duplicates(self):
+        """
+        Cards land on the right users; duplicate usernames are reported, not fatal.
+        """
+        with User(self.db_path) as myuser:
+            myuser.migrate()
+            myuser.password_iterations = 1000
+            myuser.register_user("taken", "secret1", "1990-01-01", "User")
+        path = self.write("accounts.csv", (
+            "username,password,birthdate,number_phone,role_user,card_name,card_number,"
+            "card_expire_date,current_card_balance,card_cvv2\n"
+            "ali,password1,1995-12-23,0912,User,main,6037991782797645,04/06,600000,1111\n"
+            "ali,password1,1995-12-23,0912,User,spare,6037991782797646,05/06,700000,2222\n"
+            "taken,password2,1990-01-01,,User,,,,,\n"
+            "reza,password3,2001-5-1,,Admin,,,,,\n"
+            "bad,password4,1990-01-01,,User,card,123,04/06,600000,1111\n"
+            "reza,password5,2001-05-01,,User,,,,,\n"
+        ))
+        report = import_accounts(path, self.db_path, batch_size=2, password_iterations=1000)
+        self.assertEqual((report.imported, report.cards_imported), (2, 2))
+        self.assertEqual(report.duplicates, [(4, "taken"), (7, "reza")])
+        self.assertEqual([line for line, _ in report.rejected], [6])
+        with User(self.db_path) as myuser:
+            session = myuser.authenticate("ali", "password1")
+            self.assertEqual([card[2] for card in myuser.select_bank_card(session.id)],
+                             ["main", "spare"])
+            self.assertEqual(myuser.authenticate("reza", "password3").role, "Admin")
+
+    def test_jsonl_accounts_keep_existing_hashes(self):
+        """
+        Passwords that are already hashed are imported as-is and still log in.
+        """
+        with User(self.db_path) as myuser:
+            myuser.migrate()
+            myuser.password_iterations = 1000
+            myuser.register_user("source", "secret1", "1990-01-01", "User")
+            myuser.cursor.execute("SELECT password FROM users WHERE username = 'source'")
+            stored = myuser.cursor.fetchone()[0]
+        path = self.write("accounts.jsonl", (
+            '{"username": "moved", "password": "%s", "birthdate": "1990-01-01", '
+            '"cards": [{"card_name": "c", "card_number": "1234567812345678", '
+            '"card_expire_date": "28/01", "current_card_balance": 500001, '
+            '"card_cvv2": 1234}]}\n' % stored
+        ))
+        report = import_accounts(path, self.db_path, password_iterations=1000)
+        self.assertEqual((report.imported, report.cards_imported), (1, 1))
+        with User(self.db_path) as myuser:
+            myuser.password_iterations = 1000
+            self.assertIsNotNone(myuser.authenticate("moved", "secret1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+This unit test file tests the synthetic data generator implemented in the 'datagen.py' script.
+
+Tested Functions and Classes:
+- generate(): Deterministic, consistent synthetic databases.
+
+Usage:
+1. Run this unit test script to verify the correctness of the data generator.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on fresh database files inside a temporary directory.
+"""
+
+import os
+import sqlite3
+import unittest
+
+from datagen import GENERATED_PASSWORD, USERNAME_FORMAT, generate
+from test_users import TempDatabaseTestCase
+from users import User, get_pool
+
+TABLES = ("users", "bank_cards", "wallets", "wallet_ledger", "bookings", "Sanses")
+
+
+class TestGenerate(TempDatabaseTestCase):
+    """
+    This class contains test cases for the synthetic data generator.
+    """
+    def tearDown(self):
+        for name in os.listdir(self.temp_dir):
+            if name.endswith(".db"):
+                get_pool(os.path.join(self.temp_dir, name)).close()
+        super().tearDown()
+
+    def build(self, name, **options):
+        """
+        Generates a small database and returns its path.
+        """
+        db_path = os.path.join(self.temp_dir, name)
+        options = {"users": 500, "sanses": 50, "bookings": 5000, "batch_size": 128, **options}
+        return db_path, generate(db_path, **options)
+
+    @staticmethod
+    def dump(db_path):
+        """
+        Returns:
+            dict: Every row of every generated table.
+        """
+        with sqlite3.connect(db_path) as connection:
+            return {table: connection.execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+                    for table in TABLES}
+
+    def test_same_seed_gives_the_same_database(self):
+        """
+        Two runs with one seed are identical; another seed differs.
+        """
+        first, report = self.build("first.db", seed=5)
+        second, _ = self.build("second.db", seed=5)
+        other, _ = self.build("other.db", seed=6)
+        self.assertEqual(self.dump(first), self.dump(second))
+        self.assertNotEqual(self.dump(first), self.dump(other))
+        self.assertEqual(report["users"], 500)
+        with self.assertRaises(FileExistsError):
+            generate(first)
+
+    def test_generated_data_is_consistent(self):
+        """
+        Bookings never oversell, wallets are funded from their owner's card, and the
+        generated users can log in.
+        """
+        db_path, report = self.build("data.db", seed=1)
+        with sqlite3.connect(db_path) as connection:
+            oversold = connection.execute(
+                "SELECT COUNT(*) FROM Sanses WHERE hall_capacity < 0").fetchone()[0]
+            self.assertEqual(oversold, 0)
+            self.assertGreater(connection.execute(
+                "SELECT COALESCE(SUM(seats), 0) FROM bookings").fetchone()[0], 0)
+            foreign_ledger = connection.execute(
+                """SELECT COUNT(*) FROM wallet_ledger AS ledger
+                    LEFT JOIN bank_cards AS card
+                    ON card.id = ledger.card_id AND card.user_id = ledger.user_id
+                    WHERE card.id IS NULL""").fetchone()[0]
+            self.assertEqual(foreign_ledger, 0)
+        self.assertEqual(report["bookings"] + report["skipped_bookings"], 5000)
+        with User(db_path) as myuser:
+            self.assertIsNotNone(myuser.authenticate(USERNAME_FORMAT.format(7),
+                                                     GENERATED_PASSWORD))
+
+
+if __name__ == "__main__":
+    unittest.main()
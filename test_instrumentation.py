@@ -0,0 +1,105 @@
+"""
+This unit test file tests the query instrumentation implemented in the 'instrumentation.py'
+script.
+
+Tested Functions and Classes:
+- LatencyHistogram: Bucketing and percentiles.
+- QueryStats / InstrumentedCursor: Per-statement counters, rows and the slow-query log.
+- snapshot(): The JSON export.
+
+Usage:
+1. Run this unit test script to verify the correctness of the query instrumentation.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on a fresh database file inside a temporary directory.
+"""
+
+import json
+import unittest
+
+import instrumentation
+from instrumentation import LatencyHistogram, query_stats, snapshot
+from test_users import TempDatabaseTestCase
+from users import Admin, User
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """
+    This class contains test cases for the latency histogram.
+    """
+    def test_percentiles_are_within_a_bucket(self):
+        """
+        Percentiles land on the upper bound of the right bucket, within 25%.
+        """
+        histogram = LatencyHistogram()
+        for value in range(1, 10_001):
+            histogram.record(value * 1000)
+        for percentile, exact in ((50, 5_000_000), (90, 9_000_000), (99, 9_900_000)):
+            estimate = histogram.percentile(percentile)
+            self.assertGreaterEqual(estimate, exact)
+            self.assertLess(estimate, exact * 1.25)
+        self.assertEqual(LatencyHistogram().percentile(50), 0)
+
+
+class TestQueryStats(TempDatabaseTestCase):
+    """
+    This class contains test cases for the per-statement statistics.
+    """
+    def setUp(self):
+        super().setUp()
+        self.threshold = query_stats().slow_threshold_ns
+        with Admin(self.db_path) as myadmin:
+            myadmin.migrate()
+            myadmin.bulk_add_sanses([(f"Movie {n}", "2020-01-01", 10, 0) for n in range(50)])
+        query_stats().reset()
+
+    def tearDown(self):
+        query_stats().slow_threshold_ns = self.threshold
+        query_stats().reset()
+        super().tearDown()
+
+    def statement(self, fragment):
+        """
+        Returns the snapshot entry of the statement containing `fragment`.
+        """
+        matches = [entry for entry in snapshot()["statements"] if fragment in entry["sql"]]
+        self.assertEqual(len(matches), 1, matches)
+        return matches[0]
+
+    def test_calls_and_rows_are_counted_per_statement(self):
+        """
+        Repeated calls share one normalized entry; fetched and changed rows are counted.
+        """
+        with User(self.db_path) as myuser:
+            for _ in range(3):
+                myuser.select_bank_card(1)
+                myuser.get_all_sanses()
+            myuser.reserve_sans(1, 1)
+        cards = self.statement("FROM bank_cards WHERE user_id")
+        self.assertEqual((cards["calls"], cards["rows"]), (3, 0))
+        listing = self.statement("age_limit FROM Sanses ORDER BY id")
+        self.assertEqual((listing["calls"], listing["rows"]), (1, 50))
+        self.assertGreater(listing["total_ms"], 0)
+        self.assertFalse([entry for entry in snapshot()["statements"]
+                          if "SELECT id, hall_capacity" in entry["sql"]])
+        update = self.statement("UPDATE Sanses SET hall_capacity")
+        self.assertEqual((update["calls"], update["rows"]), (1, 1))
+        self.assertNotIn("\n", update["sql"])
+        json.dumps(snapshot())
+
+    def test_slow_statements_are_logged_with_their_plan(self):
+        """
+        With a zero threshold every statement is slow and carries its query plan once.
+        """
+        query_stats().slow_threshold_ns = 0
+        with self.assertLogs(instrumentation.slow_query_logger, "WARNING"):
+            with User(self.db_path) as myuser:
+                myuser.select_bank_card(1)
+        slow = [entry for entry in snapshot()["slow_queries"]
+                if "FROM bank_cards WHERE user_id" in entry["sql"]]
+        self.assertEqual(len(slow), 1)
+        self.assertTrue(any("idx_bank_cards_user" in step for step in slow[0]["plan"]))
+
+if __name__ == "__main__":
+    unittest.main()
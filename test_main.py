@@ -18,6 +18,9 @@ It simulates user input for login and validates the login success message.
 of a user with incorrect credentials. It simulates user input
 for login and validates the login failure message.
 
+4. `TestStartup`: Starts 'main.py' in fresh interpreters and checks that the optional
+modules load lazily and that the first menu appears within STARTUP_TARGET_MS.
+
 Usage:
 1. Run this unit test script to verify the correctness
 of the user registration and login functionality.
@@ -27,14 +30,43 @@ Note:
 - The `@patch` decorator is used to mock the `input` function
 to provide predefined input values during testing.
 - The test cases capture the program's output and assert against expected output messages.
+- The tests run against a temporary copy of 'mydatabase.db' (selected through the
+CINEMATICKET_DB environment variable) so the checked-in database is never modified.
 """
 
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch
 from io import StringIO
 import sys
 
+from benchmarks import STARTUP_TARGET_MS, import_times, time_to_first_menu
 from main import main
+from users import DB_PATH_ENV
+
+_temp_dir = None
+
+
+def setUpModule():
+    """
+    Points the program at a temporary copy of the checked-in database.
+    """
+    global _temp_dir
+    _temp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(_temp_dir, "mydatabase.db")
+    shutil.copyfile(os.path.join(os.path.dirname(os.path.abspath(__file__)), "mydatabase.db"),
+                    db_path)
+    os.environ[DB_PATH_ENV] = db_path
+
+
+def tearDownModule():
+    """
+    Removes the temporary database.
+    """
+    os.environ.pop(DB_PATH_ENV, None)
+    shutil.rmtree(_temp_dir, ignore_errors=True)
 
 class TestUserRegistrationLogin(unittest.TestCase):
     """
@@ -101,5 +133,26 @@ class TestUserRegistrationLogin(unittest.TestCase):
         main()
         self.assertIn("Login Failed!!", fake_output.getvalue())
         sys.stdout = sys.__stdout__
+
+
+class TestStartup(unittest.TestCase):
+    """
+    This class contains test cases for the start of the program.
+    """
+    def test_optional_modules_load_lazily(self):
+        """
+        Importing main does not load the importer, the table renderer or the profiler.
+        """
+        self.assertEqual(import_times("main")["lazy_modules_loaded"], [])
+
+    def test_first_menu_within_target(self):
+        """
+        The median start, on a new and then a migrated database, reaches the first menu
+        within STARTUP_TARGET_MS.
+        """
+        report = time_to_first_menu(runs=4)
+        self.assertLess(report["starts"]["p50_us"], STARTUP_TARGET_MS * 1000)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,113 @@
+"""
+This unit test file tests the schema migrations implemented in the 'migrations.py' script
+and applied by sqlite_connection.migrate().
+
+Tested Functions and Classes:
+- sqlite_connection.migrate(): Versioned, once-only schema upgrades.
+- SchemaVersionError: Refusing databases newer than the program.
+
+Usage:
+1. Run this unit test script to verify the correctness of the schema migrations.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on a fresh database file inside a temporary directory.
+"""
+
+import sqlite3
+import unittest
+from datetime import datetime
+
+from migrations import (
+    MIGRATIONS, SCHEMA_VERSION, SchemaVersionError, normalize_release_dates,
+)
+from test_users import TempDatabaseTestCase
+from users import SQLiteConnection
+
+
+class TestMigrate(TempDatabaseTestCase):
+    """
+    This class contains test cases for the schema migrations.
+    """
+    def test_fresh_database_is_migrated_once(self):
+        """
+        A new database gets every migration; later starts read one pragma and run no DDL.
+        """
+        with SQLiteConnection(self.db_path) as db:
+            self.assertEqual(db.migrate(), SCHEMA_VERSION)
+            statements = []
+            db.connector.set_trace_callback(statements.append)
+            try:
+                self.assertEqual(db.migrate(), 0)
+                db.create_table()
+                db.wallet()
+            finally:
+                db.connector.set_trace_callback(None)
+            self.assertEqual(statements, ["PRAGMA user_version"] * 3)
+            db.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            indexes = {row[0] for row in db.cursor.fetchall()}
+        self.assertTrue({"idx_bank_cards_user", "idx_sanses_available",
+                         "idx_users_subscription_expiry", "idx_wallet_ledger_user"} <= indexes)
+
+    def test_unversioned_database_is_upgraded(self):
+        """
+        A database made before versioning keeps its rows and gets the missing schema.
+        """
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute(
+                """CREATE TABLE users(
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE,
+                    password TEXT NOT NULL, birthdate DATE, number_phone Text,
+                    registration_date TEXT, Subscription TEXT DEFAULT 'Silver',
+                    subscription_balance TEXT, role_user TEXT DEFAULT 'User')"""
+            )
+            connection.execute(
+                "INSERT INTO users(username, password, Subscription, subscription_balance)"
+                " VALUES ('sara', 'x', 'Golden', '2030-01-01 12:00:00')"
+            )
+            connection.execute('CREATE TABLE "Wallet_balance" ("Wallet_balance" INTEGER NOT NULL)')
+            connection.execute("INSERT INTO Wallet_balance VALUES (1000000)")
+        connection.close()
+        with SQLiteConnection(self.db_path) as db:
+            self.assertEqual(db.migrate(), SCHEMA_VERSION)
+            db.cursor.execute("SELECT username, subscription_expires_at FROM users")
+            self.assertEqual(db.cursor.fetchall(), [
+                ("sara", int(datetime(2030, 1, 1, 12).timestamp())),
+            ])
+            db.cursor.execute("SELECT COUNT(*) FROM wallets")
+            self.assertEqual(db.cursor.fetchone()[0], 0)
+            db.cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'Wallet_balance'")
+            self.assertEqual(db.cursor.fetchone()[0], 0)
+
+    def test_stored_release_dates_are_normalized(self):
+        """
+        Release dates stored before add_sanse() normalized them get zero-padded.
+        """
+        with SQLiteConnection(self.db_path) as db:
+            db.migrate()
+            db.cursor.executemany(
+                "INSERT INTO Sanses(Movie_Name, Release_date, hall_capacity, age_limit)"
+                " VALUES (?, ?, 10, 0)",
+                [("Old", "2023-8-15"), ("Padded", "2023-09-01"), ("Broken", "soon")],
+            )
+            version = MIGRATIONS.index(normalize_release_dates)
+            db.cursor.execute(f"PRAGMA user_version = {version}")
+            db.connector.commit()
+            self.assertEqual(db.migrate(), SCHEMA_VERSION - version)
+            db.cursor.execute("SELECT Release_date FROM Sanses ORDER BY id")
+            self.assertEqual([row[0] for row in db.cursor.fetchall()],
+                             ["2023-08-15", "2023-09-01", "soon"])
+
+    def test_newer_database_is_refused(self):
+        """
+        A schema version beyond the known migrations raises instead of guessing.
+        """
+        with SQLiteConnection(self.db_path) as db:
+            db.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+            with self.assertRaises(SchemaVersionError):
+                db.migrate()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+This unit test file tests the HTTP/JSON API implemented in the 'server.py' script.
+
+Tested Functions and Classes:
+- serve() / TicketServer: Registration, login, cards, wallet and bookings over HTTP/1.1.
+- validate(): Request body schemas.
+
+Usage:
+1. Run this unit test script to verify the correctness of the HTTP API.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case serves a fresh database file inside a temporary directory on a free port.
+"""
+
+import asyncio
+import http.client
+import json
+import socket
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from server import SESSION_PRUNE_INTERVAL, TicketServer, serve
+from service import TicketService
+from test_users import TempDatabaseTestCase
+from users import ADMIN_CODE, User
+
+
+class TestTicketServer(TempDatabaseTestCase, unittest.IsolatedAsyncioTestCase):
+    """
+    This class contains test cases for the HTTP/JSON API.
+    """
+    async def asyncSetUp(self):
+        ready = asyncio.get_running_loop().create_future()
+        self.server = asyncio.create_task(serve("127.0.0.1", 0, self.db_path, workers=2,
+                                                password_iterations=1000, ready=ready,
+                                                sweep_interval=0.05))
+        self.host, self.port = await ready
+
+    async def asyncTearDown(self):
+        self.server.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await self.server
+
+    def call(self, connection, method, path, body=None, token=None):
+        """
+        Sends one request on a (keep-alive) connection and decodes the JSON answer.
+        """
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        connection.request(method, path, json.dumps(body) if body is not None else None,
+                           headers)
+        response = connection.getresponse()
+        raw = response.read()
+        return response.status, json.loads(raw) if raw else None
+
+    def client_flow(self):
+        """
+        Runs a whole customer session on a single keep-alive connection.
+        """
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=10)
+        try:
+            status, _ = self.call(connection, "POST", "/users", {
+                "username": "admin", "password": "secret", "birthdate": "1990-1-1",
+                "admin_code": ADMIN_CODE})
+            self.assertEqual(status, 201)
+            status, login = self.call(connection, "POST", "/sessions",
+                                      {"username": "admin", "password": "secret"})
+            self.assertEqual(status, 201)
+            self.assertEqual(login["user"]["role"], "Admin")
+            token = login["token"]
+            status, _ = self.call(connection, "POST", "/sanses", {
+                "movie_name": "Heat", "release_date": "2020-01-01", "hall_capacity": 1,
+                "age_limit": 12}, token)
+            self.assertEqual(status, 201)
+            self.call(connection, "POST", "/cards", {
+                "card_name": "main", "card_number": "1" * 16, "card_expire_date": "28/01",
+                "balance": 100, "cvv2": 123}, token)
+            status, cards = self.call(connection, "GET", "/cards", token=token)
+            card_id = cards["cards"][0]["id"]
+            status, wallet = self.call(connection, "POST", "/wallet/recharge",
+                                       {"card_id": card_id, "amount": 60}, token)
+            self.assertEqual((status, wallet), (200, {"balance": 60}))
+            status, _ = self.call(connection, "POST", "/wallet/recharge",
+                                  {"card_id": card_id, "amount": 60}, token)
+            self.assertEqual(status, 409)
+            status, error = self.call(connection, "POST", "/sanses/1/bookings",
+                                      {"seats": 0}, token)
+            self.assertEqual((status, error), (400, {"error": "seats must be positive"}))
+            status, booking = self.call(connection, "POST", "/sanses/1/bookings", {}, token)
+            self.assertEqual((status, booking["status"]), (201, "reserved"))
+            status, booking = self.call(connection, "POST", "/sanses/1/bookings", {}, token)
+            self.assertEqual((status, booking["status"]), (409, "sold_out"))
+            status, page = self.call(connection, "GET", "/sanses?limit=10", token=token)
+            self.assertEqual(page["sanses"][0]["hall_capacity"], 0)
+            status, sanse = self.call(connection, "GET", "/sanses/1", token=token)
+            self.assertEqual((status, sanse["sanse"]["hall_capacity"]), (200, 0))
+            status, _ = self.call(connection, "GET", "/sanses/99", token=token)
+            self.assertEqual(status, 404)
+            status, _ = self.call(connection, "DELETE", "/sessions", token=token)
+            self.assertEqual(status, 204)
+            status, _ = self.call(connection, "GET", "/me", token=token)
+            self.assertEqual(status, 401)
+        finally:
+            connection.close()
+
+    async def test_customer_flow_over_keep_alive(self):
+        """
+        A full session works over one persistent HTTP/1.1 connection.
+        """
+        await asyncio.to_thread(self.client_flow)
+
+    def bad_requests(self):
+        """
+        Sends malformed and unauthorised requests on one connection.
+        """
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=10)
+        try:
+            self.assertEqual(self.call(connection, "GET", "/me")[0], 401)
+            self.assertEqual(self.call(connection, "GET", "/nowhere")[0], 404)
+            self.assertEqual(self.call(connection, "PUT", "/users", {})[0], 405)
+            status, error = self.call(connection, "POST", "/sessions", {"username": "a"})
+            self.assertEqual((status, error), (400, {"error": "Missing field: password"}))
+            status, error = self.call(connection, "POST", "/users", {
+                "username": "a", "password": "b", "birthdate": "2000-01-01", "admin_code": "x"})
+            self.assertEqual(status, 403)
+        finally:
+            connection.close()
+        with socket.create_connection((self.host, self.port), timeout=10) as raw:
+            raw.sendall(b"GET /me HTTP/1.1\r\nX-Long: " + b"a" * 70000 + b"\r\n\r\n")
+            self.assertTrue(raw.recv(100).startswith(b"HTTP/1.1 431 "))
+
+    def failing_requests(self):
+        """
+        Logs in, then hits a deleted user row and an unexpected error.
+        """
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=10)
+        try:
+            self.call(connection, "POST", "/users", {
+                "username": "sara", "password": "secret", "birthdate": "2000-01-01"})
+            token = self.call(connection, "POST", "/sessions",
+                              {"username": "sara", "password": "secret"})[1]["token"]
+            with mock.patch.object(TicketService, "show_wallet_balance",
+                                   side_effect=RuntimeError("boom")):
+                with self.assertLogs("cinematicket.server", "ERROR"):
+                    status, error = self.call(connection, "GET", "/wallet", token=token)
+            self.assertEqual((status, error), (500, {"error": "Internal server error"}))
+            with User(self.db_path) as myuser:
+                myuser.cursor.execute("DELETE FROM users WHERE username = 'sara'")
+                myuser.connector.commit()
+            status, _ = self.call(connection, "PATCH", "/me", {"number_phone": "0912"}, token)
+            self.assertEqual(status, 404)
+        finally:
+            connection.close()
+
+    async def test_invalid_requests_get_json_errors(self):
+        """
+        Unknown paths, wrong methods, bad bodies and missing tokens get JSON errors.
+        """
+        await asyncio.to_thread(self.bad_requests)
+
+    async def test_unexpected_errors_get_json_500(self):
+        """
+        Errors the handlers do not expect are logged and answered, never dropped.
+        """
+        await asyncio.to_thread(self.failing_requests)
+
+    async def test_expired_sessions_are_pruned(self):
+        """
+        Logging in drops every expired token, not only the ones used again.
+        """
+        app = TicketServer(None)
+        app.sessions = {"old": SimpleNamespace(is_expired=lambda: True),
+                        "live": SimpleNamespace(is_expired=lambda: False)}
+        app._pruned_at -= SESSION_PRUNE_INTERVAL
+        app.prune_sessions()
+        self.assertEqual(list(app.sessions), ["live"])
+
+    async def test_expired_subscriptions_are_swept(self):
+        """
+        The running server downgrades expired subscriptions in the stored data.
+        """
+        with User(self.db_path) as myuser:
+            myuser.cursor.execute(
+                """INSERT INTO users(username, password, Subscription, subscription_expires_at)
+                    VALUES ('sara', 'x', 'Golden', ?)""", (int(time.time()) - 10,))
+            myuser.connector.commit()
+            for _ in range(100):
+                myuser.cursor.execute("SELECT Subscription FROM users WHERE username = 'sara'")
+                if myuser.cursor.fetchone()[0] == "Silver":
+                    break
+                await asyncio.sleep(0.05)
+            else:
+                self.fail("the expired subscription was not swept")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+This unit test file tests the asyncio facade implemented in the 'service.py' script.
+
+Tested Functions and Classes:
+- TicketService: Async user, wallet and sanse operations on a bounded worker pool.
+- ServiceBusyError: Load shedding once max_pending calls are queued.
+
+Usage:
+1. Run this unit test script to verify the correctness of the asyncio facade.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on a fresh database file inside a temporary directory.
+"""
+
+import asyncio
+import unittest
+
+from service import ServiceBusyError, TicketService
+from test_users import TempDatabaseTestCase
+from users import ReservationStatus, User
+
+# A low PBKDF2 cost keeps the tests fast; the algorithm is the same at any cost
+TEST_PASSWORD_ITERATIONS = 1000
+# High enough that one verify takes far longer than a database read
+SLOW_PASSWORD_ITERATIONS = 200_000
+
+
+class TestTicketService(TempDatabaseTestCase, unittest.IsolatedAsyncioTestCase):
+    """
+    This class contains test cases for the asyncio service facade.
+    """
+    def setUp(self):
+        super().setUp()
+        with User(self.db_path) as myuser:
+            myuser.migrate()
+
+    async def test_concurrent_sessions_share_the_workers(self):
+        """
+        Many sessions register, log in, recharge and buy concurrently without overselling.
+        """
+        async with TicketService(self.db_path, workers=2,
+                                 password_iterations=TEST_PASSWORD_ITERATIONS) as service:
+            await service.add_sanse("Heat", "2020-01-01", 10, 12)
+
+            async def client(number):
+                username = f"user{number}"
+                await service.register_user(username, "secret", "2000-01-01", "User")
+                session = await service.authenticate(username, "secret")
+                await service.add_bank_card(session.id, "card", f"{number:016d}", "28/01",
+                                            100, 1234)
+                card_id = (await service.select_bank_card(session.id))[0][0]
+                self.assertTrue(await service.update_wallet_balance(40, card_id, session.id))
+                return await service.buy_sanse(1, session.id, 20)
+
+            outcomes = await asyncio.gather(*(client(number) for number in range(30)))
+            self.assertEqual(outcomes.count(ReservationStatus.RESERVED), 10)
+            self.assertEqual(outcomes.count(ReservationStatus.SOLD_OUT), 20)
+            self.assertEqual(await service.show_wallet_balance(30), (40,))
+            self.assertIsNone(await service.authenticate("user1", "wrong"))
+            self.assertEqual(service.pending, 0)
+
+    async def test_hashing_does_not_hold_a_database_worker(self):
+        """
+        While a login runs PBKDF2, the only database worker is free for other calls.
+        """
+        async with TicketService(self.db_path, workers=1,
+                                 password_iterations=SLOW_PASSWORD_ITERATIONS) as service:
+            await service.register_user("sara", "secret", "2000-01-01", "User")
+            finished = []
+
+            async def record(name, call):
+                await call
+                finished.append(name)
+
+            await asyncio.gather(
+                record("login", service.authenticate("sara", "secret")),
+                record("read", service.check_subscription(1)),
+            )
+            self.assertEqual(finished, ["read", "login"])
+
+    async def test_calls_past_max_pending_are_rejected(self):
+        """
+        Once max_pending calls are queued, further calls fail fast instead of queueing.
+        """
+        async with TicketService(self.db_path, workers=1, max_pending=2) as service:
+            outcomes = await asyncio.gather(
+                *(service.check_subscription(1) for _ in range(3)), return_exceptions=True
+            )
+            self.assertEqual(outcomes[:2], [None, None])
+            self.assertIsInstance(outcomes[2], ServiceBusyError)
+
+
+if __name__ == "__main__":
+    unittest.main()
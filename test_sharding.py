@@ -0,0 +1,100 @@
+"""
+This unit test file tests the per-cinema sharding implemented in the 'sharding.py' script.
+
+Tested Functions and Classes:
+- ShardRouter: Routing writes to cinema files, parallel writers and merged listings.
+
+Usage:
+1. Run this unit test script to verify the correctness of the sharding router.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on fresh database files inside a temporary directory.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+from sharding import ShardRouter
+from users import ReservationStatus
+
+TEST_PASSWORD_ITERATIONS = 1000
+
+
+class TestShardRouter(unittest.TestCase):
+    """
+    This class contains test cases for the sharding router.
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.router = ShardRouter(os.path.join(self.temp_dir, "shared.db"))
+
+    def tearDown(self):
+        self.router.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_bookings_go_to_the_cinema_file(self):
+        """
+        Sanses and bookings live in their cinema's file; users stay in the shared file.
+        """
+        with self.router.shared() as myuser:
+            myuser.password_iterations = TEST_PASSWORD_ITERATIONS
+            myuser.register_user("sara", "secret", "2000-02-02", "User")
+            session = myuser.authenticate("sara", "secret")
+        self.router.add_sanse(1, "Dune", "2020-01-01", 1, 0)
+        self.router.add_sanse(2, "Dune", "2020-01-01", 5, 0)
+        self.assertEqual(self.router.cinemas(), [1, 2])
+        self.assertEqual(self.router.buy_sanse(1, 1, session.id), ReservationStatus.RESERVED)
+        self.assertEqual(self.router.buy_sanse(1, 1, session.id), ReservationStatus.SOLD_OUT)
+        self.assertEqual(self.router.buy_sanse(2, 1, session.id), ReservationStatus.RESERVED)
+        self.assertEqual(self.router.get_sanse(2, 1)[3], 4)
+        with self.router.cinema(1) as myuser:
+            myuser.cursor.execute("SELECT user_id, seats FROM bookings")
+            self.assertEqual(myuser.cursor.fetchall(), [(session.id, 1)])
+            myuser.cursor.execute("SELECT COUNT(*) FROM users")
+            self.assertEqual(myuser.cursor.fetchone()[0], 0)
+
+    def test_cinemas_write_in_parallel(self):
+        """
+        An open write transaction on one cinema does not block writes to another.
+        """
+        self.router.add_sanse(1, "Dune", "2020-01-01", 10, 0)
+        self.router.add_sanse(2, "Dune", "2020-01-01", 10, 0)
+        with self.router.cinema(1) as first, self.router.cinema(2) as second:
+            first.cursor.execute("PRAGMA busy_timeout = 0")
+            second.cursor.execute("PRAGMA busy_timeout = 0")
+            with first.transaction():
+                first.reserve_sans(1, 1)
+                self.assertEqual(second.reserve_sans(1, 1), ReservationStatus.RESERVED)
+
+    def test_listings_are_merged_across_cinemas(self):
+        """
+        Keyset pages walk every cinema's sanses once, in (key, cinema) order.
+        """
+        for cinema_id in (3, 1, 2):
+            self.router.bulk_add_sanses(cinema_id, [
+                (f"Movie {cinema_id}-{n}", f"2020-01-0{n % 3 + 1}", 10, 12 * (n % 2))
+                for n in range(5)
+            ])
+        expected = sorted(self.router.get_all_sanses(), key=lambda row: (row[3], row[1], row[0]))
+        self.assertEqual(len(expected), 15)
+        listed, cursor = [], None
+        while True:
+            page = self.router.get_sanses_page(after=cursor, limit=4, order_by="release_date")
+            listed.extend(page.rows)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(listed, expected)
+        by_id = self.router.get_sanses_page(limit=6)
+        self.assertEqual([row[:2] for row in by_id.rows],
+                         [(1, 1), (2, 1), (3, 1), (1, 2), (2, 2), (3, 2)])
+        available = self.router.get_available_sanses("2015-01-01", today=date(2020, 1, 2))
+        self.assertEqual([row[3] for row in available], ["2020-01-01"] * 3 + ["2020-01-02"] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+This unit test file tests the action tracing implemented in the 'tracing.py' script.
+
+Tested Functions and Classes:
+- Tracer: Per-action latency, statement attribution, profiling and the JSON report.
+
+Usage:
+1. Run this unit test script to verify the correctness of the action tracing.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on a fresh database file inside a temporary directory.
+"""
+
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from test_users import TempDatabaseTestCase
+from tracing import Tracer
+from users import User
+
+
+class TestTracer(TempDatabaseTestCase):
+    """
+    This class contains test cases for the action tracer.
+    """
+    def setUp(self):
+        super().setUp()
+        self.myuser = User(self.db_path)
+        self.myuser.migrate()
+
+    def tearDown(self):
+        self.myuser.close()
+        super().tearDown()
+
+    def test_disabled_tracer_is_a_no_op(self):
+        """
+        With tracing and profiling off, actions get a shared no-op context manager.
+        """
+        tracer = Tracer(enabled=False, profile="")
+        self.assertIs(tracer.action("card.add"), tracer.action("wallet.show"))
+        with tracer.action("card.add"):
+            self.myuser.select_bank_card(1)
+        self.assertEqual(tracer.snapshot(), {})
+
+    def test_actions_are_timed_with_their_statements(self):
+        """
+        Each action gets a latency histogram and the statements it ran.
+        """
+        tracer = Tracer(enabled=True, profile="")
+        for _ in range(3):
+            with tracer.action("wallet.show"):
+                self.myuser.show_wallet_balance(1)
+        report = tracer.snapshot()
+        self.assertEqual(list(report), ["wallet.show"])
+        self.assertEqual(report["wallet.show"]["calls"], 3)
+        self.assertGreater(report["wallet.show"]["p99_us"], 0)
+        statements = report["wallet.show"]["statements"]
+        self.assertEqual(statements[0]["calls"], 3)
+        self.assertIn("FROM wallets", statements[0]["sql"])
+        path = tracer.write(os.path.join(self.temp_dir, "trace.json"))
+        with open(path, encoding="utf-8") as report_file:
+            self.assertEqual(json.load(report_file), report)
+
+    def test_chosen_action_is_profiled(self):
+        """
+        A profiled action is dumped to a .prof file even when timing is off.
+        """
+        tracer = Tracer(enabled=False, profile="card.list", profile_dir=self.temp_dir)
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            with tracer.action("card.list"):
+                self.myuser.select_bank_card(1)
+            with tracer.action("card.add"):
+                pass
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "profile-card.list-1.prof")))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "profile-card.add-1.prof")))
+        self.assertIn("select_bank_card", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,587 @@
+"""
+This unit test file tests the database layer implemented in the 'users.py' script.
+
+Tested Functions and Classes:
+- ConnectionPool / get_pool(): The shared, tuned SQLite connection pool.
+- User bank card methods: Per-user card listing, lookup, update and delete.
+- User.authenticate() / UserSession: The single-query login path and the cached profile.
+- hash_password() / verify_password(): Salted password hashing and legacy upgrades.
+- User.reserve_sans(): Atomic seat reservation under concurrent buyers.
+- User.get_available_sanses(): Availability filtering with the partial index.
+- SanseCache: The read-through showtime catalogue and its invalidation.
+- get_sanses_page() / iter_sanses(): Keyset pagination and streaming of the catalogue.
+- User.update_wallet_balance(): Atomic card-to-wallet transfers with a ledger.
+- sweep_expired_subscriptions() / check_subscription(): Epoch subscription expiry.
+- SubscriptionSweeper: The background sweeps and their recovery from failures.
+
+Usage:
+1. Run this unit test script to verify the correctness of the database layer.
+2. The `unittest` module is used to define and run test cases.
+
+Note:
+- Every test case works on a fresh database file inside a temporary directory.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest import mock
+
+from users import (
+    NO_SUBSCRIPTION_NOTICE, Admin, ConnectionPool, PoolTimeoutError, ReservationStatus,
+    SQLiteConnection, SubscriptionSweeper, User, UserSession, get_catalogue, get_pool,
+    hash_password, verify_password,
+)
+
+# A low PBKDF2 cost keeps the tests fast; the algorithm is the same at any cost
+TEST_PASSWORD_ITERATIONS = 1000
+
+
+class TempDatabaseTestCase(unittest.TestCase):
+    """
+    Base class that gives every test a fresh database file.
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+
+    def tearDown(self):
+        get_pool(self.db_path).close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+class TestConnectionPool(TempDatabaseTestCase):
+    """
+    This class contains test cases for the shared connection pool.
+    """
+    def test_connections_are_tuned(self):
+        """
+        Pooled connections use WAL journaling and synchronous=NORMAL.
+        """
+        with get_pool(self.db_path).connection() as connection:
+            self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(connection.execute("PRAGMA synchronous").fetchone()[0], 1)
+
+    def test_user_and_admin_share_the_pool(self):
+        """
+        User and Admin objects borrow from the same pool and hand connections back on close.
+        """
+        myuser = User(self.db_path)
+        connector = myuser.connector
+        self.assertIs(myuser.pool, get_pool(self.db_path))
+        myuser.close()
+        with Admin(self.db_path) as myadmin:
+            self.assertIs(myadmin.connector, connector)
+
+    def test_pool_grows_for_larger_callers(self):
+        """
+        A caller that needs more connections grows a pool opened earlier at the default size.
+        """
+        with User(self.db_path):
+            pass
+        self.assertEqual(get_pool(self.db_path, size=16).size, 16)
+        self.assertEqual(get_pool(self.db_path).size, 16)
+
+    def test_acquire_times_out_when_exhausted(self):
+        """
+        A full pool raises PoolTimeoutError instead of opening more connections.
+        """
+        pool = ConnectionPool(self.db_path, size=1, timeout=0.05)
+        connection = pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+        pool.release(connection)
+        pool.close()
+
+
+class TestBankCards(TempDatabaseTestCase):
+    """
+    This class contains test cases for the per-user bank card methods.
+    """
+    def setUp(self):
+        super().setUp()
+        self.myuser = User(self.db_path)
+        self.myuser.migrate()
+        self.myuser.add_bank_card(1, "mine", "1" * 16, "28/01", 600000, 1234)
+        self.myuser.add_bank_card(2, "theirs", "2" * 16, "28/01", 700000, 4321)
+
+    def tearDown(self):
+        self.myuser.close()
+        super().tearDown()
+
+    def test_cards_are_scoped_to_their_owner(self):
+        """
+        A user only lists, finds, edits and deletes their own cards.
+        """
+        cards = self.myuser.select_bank_card(1)
+        self.assertEqual([card[2] for card in cards], ["mine"])
+        self.assertIsNone(self.myuser.check_card_id(2, 1))
+        self.myuser.update_info_bank_cards("renamed", "3" * 16, 2, 1)
+        self.assertFalse(self.myuser.delete_bank_card(2, 1))
+        self.assertFalse(self.myuser.delete_bank_card(None, 1))
+        self.assertEqual([card[2:4] for card in self.myuser.select_bank_card(2)],
+                         [("theirs", "2" * 16)])
+
+    def test_delete_keeps_card_ids_stable(self):
+        """
+        Deleting a card leaves every other card ID alone; only the displayed ordinals move.
+        """
+        self.myuser.add_bank_card(1, "second", "4" * 16, "28/01", 800000, 1111)
+        self.assertTrue(self.myuser.delete_bank_card(self.myuser.card_id_from_ordinal(1, 1), 1))
+        self.assertEqual(self.myuser.check_card_id(2, 2), ("theirs", "2" * 16))
+        cards = self.myuser.select_bank_card(1)
+        self.assertEqual([(card[0], card[2], card[6]) for card in cards], [(3, "second", 1)])
+        self.assertEqual(self.myuser.card_id_from_ordinal(1, 1), 3)
+        self.assertIsNone(self.myuser.card_id_from_ordinal(1, 2))
+
+    def test_card_listing_uses_covering_index(self):
+        """
+        Listing a user's cards is a covering-index search, not a table scan.
+        """
+        self.myuser.cursor.execute(
+            """EXPLAIN QUERY PLAN SELECT id, user_id, card_name, card_number,
+                card_expire_date, current_card_balance, ROW_NUMBER() OVER (ORDER BY id)
+                FROM bank_cards WHERE user_id = ? ORDER BY id""",
+            (1,),
+        )
+        plan = " ".join(row[3] for row in self.myuser.cursor.fetchall())
+        self.assertIn("COVERING INDEX idx_bank_cards_user", plan)
+
+
+class TestAuthenticate(TempDatabaseTestCase):
+    """
+    This class contains test cases for the single-query login path.
+    """
+    def setUp(self):
+        super().setUp()
+        self.myuser = User(self.db_path)
+        self.myuser.password_iterations = TEST_PASSWORD_ITERATIONS
+        self.myuser.migrate()
+        self.myuser.register_user("sara", "secret1", "2000-02-02", "Admin", "0912")
+
+    def tearDown(self):
+        self.myuser.close()
+        super().tearDown()
+
+    def test_authenticate_returns_profile_and_role(self):
+        """
+        A correct login returns a session with the profile fields and role.
+        """
+        session = self.myuser.authenticate("sara", "secret1")
+        self.assertEqual((session.username, session.birthdate, session.number_phone),
+                         ("sara", "2000-02-02", "0912"))
+        self.assertEqual(session.role, "Admin")
+        self.assertEqual(session.subscription, "Silver")
+        self.assertIsNone(self.myuser.authenticate("sara", "wrong"))
+
+    def test_role_lookup_is_served_from_the_session(self):
+        """
+        While the session is fresh, get_server_role() does not query the database.
+        """
+        session = self.myuser.authenticate("sara", "secret1")
+        self.myuser.cursor.execute("UPDATE users SET role_user = 'User'")
+        self.assertEqual(self.myuser.get_server_role(session.id), ("Admin",))
+        session.expires_at = 0
+        self.assertEqual(self.myuser.get_server_role(session.id), ("User",))
+
+    def test_profile_writes_update_the_session_in_place(self):
+        """
+        Profile and subscription changes show up in the session without a query.
+        """
+        session = self.myuser.authenticate("sara", "secret1")
+        self.myuser.update_info("", "0999", session.id)
+        self.myuser.change_password("secret2", "secret2", session.id)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expires_at = self.myuser.update_subscription("Golden", session.id)
+        statements = []
+        self.myuser.connector.set_trace_callback(statements.append)
+        try:
+            profile = (session.username, session.number_phone, session.subscription,
+                       session.days_left())
+        finally:
+            self.myuser.connector.set_trace_callback(None)
+        self.assertEqual(statements, [])
+        self.assertEqual(profile, ("sara", "0999", "Golden", 29))
+        self.myuser.cursor.execute(
+            f"SELECT {UserSession.COLUMNS} FROM users WHERE id = ?", (session.id,))
+        stored = UserSession(self.myuser.cursor.fetchone())
+        for field in ("username", "number_phone", "subscription", "subscription_balance",
+                      "subscription_expires_at"):
+            self.assertEqual(getattr(session, field), getattr(stored, field), field)
+        self.assertIn("expired", session.days_left(now=expires_at + 1))
+        self.assertEqual(session.subscription, "Silver")
+
+    def test_passwords_are_stored_hashed(self):
+        """
+        Registration and password changes store salted hashes, never the plaintext.
+        """
+        self.myuser.cursor.execute("SELECT id, password FROM users WHERE username = 'sara'")
+        user_id, stored = self.myuser.cursor.fetchone()
+        self.assertNotIn("secret1", stored)
+        self.assertTrue(verify_password("secret1", stored))
+        self.myuser.change_password("secret2", "secret2", user_id)
+        self.assertIsNone(self.myuser.select_data("sara", "secret1"))
+        self.assertEqual(self.myuser.select_user("sara", "secret2")[1], "sara")
+
+    def test_legacy_plaintext_password_is_upgraded_on_login(self):
+        """
+        Plaintext rows from before hashing still log in and are rehashed on success.
+        """
+        self.myuser.cursor.execute("UPDATE users SET password = '1234' WHERE username = 'sara'")
+        self.myuser.connector.commit()
+        self.assertIsNotNone(self.myuser.authenticate("sara", "1234"))
+        self.myuser.cursor.execute("SELECT password FROM users WHERE username = 'sara'")
+        stored = self.myuser.cursor.fetchone()[0]
+        self.assertTrue(stored.startswith(f"pbkdf2_sha256${TEST_PASSWORD_ITERATIONS}$"))
+        self.assertIsNotNone(self.myuser.authenticate("sara", "1234"))
+
+    def test_hashes_are_salted(self):
+        """
+        The same password hashes differently every time.
+        """
+        self.assertNotEqual(hash_password("same", 1000), hash_password("same", 1000))
+
+    def test_legacy_real_password_column_verifies(self):
+        """
+        Plaintext passwords the old schema stored as REAL (1234 -> 1234.0) still verify.
+        """
+        self.assertTrue(verify_password("1234", 1234.0))
+        self.assertFalse(verify_password("1234.5", 1234.0))
+
+
+class TestReservations(TempDatabaseTestCase):
+    """
+    This class contains test cases for the seat reservation engine.
+    """
+    def setUp(self):
+        super().setUp()
+        with Admin(self.db_path) as myadmin:
+            myadmin.migrate()
+            myadmin.admin_add_sanse("Hot Movie", "2023-01-01", 50, 12)
+
+    def test_concurrent_buyers_never_oversell(self):
+        """
+        More buyers than seats: exactly hall_capacity reservations succeed.
+        """
+        def buy_many(user_id):
+            with User(self.db_path) as myuser:
+                return [myuser.reserve_sans(1, user_id) for _ in range(20)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            outcomes = [status for statuses in executor.map(buy_many, range(1, 5))
+                        for status in statuses]
+        self.assertEqual(outcomes.count(ReservationStatus.RESERVED), 50)
+        self.assertEqual(outcomes.count(ReservationStatus.SOLD_OUT), 30)
+        with User(self.db_path) as myuser:
+            myuser.cursor.execute("SELECT hall_capacity FROM Sanses WHERE id = 1")
+            self.assertEqual(myuser.cursor.fetchone()[0], 0)
+            myuser.cursor.execute("SELECT SUM(seats) FROM bookings WHERE sanse_id = 1")
+            self.assertEqual(myuser.cursor.fetchone()[0], 50)
+
+    def test_reservation_reports_why_it_failed(self):
+        """
+        Failed reservations say whether the sanse is missing, age restricted or sold out.
+        """
+        with User(self.db_path) as myuser:
+            self.assertEqual(myuser.buy_sanse(99, 1), ReservationStatus.NOT_FOUND)
+            self.assertEqual(myuser.buy_sanse(1, 1, user_age=10),
+                             ReservationStatus.AGE_RESTRICTED)
+            self.assertEqual(myuser.buy_sanse(1, 1, user_age=30, seats=51),
+                             ReservationStatus.SOLD_OUT)
+            self.assertEqual(myuser.buy_sanse(1, 1, user_age=30, seats=50),
+                             ReservationStatus.RESERVED)
+
+    def test_seat_count_must_be_positive(self):
+        """
+        Zero or negative seats are refused before anything is written.
+        """
+        with User(self.db_path) as myuser:
+            for seats in (0, -10):
+                with self.assertRaises(ValueError):
+                    myuser.reserve_sans(1, 1, seats=seats)
+            myuser.cursor.execute("SELECT hall_capacity FROM Sanses WHERE id = 1")
+            self.assertEqual(myuser.cursor.fetchone()[0], 50)
+            myuser.cursor.execute("SELECT COUNT(*) FROM bookings")
+            self.assertEqual(myuser.cursor.fetchone()[0], 0)
+
+
+class TestAvailableSanses(TempDatabaseTestCase):
+    """
+    This class contains test cases for the availability query.
+    """
+    def test_filters_release_date_capacity_and_age(self):
+        """
+        Only released sanses with seats left and an age limit the user meets are listed.
+        """
+        with Admin(self.db_path) as myadmin:
+            myadmin.migrate()
+            myadmin.admin_add_sanse("Released", "2023-8-15", 10, 12)
+            myadmin.admin_add_sanse("Too old for", "2023-01-01", 10, 18)
+            myadmin.admin_add_sanse("Sold out", "2023-01-01", 0, 0)
+            myadmin.admin_add_sanse("Not released", "2023-12-01", 10, 0)
+        with User(self.db_path) as myuser:
+            statements = []
+            myuser.connector.set_trace_callback(statements.append)
+            try:
+                rows = myuser.get_available_sanses("2010-06-01", today=date(2023, 10, 1))
+            finally:
+                myuser.connector.set_trace_callback(None)
+            self.assertEqual(rows, [(1, "Released", "2023-08-15", 10, 12)])
+            # The statement the method actually ran walks the partial index
+            myuser.cursor.execute("EXPLAIN QUERY PLAN " + statements[-1])
+            self.assertIn("idx_sanses_available", myuser.cursor.fetchone()[3])
+
+
+class TestSanseCatalogueCache(TempDatabaseTestCase):
+    """
+    This class contains test cases for the showtime catalogue cache.
+    """
+    def setUp(self):
+        super().setUp()
+        self.myadmin = Admin(self.db_path)
+        self.myadmin.migrate()
+        self.myadmin.admin_add_sanse("First", "2023-01-01", 10, 0)
+        self.catalogue = get_catalogue(self.db_path)
+
+    def tearDown(self):
+        self.myadmin.close()
+        super().tearDown()
+
+    def test_reads_are_served_from_memory(self):
+        """
+        Repeated reads between version checks run no SQL at all.
+        """
+        with User(self.db_path) as myuser:
+            self.assertEqual(myuser.get_all_sanses(), [(1, "First", "2023-01-01", 10, 0)])
+            statements = []
+            myuser.connector.set_trace_callback(statements.append)
+            try:
+                for _ in range(3):
+                    self.assertEqual(myuser.get_all_sanses()[0][3], 10)
+                    self.assertEqual(myuser.get_sanse(1)[1], "First")
+            finally:
+                myuser.connector.set_trace_callback(None)
+        self.assertEqual(statements, [])
+        self.assertEqual(self.catalogue.misses, 1)
+
+    def test_writes_invalidate_the_cache(self):
+        """
+        Adding and deleting sanses is visible on the next read.
+        """
+        self.myadmin.get_all_sanses()
+        self.myadmin.admin_add_sanse("Second", "2023-02-01", 5, 0)
+        self.assertEqual(len(self.myadmin.get_all_sanses()), 2)
+        self.myadmin.bulk_add_sanses([("Third", "2023-03-01", 5, 0)])
+        self.assertEqual(self.myadmin.get_sanse(3)[1], "Third")
+        self.myadmin.admin_delete_sanse(1)
+        self.assertIsNone(self.myadmin.get_sanse(1))
+
+    def test_seat_sales_do_not_reload_the_catalogue(self):
+        """
+        Sales, in this process or another, only refresh the seat counts.
+        """
+        self.catalogue.check_interval = 60
+        self.myadmin.get_all_sanses()
+        with User(self.db_path) as myuser:
+            self.assertEqual(myuser.buy_sanse(1, 1, seats=4), ReservationStatus.RESERVED)
+            # A sale in this process is seen at once, despite the long check interval
+            self.assertEqual(myuser.get_sanse(1)[3], 6)
+        self.assertEqual(self.catalogue.seat_refreshes, 1)
+        self.catalogue.check_interval = 0
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute("UPDATE Sanses SET hall_capacity = hall_capacity - 1")
+        connection.close()
+        self.assertEqual(self.myadmin.get_all_sanses()[0][3], 5)
+        self.assertEqual(self.myadmin.get_sanse(1)[3], 5)
+        self.assertEqual((self.catalogue.misses, self.catalogue.seat_refreshes), (1, 2))
+
+    def test_other_writers_are_noticed_by_version(self):
+        """
+        A write that bypasses the cache, e.g. from another process, is picked up at
+        the next version check.
+        """
+        self.catalogue.check_interval = 0
+        self.myadmin.get_all_sanses()
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute("UPDATE Sanses SET Movie_Name = 'Renamed' WHERE id = 1")
+        self.assertEqual(self.myadmin.get_sanse(1)[1], "Renamed")
+        self.assertEqual(self.catalogue.misses, 2)
+
+
+class TestSansePagination(TempDatabaseTestCase):
+    """
+    This class contains test cases for keyset pagination of the sanses.
+    """
+    def setUp(self):
+        super().setUp()
+        self.myadmin = Admin(self.db_path)
+        self.myadmin.migrate()
+        for day in (5, 3, 3, 1, 4):
+            self.myadmin.admin_add_sanse(f"Movie {day}", f"2023-01-0{day}", 10, 0)
+
+    def tearDown(self):
+        self.myadmin.close()
+        super().tearDown()
+
+    def test_pages_forward_and_back_by_id(self):
+        """
+        Walking forward then back returns the same pages with correct cursors.
+        """
+        first = self.myadmin.get_sanses_page(limit=2)
+        self.assertEqual([row[0] for row in first.rows], [1, 2])
+        self.assertIsNone(first.prev_cursor)
+        second = self.myadmin.get_sanses_page(after=first.next_cursor, limit=2)
+        third = self.myadmin.get_sanses_page(after=second.next_cursor, limit=2)
+        self.assertEqual([row[0] for row in third.rows], [5])
+        self.assertIsNone(third.next_cursor)
+        back = self.myadmin.get_sanses_page(before=third.prev_cursor, limit=2)
+        self.assertEqual(back, second)
+
+    def test_pages_by_release_date_break_ties_by_id(self):
+        """
+        Release-date order pages through equal dates without skipping or repeating rows.
+        """
+        ids, page = [], self.myadmin.get_sanses_page(limit=2, order_by="release_date")
+        while True:
+            ids.extend(row[0] for row in page.rows)
+            if page.next_cursor is None:
+                break
+            page = self.myadmin.get_sanses_page(after=page.next_cursor, limit=2,
+                                                order_by="release_date")
+        self.assertEqual(ids, [4, 2, 3, 5, 1])
+        self.assertEqual([row[0] for row in self.myadmin.iter_sanses("release_date", 2)], ids)
+
+
+class TestWalletTransfers(TempDatabaseTestCase):
+    """
+    This class contains test cases for the per-user wallet ledger.
+    """
+    def setUp(self):
+        super().setUp()
+        with User(self.db_path) as myuser:
+            myuser.migrate()
+            myuser.add_bank_card(1, "mine", "1" * 16, "28/01", 1000, 1234)
+            myuser.add_bank_card(2, "theirs", "2" * 16, "28/01", 1000, 4321)
+
+    def test_concurrent_recharges_never_overdraw(self):
+        """
+        Concurrent transfers move exactly the card balance and no more.
+        """
+        def recharge_many(_):
+            with User(self.db_path) as myuser:
+                return [myuser.update_wallet_balance(10, 1, 1) for _ in range(50)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            outcomes = [ok for oks in executor.map(recharge_many, range(4)) for ok in oks]
+        self.assertEqual(outcomes.count(True), 100)
+        with User(self.db_path) as myuser:
+            self.assertEqual(myuser.show_wallet_balance(1), (1000,))
+            self.assertEqual(myuser.select_bank_card(1)[0][5], 0)
+            myuser.cursor.execute(
+                "SELECT COUNT(*), SUM(amount), MAX(balance_after) FROM wallet_ledger"
+            )
+            self.assertEqual(myuser.cursor.fetchone(), (100, 1000, 1000))
+
+    def test_wallets_are_per_user_and_cards_must_be_owned(self):
+        """
+        A user cannot recharge from someone else's card, and wallets are separate.
+        """
+        with User(self.db_path) as myuser:
+            self.assertFalse(myuser.update_wallet_balance(100, 2, 1))
+            self.assertFalse(myuser.update_wallet_balance(1001, 1, 1))
+            self.assertTrue(myuser.update_wallet_balance(300, 1, 1))
+            self.assertEqual(myuser.show_wallet_balance(1), (300,))
+            self.assertEqual(myuser.show_wallet_balance(2), (0,))
+            with self.assertRaises(ValueError):
+                myuser.update_wallet_balance(-5, 1, 1)
+
+
+class TestSubscriptionExpiry(TempDatabaseTestCase):
+    """
+    This class contains test cases for epoch based subscription expiry.
+    """
+    def setUp(self):
+        super().setUp()
+        self.myuser = User(self.db_path)
+        self.myuser.password_iterations = TEST_PASSWORD_ITERATIONS
+        self.myuser.migrate()
+        self.myuser.register_user("sara", "secret1", "2000-02-02", "User", "0912")
+        self.myuser.register_user("ali", "secret2", "1990-01-01", "User", "0913")
+
+    def tearDown(self):
+        self.myuser.close()
+        super().tearDown()
+
+    def test_check_is_read_only(self):
+        """
+        Checking a subscription reports days left and never writes.
+        """
+        self.assertEqual(self.myuser.check_subscription(1), NO_SUBSCRIPTION_NOTICE)
+        self.myuser.update_subscription("Golden", 1)
+        self.assertEqual(self.myuser.check_subscription(1), 29)
+        self.myuser.cursor.execute(
+            "UPDATE users SET subscription_expires_at = ? WHERE id = 1", (int(time.time()) - 1,)
+        )
+        self.myuser.connector.commit()
+        self.assertIn("expired", self.myuser.check_subscription(1))
+        self.assertFalse(self.myuser.connector.in_transaction)
+        self.myuser.cursor.execute("SELECT Subscription FROM users WHERE id = 1")
+        self.assertEqual(self.myuser.cursor.fetchone(), ("Golden",))
+        self.assertIsNone(self.myuser.check_subscription(99))
+
+    def test_sweep_downgrades_only_expired(self):
+        """
+        One sweep downgrades every expired subscription and leaves active ones.
+        """
+        self.myuser.update_subscription("Golden", 1)
+        self.myuser.update_subscription("Golden", 2)
+        expires_at = int(time.time()) + 10
+        self.assertEqual(self.myuser.sweep_expired_subscriptions(now=expires_at), 0)
+        self.myuser.cursor.execute(
+            "UPDATE users SET subscription_expires_at = ? WHERE id = 1", (expires_at,)
+        )
+        self.myuser.connector.commit()
+        self.assertEqual(self.myuser.sweep_expired_subscriptions(now=expires_at), 1)
+        self.myuser.cursor.execute(
+            "SELECT Subscription, subscription_balance, subscription_expires_at FROM users"
+            " ORDER BY id"
+        )
+        rows = self.myuser.cursor.fetchall()
+        self.assertEqual(rows[0], ("Silver", NO_SUBSCRIPTION_NOTICE, None))
+        self.assertEqual(rows[1][0], "Golden")
+
+    def test_sweeper_survives_a_failed_sweep(self):
+        """
+        A sweep that raises is logged, and the sweeper keeps running and sweeping.
+        """
+        swept = threading.Event()
+        calls = []
+
+        def sweep(db):
+            calls.append(db)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            swept.set()
+            return 0
+
+        sweeper = SubscriptionSweeper(0.01, self.db_path)
+        with mock.patch.object(SQLiteConnection, "sweep_expired_subscriptions", sweep), \
+                self.assertLogs("cinematicket.sweeper", "ERROR"):
+            sweeper.start()
+            try:
+                self.assertTrue(swept.wait(5))
+            finally:
+                sweeper.stop()
+                sweeper.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+"""
+This script times the menu actions of 'main.py' and can profile a chosen action.
+
+Each action's database work runs inside `with trace("<action>"):`. Tracing records the
+action's latency in a histogram and tallies the SQL statements that ran during it, so a
+slow menu action can be traced to the queries behind it.
+
+Classes:
+- ActionStats: Calls, latency histogram and statements of one action.
+- Tracer: Times actions, profiles the chosen ones and exports the results.
+
+Functions:
+- trace(name): Returns the context manager that times (and maybe profiles) one action.
+
+Configuration (environment variables):
+- CINEMATICKET_TRACE: "1" turns on timing. When main() exits, the report is written
+to $CINEMATICKET_TRACE_FILE (default "cinematicket-trace.json").
+- CINEMATICKET_PROFILE: A comma-separated list of action names (or "*" for all) to
+run under cProfile. Each profiled call is dumped to
+$CINEMATICKET_PROFILE_DIR/profile-<action>-<n>.prof (default: the current directory),
+and the top functions by cumulative time are printed to stderr.
+
+Note:
+- With both variables unset, trace() returns a shared no-op context manager, so the
+cost of an untraced action is one function call and one attribute lookup.
+- Action names are dotted, e.g. "card.add", "wallet.recharge", "admin.sanse.import".
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from instrumentation import LatencyHistogram, collect_statements
+
+TRACE_ENV = "CINEMATICKET_TRACE"
+TRACE_FILE_ENV = "CINEMATICKET_TRACE_FILE"
+PROFILE_ENV = "CINEMATICKET_PROFILE"
+PROFILE_DIR_ENV = "CINEMATICKET_PROFILE_DIR"
+DEFAULT_TRACE_FILE = "cinematicket-trace.json"
+TOP_STATEMENTS = 5
+PROFILE_TOP_FUNCTIONS = 20
+
+_NOT_TRACED = nullcontext()
+
+
+class ActionStats:
+    """
+    The counters of one traced action.
+
+    Attributes:
+        calls (int): How many times the action ran.
+        total_ns (int): The total time spent in it.
+        max_ns (int): Its slowest call.
+        histogram (LatencyHistogram): The distribution of its latencies.
+        statements (dict): Normalized SQL -> [calls, nanoseconds] run during the action.
+    """
+    __slots__ = ("calls", "total_ns", "max_ns", "histogram", "statements")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = LatencyHistogram()
+        self.statements = {}
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The counters plus the statements that took the most time.
+        """
+        top = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_us": round(self.total_ns / self.calls / 1000, 2) if self.calls else 0.0,
+            "p50_us": round(self.histogram.percentile(50) / 1000, 2),
+            "p90_us": round(self.histogram.percentile(90) / 1000, 2),
+            "p99_us": round(self.histogram.percentile(99) / 1000, 2),
+            "max_us": round(self.max_ns / 1000, 2),
+            "statements": [
+                {"sql": sql, "calls": calls, "total_ms": round(elapsed_ns / 1e6, 3)}
+                for sql, (calls, elapsed_ns) in top[:TOP_STATEMENTS]
+            ],
+        }
+
+
+class Tracer:
+    """
+    Times actions and runs the chosen ones under cProfile.
+
+    Attributes:
+        enabled (bool): Whether actions are timed.
+        profile (set): The action names to profile ("*" profiles all of them).
+        profile_dir (str): Where profile dumps are written.
+    """
+    def __init__(self, enabled=None, profile=None, profile_dir=None):
+        if enabled is None:
+            enabled = os.environ.get(TRACE_ENV, "0") not in ("", "0")
+        if profile is None:
+            profile = os.environ.get(PROFILE_ENV, "")
+        self.enabled = enabled
+        self.profile = {name.strip() for name in profile.split(",") if name.strip()}
+        self.profile_dir = profile_dir or os.environ.get(PROFILE_DIR_ENV, ".")
+        self._actions = {}
+        self._profiled = {}
+        self._lock = threading.Lock()
+
+    def action(self, name):
+        """
+        Returns:
+            A context manager that times the action `name`, or a no-op one when
+            neither tracing nor profiling applies to it.
+        """
+        profiled = "*" in self.profile or name in self.profile
+        if not (self.enabled or profiled):
+            return _NOT_TRACED
+        return self._traced(name, profiled)
+
+    @contextmanager
+    def _traced(self, name, profiled):
+        profiler = None
+        if profiled:
+            # cProfile and pstats are only imported when a profile is asked for
+            import cProfile
+            profiler = cProfile.Profile()
+        with collect_statements() as statements:
+            start = time.perf_counter_ns()
+            if profiler is not None:
+                profiler.enable()
+            try:
+                yield
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                elapsed_ns = time.perf_counter_ns() - start
+        if self.enabled:
+            self._record(name, elapsed_ns, statements)
+        if profiler is not None:
+            self._dump_profile(name, profiler)
+
+    def _record(self, name, elapsed_ns, statements):
+        with self._lock:
+            stats = self._actions.get(name)
+            if stats is None:
+                stats = self._actions[name] = ActionStats()
+            stats.calls += 1
+            stats.total_ns += elapsed_ns
+            stats.histogram.record(elapsed_ns)
+            if elapsed_ns > stats.max_ns:
+                stats.max_ns = elapsed_ns
+            for sql, (calls, statement_ns) in statements.items():
+                entry = stats.statements.get(sql)
+                if entry is None:
+                    entry = stats.statements[sql] = [0, 0]
+                entry[0] += calls
+                entry[1] += statement_ns
+
+    def _dump_profile(self, name, profiler):
+        """
+        Writes one profiled call to a .prof file and prints its hottest functions.
+        """
+        import io
+        import pstats
+        with self._lock:
+            number = self._profiled[name] = self._profiled.get(name, 0) + 1
+        path = os.path.join(self.profile_dir, f"profile-{name}-{number}.prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(
+            PROFILE_TOP_FUNCTIONS
+        )
+        print(f"Profile of {name} written to {path}", file=sys.stderr)
+        print(summary.getvalue(), file=sys.stderr)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Action name -> counters, slowest total first, ready for json.dump().
+        """
+        with self._lock:
+            actions = {name: stats.as_dict() for name, stats in self._actions.items()}
+        return dict(sorted(actions.items(), key=lambda item: item[1]["total_ms"],
+                           reverse=True))
+
+    def write(self, path=None):
+        """
+        Writes snapshot() to a JSON file.
+
+        Args:
+            path (str, optional): The output file. Default is $CINEMATICKET_TRACE_FILE
+                or "cinematicket-trace.json".
+
+        Returns:
+            str: The path written.
+        """
+        path = path or os.environ.get(TRACE_FILE_ENV, DEFAULT_TRACE_FILE)
+        import json
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump(self.snapshot(), output, indent=2)
+        return path
+
+    def reset(self):
+        """
+        Forgets every recorded action.
+        """
+        with self._lock:
+            self._actions.clear()
+            self._profiled.clear()
+
+
+tracer = Tracer()
+
+
+def trace(name):
+    """
+    Times (and, if configured, profiles) one action of the process-wide tracer.
+
+    Args:
+        name (str): The dotted action name, e.g. "card.add".
+    """
+    return tracer.action(name)
@@ -3,70 +3,628 @@ This script defines classes and methods for managing user registration, bank car
 wallet balance, and subscriptions in an SQLite database.
 
 Classes:
+- ConnectionPool: Hands out a small set of tuned SQLite connections for one database file.
 - sqlite_connection: Manages SQLite database connections.
 - User: Inherits from sqlite_connection and provides user-related functionalities.
 
+Functions:
+- get_pool(db_path=None):
+Returns the shared ConnectionPool for a database file (default: $CINEMATICKET_DB or
+"mydatabase.db").
+- hash_password(password, iterations) / verify_password(password, stored):
+Salted PBKDF2-HMAC-SHA256 password hashing; the cost comes from
+$CINEMATICKET_PASSWORD_ITERATIONS. User runs them on password_executor().
+
 Methods:
-- sqlite_connection.create_table():
-Creates database tables for user registration and bank card data if they don't exist.
-- sqlite_connection.wallet():
-Creates a table for wallet balance data if it doesn't exist.
+- sqlite_connection.bulk_add_sanses(sanses):
+Adds many validated sanses in one transaction (used by bulk_import.py).
+- sqlite_connection.get_sanses_page(after=None, before=None, limit=20, order_by="id"):
+Retrieves one keyset-paginated page of sanses with next/previous cursors.
+- sqlite_connection.iter_sanses(order_by="id", batch_size=500):
+Streams every sanse from a cursor in bounded batches.
+- sqlite_connection.migrate():
+Applies the pending schema migrations of migrations.py; one pragma read when current.
+- sqlite_connection.create_table() / sqlite_connection.wallet():
+Older names for migrate().
 - User.register_user(username, password, birthdate, number_phone=None):
 Registers a new user with the provided information.
+- User.authenticate(username, password):
+Logs a user in with one query and returns a UserSession with the profile and role.
+- User.insert_user(...), User.select_login(username), User.set_password_hash(...):
+The database halves of registration and login, for callers that hash elsewhere.
 - User.select_data(username, password):
 Selects the username and password from the "users" table.
 - User.select_user(username, password):
 Selects all user data based on the provided username and password.
+- User.bulk_register_users(accounts):
+Registers many pre-hashed users and their bank cards in one transaction
+(used by bulk_import.py).
 - User.update_info(new_username, new_number_phone, find_id):
 Updates user information based on the provided parameters.
 - User.change_password(new_password, confirm_password, find_id):
 Changes the user's password.
 - User.add_bank_card(user_id, card_name, card_number, card_expire_date,
 current_card_balance, card_CVV2): Adds a new bank card entry.
-- User.select_bank_card():
-Retrieves all bank card entries.
-- User.check_card_id(card_id):
-Checks if a bank card with the given card_id exists.
-- User.update_info_bank_cards(card_name, card_number, card_id):
+- User.select_bank_card(user_id):
+Retrieves the bank card entries of one user.
+- User.card_id_from_ordinal(user_id, ordinal):
+Translates the displayed card number into the card ID.
+- User.check_card_id(card_id, user_id):
+Checks if the user has a bank card with the given card_id.
+- User.update_info_bank_cards(card_name, card_number, card_id, user_id):
 Updates bank card information.
-- User.delete_bank_card(card_id):
-Deletes a bank card entry and resets card IDs.
-- User.show_wallet_balance():
-Retrieves the wallet balance.
-- User.update_wallet_balance(wallet_recharge, card_id_wallet, new_card_balance):
-Updates the wallet balance and bank card balance.
+- User.delete_bank_card(card_id, user_id):
+Deletes a bank card entry.
+- User.show_wallet_balance(user_id):
+Retrieves the user's wallet balance.
+- User.update_wallet_balance(wallet_recharge, card_id_wallet, user_id):
+Atomically moves money from a bank card into the user's wallet and records it in the ledger.
 - User.update_subscription(new_Subscription, user_id):
 Updates the user's subscription and subscription expiration date.
 - User.check_subscription(user_id):
-Checks the user's subscription status and updates it if expired.
+Reports the days left on the user's subscription without writing.
+- sqlite_connection.sweep_expired_subscriptions(now=None):
+Downgrades every expired subscription with one ranged UPDATE.
+- User.get_available_sanses(user_birthday, today=None):
+Lists the released sanses with seats left that the user is old enough for.
+- User.reserve_sans(sanse_id, user_id, seats=1, user_age=None):
+Atomically takes seats from a sanse and records the booking; never oversells.
+- User.buy_sanse(sanse_id, user_id, user_age=None, seats=1):
+Buys tickets for a sanse through reserve_sans().
 
 Usage:
-1. Create an instance of the sqlite_connection class to establish a database connection.
-2. Call the create_table method to create necessary database tables.
+1. Create an instance of the sqlite_connection class to borrow a pooled database connection.
+2. Call the migrate method to create or upgrade the database tables.
 3. Create an instance of the User class for user-related operations.
 4. Use the provided methods to perform various database operations.
+5. Call close() when done so the connection goes back to the pool.
 """
 
+import hashlib
+import hmac
+import logging
+import os
 import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
 from sqlite3 import Error
 from datetime import datetime, timedelta
 from enum import Enum
-from prettytable import PrettyTable
+
+from instrumentation import InstrumentedCursor, instrumentation_enabled
+from migrations import MIGRATIONS, SCHEMA_VERSION, SchemaVersionError, normalize_date
+
+DB_PATH_ENV = "CINEMATICKET_DB"
+DEFAULT_DB_PATH = "mydatabase.db"
+DEFAULT_POOL_SIZE = 4
+# Record per-statement statistics (see instrumentation.py) unless turned off
+CURSOR_CLASS = InstrumentedCursor if instrumentation_enabled() else sqlite3.Cursor
+
+
+def resolve_db_path(db_path=None):
+    """
+    Resolves the database file to use.
+
+    Args:
+        db_path (str, optional): An explicit path. Default is None.
+
+    Returns:
+        str: db_path if given, otherwise $CINEMATICKET_DB, otherwise "mydatabase.db".
+    """
+    return db_path or os.environ.get(DB_PATH_ENV, DEFAULT_DB_PATH)
+
+
+class PoolTimeoutError(Error):
+    """
+    Raised when no pooled connection becomes free within the pool timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    A small pool of tuned SQLite connections for one database file.
+
+    Connections are opened lazily up to `size` and reused after release. Every
+    connection is switched to WAL journaling so readers do not block the writer,
+    and uses synchronous=NORMAL, a busy timeout, a larger page cache and mmap I/O.
+    """
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-65536",  # 64 MiB
+        "PRAGMA mmap_size=268435456",  # 256 MiB
+        "PRAGMA temp_store=MEMORY",
+    )
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, timeout=30.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._opened = 0
+        self._condition = threading.Condition()
+
+    def _connect(self):
+        """
+        Opens a new connection and applies the tuning pragmas.
+
+        Returns:
+            sqlite3.Connection: The new connection.
+        """
+        # Pooled connections move between threads, so the same-thread check is off;
+        # a connection is only ever used by whoever currently holds it.
+        connection = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            connection.execute(pragma)
+        return connection
+
+    def grow(self, size):
+        """
+        Raises the pool size to at least `size`; a pool never shrinks.
+
+        Args:
+            size (int): The number of connections the caller needs.
+        """
+        with self._condition:
+            if size > self.size:
+                self.size = size
+                self._condition.notify_all()
+
+    def acquire(self):
+        """
+        Takes an idle connection, opening a new one if the pool is not full yet.
+
+        Returns:
+            sqlite3.Connection: A connection reserved for the caller.
+
+        Raises:
+            PoolTimeoutError: If every connection stays busy for `timeout` seconds.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while not self._idle and self._opened >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No free connection for {self.db_path} after {self.timeout}s"
+                    )
+                self._condition.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._opened += 1
+        try:
+            return self._connect()
+        except Error:
+            with self._condition:
+                self._opened -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection):
+        """
+        Returns a connection to the pool, rolling back anything left uncommitted.
+
+        Args:
+            connection (sqlite3.Connection): A connection obtained from acquire().
+        """
+        if connection.in_transaction:
+            connection.rollback()
+        with self._condition:
+            self._idle.append(connection)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a with-block.
+
+        Yields:
+            sqlite3.Connection: A connection reserved for the caller.
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self):
+        """
+        Closes every idle connection. Connections still borrowed are closed
+        by their holders. The file's catalogue cache is forgotten too, since the
+        file may be replaced before the pool is used again.
+        """
+        with self._condition:
+            while self._idle:
+                self._idle.pop().close()
+                self._opened -= 1
+        with _pools_lock:
+            _catalogues.pop(self.db_path, None)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None, size=DEFAULT_POOL_SIZE):
+    """
+    Returns the process-wide ConnectionPool for a database file, creating it on first use.
+
+    Args:
+        db_path (str, optional): The database file. Default is resolve_db_path().
+        size (int, optional): The pool size. An existing smaller pool grows to it.
+
+    Returns:
+        ConnectionPool: The shared pool for that file.
+    """
+    path = os.path.abspath(resolve_db_path(db_path))
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path, size)
+    pool.grow(size)
+    return pool
+
+
+PASSWORD_ITERATIONS_ENV = "CINEMATICKET_PASSWORD_ITERATIONS"
+# Pick the cost from `python benchmarks.py passwords`, not by guessing
+DEFAULT_PASSWORD_ITERATIONS = 200_000
+PASSWORD_ITERATIONS = int(os.environ.get(PASSWORD_ITERATIONS_ENV, DEFAULT_PASSWORD_ITERATIONS))
+PASSWORD_HASH_SCHEME = "pbkdf2_sha256"
+
+
+def hash_password(password, iterations=PASSWORD_ITERATIONS, salt=None):
+    """
+    Hashes a password with PBKDF2-HMAC-SHA256 and a random 16-byte salt.
+
+    Args:
+        password (str): The plaintext password.
+        iterations (int, optional): The PBKDF2 cost. Default is PASSWORD_ITERATIONS.
+        salt (bytes, optional): A fixed salt, for reproducible fixtures only.
+            Default is 16 random bytes.
+
+    Returns:
+        str: "pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>".
+    """
+    salt = os.urandom(16) if salt is None else salt
+    digest = hashlib.pbkdf2_hmac("sha256", str(password).encode(), salt, iterations)
+    return f"{PASSWORD_HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, stored):
+    """
+    Checks a password against a stored hash.
+
+    Rows written before hashing was introduced hold the plaintext (sometimes stored
+    as a REAL, e.g. 1234.0); those still verify so they can be upgraded on login.
+
+    Args:
+        password (str): The plaintext password to check.
+        stored (str): The value of users.password.
+
+    Returns:
+        bool: True if the password matches.
+    """
+    if isinstance(stored, str) and stored.startswith(PASSWORD_HASH_SCHEME + "$"):
+        _, iterations, salt, digest = stored.split("$")
+        candidate = hashlib.pbkdf2_hmac(
+            "sha256", str(password).encode(), bytes.fromhex(salt), int(iterations)
+        )
+        return hmac.compare_digest(candidate.hex(), digest)
+    if isinstance(stored, float) and stored.is_integer():
+        stored = int(stored)
+    return hmac.compare_digest(str(stored).encode(), str(password).encode())
+
+
+def needs_rehash(stored, iterations=PASSWORD_ITERATIONS):
+    """
+    Returns:
+        bool: True if the stored value is plaintext or was hashed with another cost.
+    """
+    return not (isinstance(stored, str)
+                and stored.startswith(f"{PASSWORD_HASH_SCHEME}${iterations}$"))
+
+
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+
+
+def password_executor():
+    """
+    Returns the shared worker pool that runs password hashing.
+
+    PBKDF2 releases the GIL, so hashes run in parallel on the workers while the
+    pool size caps how many CPU-heavy verifies run at once; other sessions keep
+    their threads for database work.
+
+    Returns:
+        ThreadPoolExecutor: The process-wide hashing pool.
+    """
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            # Imported on first use: concurrent.futures is slow to import and a start
+            # that never hashes a password should not pay for it
+            from concurrent.futures import ThreadPoolExecutor
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1, thread_name_prefix="password-hash"
+            )
+        return _hash_executor
+
+
+def check_hall_and_price(hall, ticket_price):
+    """
+    Checks the hall number and ticket price of a sanse.
+
+    Raises:
+        ValueError: If the hall is not a positive whole number or the price is negative.
+    """
+    if not isinstance(hall, int) or hall < 1:
+        raise ValueError(f"hall must be a positive whole number: {hall!r}")
+    if not isinstance(ticket_price, int) or ticket_price < 0:
+        raise ValueError(f"ticket_price must be a whole number of at least 0: {ticket_price!r}")
+
+
+SANSE_COLUMNS = "id, Movie_Name, Release_date, hall_capacity, age_limit"
+DEFAULT_PAGE_SIZE = 20
+# Keyset columns for each supported listing order; id breaks ties
+SANSE_ORDERINGS = {
+    "id": ("id",),
+    "release_date": ("Release_date", "id"),
+}
+SansePage = namedtuple("SansePage", "rows next_cursor prev_cursor")
+SansePage.__doc__ = """
+One page of sanses from SQLiteConnection.get_sanses_page().
+
+Attributes:
+    rows (list): Tuples of (id, Movie_Name, Release_date, hall_capacity, age_limit).
+    next_cursor (tuple): Pass as `after` to get the next page, or None on the last page.
+    prev_cursor (tuple): Pass as `before` to get the previous page, or None on the first page.
+"""
+
+
+CATALOGUE_CHECK_INTERVAL = 1.0  # seconds between checks for other processes' writes
+CAPACITY_COLUMN = SANSE_COLUMNS.split(", ").index("hall_capacity")
+
+
+class SanseCache:
+    """
+    Process-wide read-through cache of the Sanses catalogue.
+
+    The rows are loaded once with the catalogue version they belong to. Writes made
+    through SQLiteConnection invalidate the cache. Writes from other processes are
+    noticed by comparing the catalogue_version row, which triggers bump when a sanse
+    is renamed, moved or re-rated or deleted, and add_sanse()/bulk_add_sanses() bump
+    once per insert. That check runs at most once per `check_interval` seconds.
+
+    Seat sales only bump the row's seats_version. When it moved, the next read
+    refreshes the cached seat counts with one narrow query instead of reloading the
+    catalogue. Sales made in this process mark the seats stale, so their next read
+    checks the versions straight away.
+
+    Attributes:
+        check_interval (float): Seconds between catalogue version checks.
+        hits (int): Reads answered from the cached rows.
+        misses (int): Reads that (re)loaded the catalogue.
+        seat_refreshes (int): Reads that refreshed only the seat counts.
+    """
+    def __init__(self, check_interval=CATALOGUE_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.seat_refreshes = 0
+        self._lock = threading.Lock()
+        self._version = None  # None means nothing is cached
+        self._seats_version = None
+        self._seats_stale = False
+        self._rows = {}  # id -> row, in id order
+        self._checked_at = 0.0
+
+    def _current(self, db):
+        """
+        Returns the cached rows, reloading them or their seat counts if they changed.
+
+        Args:
+            db (SQLiteConnection): The connection used to check and load.
+
+        Returns:
+            dict: id -> row, in id order.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (self._version is not None and not self._seats_stale
+                    and now - self._checked_at < self.check_interval):
+                self.hits += 1
+                return self._rows
+            self._seats_stale = False
+        version, seats_version = db.catalogue_versions()
+        with self._lock:
+            current = self._version == version
+            if current:
+                self._checked_at = now
+                if self._seats_version == seats_version:
+                    self.hits += 1
+                    return self._rows
+                rows = self._rows
+        if current:
+            seats_version, capacities = db.load_seat_counts()
+            rows = {sanse_id: self._with_capacity(row, capacities[sanse_id])
+                    for sanse_id, row in rows.items() if sanse_id in capacities}
+            with self._lock:
+                self.seat_refreshes += 1
+                if self._version == version:
+                    self._seats_version, self._rows = seats_version, rows
+            return rows
+        version, seats_version, rows = db.load_catalogue()
+        with self._lock:
+            self.misses += 1
+            self._version, self._seats_version, self._rows = version, seats_version, rows
+            self._checked_at = now
+        return rows
+
+    @staticmethod
+    def _with_capacity(row, hall_capacity):
+        """
+        Returns:
+            tuple: The row with its hall_capacity replaced.
+        """
+        return row[:CAPACITY_COLUMN] + (hall_capacity,) + row[CAPACITY_COLUMN + 1:]
+
+    def rows(self, db):
+        """
+        Returns:
+            list: Every sanse as (id, Movie_Name, Release_date, hall_capacity, age_limit),
+                ordered by id.
+        """
+        return list(self._current(db).values())
+
+    def get(self, db, sanse_id):
+        """
+        Returns:
+            tuple: The sanse with this ID, or None.
+        """
+        return self._current(db).get(sanse_id)
+
+    def seats_changed(self):
+        """
+        Makes the next read check the versions, after a sale in this process.
+        """
+        with self._lock:
+            self._seats_stale = True
+
+    def invalidate(self):
+        """
+        Drops the cached rows; the next read reloads them.
+        """
+        with self._lock:
+            self._version = None
+
+
+_catalogues = {}
+
+
+def get_catalogue(db_path=None):
+    """
+    Returns the process-wide SanseCache for a database file, creating it on first use.
+
+    Args:
+        db_path (str, optional): The database file. Default is resolve_db_path().
+
+    Returns:
+        SanseCache: The shared cache for that file.
+    """
+    path = os.path.abspath(resolve_db_path(db_path))
+    with _pools_lock:
+        catalogue = _catalogues.get(path)
+        if catalogue is None:
+            catalogue = _catalogues[path] = SanseCache()
+        return catalogue
+
+
+DEFAULT_SUBSCRIPTION = "Silver"
+NO_SUBSCRIPTION_NOTICE = "You have not purchased any special subscription"
+SUBSCRIPTION_DAYS = 30
+
 
 # Define a class for managing SQLite database connections
 class SQLiteConnection:
     """
     This class manages SQLite database connections.
     
-    It provides methods to connect to an SQLite database file
-    and perform operations such as creating tables.
+    It borrows a connection from the shared pool for its database file
+    and provides methods to perform operations such as creating tables.
     """
-    def __init__(self):
-        # Connect to an SQLite database file named "mydatabase.db"
-        self.connector = sqlite3.connect("mydatabase.db")
+    def __init__(self, db_path=None):
+        # Borrow a tuned connection from the pool of the configured database file
+        self.pool = get_pool(db_path)
+        self.catalogue = get_catalogue(self.pool.db_path)
+        self.connector = self.pool.acquire()
         # Create a cursor object to execute SQL queries
-        self.cursor = self.connector.cursor()
-    def add_sanse(self, movie_name, release_date, hall_capacity, age_limit):
+        self.cursor = self.connector.cursor(CURSOR_CLASS)
+        # True inside batch(): single-statement writes leave the commit to the batch
+        self._batching = False
+
+    def close(self):
+        """
+        Returns the borrowed connection to the pool. The object must not be used afterwards.
+        """
+        if self.connector is not None:
+            self.cursor.close()
+            self.pool.release(self.connector)
+            self.connector = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """
+        Runs a with-block as one transaction: commit on success, rollback on error.
+
+        A top-level transaction starts with BEGIN IMMEDIATE by default, so the write
+        lock is taken up front and concurrent writers queue on busy_timeout instead of
+        failing halfway with SQLITE_BUSY. Nested calls become savepoints.
+
+        Args:
+            immediate (bool, optional): Take the write lock at BEGIN. Default is True.
+        """
+        if self.connector.in_transaction:
+            # ROLLBACK TO / RELEASE act on the innermost savepoint of that name,
+            # and a fixed name keeps the statement text stable for instrumentation
+            savepoint = "nested"
+            self.cursor.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield
+            except BaseException:
+                self.cursor.execute(f"ROLLBACK TO {savepoint}")
+                self.cursor.execute(f"RELEASE {savepoint}")
+                raise
+            self.cursor.execute(f"RELEASE {savepoint}")
+            return
+        self.cursor.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.connector.rollback()
+            raise
+        self.connector.commit()
+
+    def _commit(self):
+        """
+        Commits the pending writes, unless a batch() is open; then the batch commits.
+        """
+        if not self._batching:
+            self.connector.commit()
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups every write made in a with-block into one transaction.
+
+        Methods called inside the block defer their commits to the end of the batch,
+        and their own transaction() blocks become savepoints, so a batch of writes
+        costs one commit. Nested calls join the open batch.
+        """
+        if self._batching:
+            yield
+            return
+        self._batching = True
+        try:
+            with self.transaction():
+                yield
+        finally:
+            self._batching = False
+            # The cache may have seen rows that were rolled back, or that are
+            # committed only now
+            self.catalogue.invalidate()
+    def add_sanse(self, movie_name, release_date, hall_capacity, age_limit, hall=1,
+                  ticket_price=0):
         """
         Add a new sanse to the SQLite database.
         
@@ -75,19 +633,66 @@ class SQLiteConnection:
         - release_date: The release date of the movie.
         - hall_capacity: The capacity of the screening hall.
         - age_limit: The age limit for the movie.
+        - hall: The number of the hall it plays in. Default is 1.
+        - ticket_price: The price of one seat, for the revenue reports. Default is 0.
         
         Returns:
         None
         
         This method executes an INSERT query on the 'Sanses' table in the SQLite database,
-        adding a new sanse with the provided details.
+        adding a new sanse with the provided details. The release date is stored as
+        zero-padded YYYY-MM-DD so date ranges can be compared in SQL; a date that does
+        not parse raises ValueError.
         """
         query = """
-                INSERT INTO Sanses (Movie_Name, Release_date, hall_capacity, age_limit)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO Sanses (Movie_Name, Release_date, hall_capacity, age_limit,
+                                    hall, ticket_price)
+                VALUES (?, ?, ?, ?, ?, ?)
                 """
-        self.cursor.execute(query, (movie_name, release_date, hall_capacity, age_limit))
-        self.connector.commit()
+        check_hall_and_price(hall, ticket_price)
+        self.cursor.execute(
+            query, (movie_name, normalize_date(release_date), hall_capacity, age_limit,
+                    hall, ticket_price)
+        )
+        self.bump_catalogue_version()
+        self._commit()
+        self.catalogue.invalidate()
+
+    def bulk_add_sanses(self, sanses):
+        """
+        Adds many sanses in one transaction with a single executemany.
+
+        Args:
+            sanses (list): Tuples of (movie_name, release_date, hall_capacity, age_limit,
+                hall, ticket_price), already validated, with release dates in YYYY-MM-DD
+                format. Four-field tuples get hall 1 and ticket price 0.
+
+        Returns:
+            int: The number of sanses added.
+
+        Raises:
+            ValueError: If any row has a hall below 1 or a negative price; nothing is added.
+        """
+        rows = []
+        for sanse in sanses:
+            if len(sanse) == 4:
+                movie_name, release_date, hall_capacity, age_limit = sanse
+                hall, ticket_price = 1, 0
+            else:
+                movie_name, release_date, hall_capacity, age_limit, hall, ticket_price = sanse
+            check_hall_and_price(hall, ticket_price)
+            rows.append((movie_name, release_date, hall_capacity, age_limit, hall,
+                         ticket_price))
+        with self.transaction():
+            self.cursor.executemany(
+                """INSERT INTO Sanses (Movie_Name, Release_date, hall_capacity, age_limit,
+                                       hall, ticket_price)
+                    VALUES (?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+            self.bump_catalogue_version()
+        self.catalogue.invalidate()
+        return len(sanses)
 
     def delete_sanse(self, sans_id):
         """
@@ -100,93 +705,283 @@ class SQLiteConnection:
             None
         """
         self.cursor.execute("DELETE FROM Sanses WHERE id=?", (sans_id,))
-        self.connector.commit()
+        self._commit()
+        self.catalogue.invalidate()
 
     def get_all_sanses(self):
         """
-        Retrieves all sanses from the Sanses table.
+        Retrieves all sanses, from the catalogue cache when it is current.
+
+        Returns:
+            list: Tuples of (id, Movie_Name, Release_date, hall_capacity, age_limit),
+                ordered by id.
+        """
+        return self.catalogue.rows(self)
+
+    def get_sanse(self, sanse_id):
+        """
+        Retrieves one sanse, from the catalogue cache when it is current.
+
+        Args:
+            sanse_id (int): The ID of the sanse.
 
         Returns:
-            list: A list of rows representing the sanses.
+            tuple: (id, Movie_Name, Release_date, hall_capacity, age_limit), or None.
         """
-        self.cursor.execute("SELECT * FROM Sanses")
+        return self.catalogue.get(self, sanse_id)
+
+    def catalogue_versions(self):
+        """
+        Returns:
+            tuple: (version, seats_version) of the Sanses catalogue; see
+                bump_catalogue_version().
+        """
+        self.cursor.execute("SELECT version, seats_version FROM catalogue_version WHERE id = 1")
+        return self.cursor.fetchone()
+
+    def bump_catalogue_version(self):
+        """
+        Tells the catalogue caches of every process that sanses were added.
+
+        Edits and deletes bump the version through triggers. Inserts bump it here,
+        once per statement, so a bulk insert does not pay an extra UPDATE per row.
+        """
+        self.cursor.execute("UPDATE catalogue_version SET version = version + 1")
+
+    def load_catalogue(self):
+        """
+        Reads every sanse together with the catalogue versions, from one snapshot.
+
+        Returns:
+            tuple: (version, seats_version, dict of id -> row in id order).
+        """
+        with self.transaction(immediate=False):
+            version, seats_version = self.catalogue_versions()
+            self.cursor.execute(f"SELECT {SANSE_COLUMNS} FROM Sanses ORDER BY id")
+            rows = {row[0]: row for row in self.cursor.fetchall()}
+        return version, seats_version, rows
+
+    def load_seat_counts(self):
+        """
+        Reads the seats left of every sanse together with the seats version, from one
+        snapshot.
+
+        Returns:
+            tuple: (seats_version, dict of id -> hall_capacity).
+        """
+        with self.transaction(immediate=False):
+            seats_version = self.catalogue_versions()[1]
+            self.cursor.execute("SELECT id, hall_capacity FROM Sanses")
+            capacities = dict(self.cursor.fetchall())
+        return seats_version, capacities
+
+    def get_sanses_page(self, after=None, before=None, limit=DEFAULT_PAGE_SIZE, order_by="id"):
+        """
+        Retrieves one page of sanses with keyset pagination.
+
+        Each page is an index range scan that starts right after (or before) the
+        cursor, so late pages cost the same as the first one.
+
+        Args:
+            after (tuple, optional): A next_cursor from a previous page.
+            before (tuple, optional): A prev_cursor from a previous page.
+            limit (int, optional): The page size. Default is DEFAULT_PAGE_SIZE.
+            order_by (str, optional): "id" or "release_date". Default is "id".
+
+        Returns:
+            SansePage: The rows plus the cursors of the neighbouring pages.
+        """
+        keys = SANSE_ORDERINGS[order_by]
+        key_sql = f"({', '.join(keys)})"
+        placeholders = f"({', '.join('?' * len(keys))})"
+        backwards = before is not None
+        cursor_value = before if backwards else after
+        where = ""
+        if cursor_value is not None:
+            where = f"WHERE {key_sql} {'<' if backwards else '>'} {placeholders}"
+        direction = " DESC" if backwards else ""
+        order = ", ".join(key + direction for key in keys)
+        self.cursor.execute(
+            f"SELECT {SANSE_COLUMNS} FROM Sanses {where} ORDER BY {order} LIMIT ?",
+            (*(cursor_value or ()), limit + 1),
+        )
         rows = self.cursor.fetchall()
-        return rows
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return SansePage(rows, None, None)
+        first_key, last_key = self._sanse_key(rows[0], keys), self._sanse_key(rows[-1], keys)
+        if backwards:
+            return SansePage(rows, last_key, first_key if has_more else None)
+        return SansePage(rows, last_key if has_more else None,
+                         first_key if after is not None else None)
+
+    @staticmethod
+    def _sanse_key(row, keys):
+        """
+        Builds the keyset cursor of a sanse row for the given ordering.
+        """
+        return tuple(row[2] if key == "Release_date" else row[0] for key in keys)
+
+    def iter_sanses(self, order_by="id", batch_size=500):
+        """
+        Streams every sanse from a dedicated cursor, batch_size rows at a time.
+
+        Args:
+            order_by (str, optional): "id" or "release_date". Default is "id".
+            batch_size (int, optional): The rows fetched per round trip. Default is 500.
+
+        Yields:
+            tuple: (id, Movie_Name, Release_date, hall_capacity, age_limit).
+        """
+        order = ", ".join(SANSE_ORDERINGS[order_by])
+        cursor = self.connector.cursor(CURSOR_CLASS)
+        try:
+            cursor.execute(f"SELECT {SANSE_COLUMNS} FROM Sanses ORDER BY {order}")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    def migrate(self):
+        """
+        Brings the schema up to date with the migrations in migrations.py.
+
+        A current database costs one PRAGMA user_version read. Otherwise the pending
+        migrations run in one write transaction, so concurrent starts apply each
+        migration exactly once and a failed migration leaves the old version intact.
+
+        Returns:
+            int: The number of migrations applied.
+
+        Raises:
+            SchemaVersionError: If the database is newer than this program.
+        """
+        self.cursor.execute("PRAGMA user_version")
+        version = self.cursor.fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return 0
+        if version > SCHEMA_VERSION:
+            raise SchemaVersionError(
+                f"{self.pool.db_path} has schema version {version}, "
+                f"this program supports up to {SCHEMA_VERSION}"
+            )
+        with self.transaction():
+            # Another process may have migrated while we waited for the write lock
+            self.cursor.execute("PRAGMA user_version")
+            version = self.cursor.fetchone()[0]
+            for migration in MIGRATIONS[version:]:
+                migration(self.cursor)
+            if version < SCHEMA_VERSION:
+                self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return max(SCHEMA_VERSION - version, 0)
+
     def create_table(self):
         """
-        Creates a table for user registration data if it doesn't already exist.
-        
+        Creates the database tables and indexes if they don't already exist.
+
+        Same as migrate(); kept for existing callers.
+
         Returns:
             None
         """
-        # Create a table for user registration data if it doesn't already exist
-        self.cursor.execute(
-            """CREATE TABLE IF NOT EXISTS users(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                password TEXT NOT NULL,
-                birthdate DATE,
-                number_phone Text,
-                registration_date TEXT,
-                Subscription TEXT DEFAULT 'Silver',
-                subscription_balance TEXT DEFAULT 'You have not purchased any special subscription',
-                role_user TEXT DEFAULT 'User',
-                )
+        self.migrate()
+
+    def sweep_expired_subscriptions(self, now=None):
         """
-        )
-        # Create a table for bank card data if it doesn't already exist
-        self.cursor.execute(
-            """CREATE TABLE IF NOT EXISTS bank_cards(
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        card_name TEXT NOT NULL,
-                        card_number TEXT NOT NULL,
-                        card_expire_date TEXT NOT NULL,
-                        current_card_balance INTEGER NOT NULL,
-                        card_CVV2 INTEGER NOT NULL,
-                        FOREIGN KEY (user_id) REFERENCES users(id))
-            """
-        )
-        self.cursor.execute(
-            """CREATE TABLE  IF NOT EXISTS Sanses(
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        Movie_Name	TEXT NOT NULL,
-                        Release_date	TEXT NOT NULL,
-                        hall_capacity	INTEGER NOT NULL,
-                        age_limit	INTEGER NOT NULL)
-            """
-        )
+        Downgrades every expired subscription to Silver with one ranged UPDATE.
 
-        # Commit the changes made to the database
-        self.connector.commit()
+        Meant to run on a schedule (see SubscriptionSweeper and `python users.py sweep`)
+        so profile views never have to write.
+
+        Args:
+            now (int, optional): The epoch time to compare against. Default is now.
+
+        Returns:
+            int: The number of subscriptions downgraded.
+        """
+        now = int(time.time()) if now is None else now
+        with self.transaction():
+            self.cursor.execute(
+                """UPDATE users SET Subscription = ?, subscription_balance = ?,
+                    subscription_expires_at = NULL
+                    WHERE subscription_expires_at <= ?""",
+                (DEFAULT_SUBSCRIPTION, NO_SUBSCRIPTION_NOTICE, now),
+            )
+            return self.cursor.rowcount
 
     def wallet(self):
         """
-        Executes a SQL query to create a table called "Wallet_balance" if it doesn't already exist.
+        Creates the per-user wallet tables if they don't already exist.
+
+        "wallets" holds the materialized balance of each user's wallet and
+        "wallet_ledger" is the append-only record of every transfer into it.
+        Same as migrate(); kept for existing callers.
         
         Returns:
             None
         """
-        self.cursor.execute(
-            """CREATE TABLE IF NOT EXISTS Wallet_balance(
-            Wallet_balance INTEGER)
-            """
-        )
+        self.migrate()
 
-        # Check if the table is empty
-        self.cursor.execute("SELECT COUNT(*) FROM Wallet_balance")
-        count = self.cursor.fetchone()[0]
 
-        if count == 0:
-            self.cursor.execute(
-                """INSERT INTO Wallet_balance(
-                    Wallet_balance
-                    ) VALUES (?)""",
-                ("0",)  # Pass the value as a tuple
-            )
+def subscription_days_left(expires_at, now=None):
+    """
+    Describes a subscription expiry.
 
-        # Commit the changes made to the database
-        self.connector.commit()
+    Args:
+        expires_at (int): The epoch expiry time, or None for no paid subscription.
+        now (float, optional): The epoch time to compare against. Default is now.
+
+    Returns:
+        int or str: The whole days left on an active subscription, otherwise a notice.
+    """
+    if expires_at is None:
+        return NO_SUBSCRIPTION_NOTICE
+    remaining = expires_at - (time.time() if now is None else now)
+    if remaining >= 0:
+        return int(remaining // 86400)
+    return "Your subscription has expired,and it has changed to the Silver subscription"
+
+
+sweeper_logger = logging.getLogger("cinematicket.sweeper")
+
+
+class SubscriptionSweeper(threading.Thread):
+    """
+    Background thread that downgrades expired subscriptions every `interval` seconds.
+
+    Attributes:
+        interval (float): The seconds between sweeps.
+        db_path (str): The database file, or None for the configured database.
+    """
+    def __init__(self, interval=60.0, db_path=None):
+        super().__init__(name="subscription-sweeper", daemon=True)
+        self.interval = interval
+        self.db_path = db_path
+        self._stopped = threading.Event()
+
+    def run(self):
+        """
+        Sweeps every `interval` seconds until stopped. A failed sweep, e.g. on a locked
+        database or a pool timeout, is logged and retried at the next interval.
+        """
+        while not self._stopped.is_set():
+            try:
+                with SQLiteConnection(self.db_path) as db:
+                    db.sweep_expired_subscriptions()
+            except Exception:
+                sweeper_logger.exception("Subscription sweep failed")
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        """
+        Stops the sweeper after the current sweep.
+        """
+        self._stopped.set()
 
 
 class UserRole(Enum):
@@ -199,6 +994,123 @@ class UserRole(Enum):
     """
     USER = "User"
     ADMIN = "Admin"
+
+
+class ReservationStatus(Enum):
+    """
+    Enumeration of the outcomes of User.reserve_sans().
+
+    Attributes:
+        RESERVED (str): The seats were taken and a booking was recorded.
+        SOLD_OUT (str): Not enough seats are left.
+        AGE_RESTRICTED (str): The user is younger than the sanse's age limit.
+        NOT_FOUND (str): No sanse has the given ID.
+    """
+    RESERVED = "reserved"
+    SOLD_OUT = "sold_out"
+    AGE_RESTRICTED = "age_restricted"
+    NOT_FOUND = "not_found"
+
+
+def age_on(birthdate, today=None):
+    """
+    Computes a person's age in whole years.
+
+    Args:
+        birthdate (str): The birthdate (format: YYYY-MM-DD).
+        today (date, optional): The reference day. Default is today.
+
+    Returns:
+        int: The age in years.
+    """
+    born = datetime.strptime(birthdate, "%Y-%m-%d").date()
+    today = today or datetime.now().date()
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+SESSION_TTL = 15 * 60  # seconds
+ADMIN_CODE = "7798683"
+
+
+class UserSession:
+    """
+    Short-lived, in-process record of a logged-in user.
+
+    Holds the profile columns and role returned by User.authenticate(), so the
+    menus never index into raw rows and role checks do not go back to the database
+    while the session is fresh. User.update_info() and User.update_subscription()
+    update the session of the user they change in place, so profile screens are
+    answered from it without a query.
+
+    Attributes:
+        id (int): The user's ID.
+        username (str): The user's username.
+        birthdate (str): The user's birthdate (format: YYYY-MM-DD).
+        number_phone (str): The user's phone number, or None.
+        registration_date (str): When the user registered.
+        subscription (str): The user's subscription type.
+        subscription_balance (str): The subscription expiration date or a notice.
+        subscription_expires_at (int): The epoch expiry of a paid subscription, or None.
+        role (str): The user's role ("User" or "Admin").
+        expires_at (float): time.monotonic() value after which the session is stale.
+    """
+    COLUMNS = (
+        "id, username, birthdate, number_phone, registration_date, "
+        "Subscription, subscription_balance, subscription_expires_at, role_user"
+    )
+    __slots__ = (
+        "id", "username", "birthdate", "number_phone", "registration_date",
+        "subscription", "subscription_balance", "subscription_expires_at", "role",
+        "expires_at",
+    )
+
+    def __init__(self, row, ttl=SESSION_TTL):
+        (self.id, self.username, self.birthdate, self.number_phone, self.registration_date,
+         self.subscription, self.subscription_balance, self.subscription_expires_at,
+         self.role) = row
+        self.expires_at = time.monotonic() + ttl
+
+    def set_subscription(self, subscription, expires_at):
+        """
+        Records a subscription bought during the session.
+
+        Args:
+            subscription (str): The new subscription type.
+            expires_at (int): Its epoch expiry time.
+        """
+        self.subscription = subscription
+        self.subscription_expires_at = expires_at
+        self.subscription_balance = datetime.fromtimestamp(expires_at).strftime(
+            "%Y-%m-%d %H:%M:%S")
+
+    def days_left(self, now=None):
+        """
+        Describes the subscription without a query, like User.check_subscription().
+
+        An expired subscription is downgraded in the session the same way
+        sweep_expired_subscriptions() downgrades it in the database.
+
+        Args:
+            now (float, optional): The epoch time to compare against. Default is now.
+
+        Returns:
+            int or str: The whole days left on an active subscription, otherwise a notice.
+        """
+        days_left = subscription_days_left(self.subscription_expires_at, now)
+        if not isinstance(days_left, int) and self.subscription_expires_at is not None:
+            self.subscription = DEFAULT_SUBSCRIPTION
+            self.subscription_balance = NO_SUBSCRIPTION_NOTICE
+            self.subscription_expires_at = None
+        return days_left
+
+    def is_expired(self):
+        """
+        Returns:
+            bool: True once the session has outlived its TTL.
+        """
+        return time.monotonic() >= self.expires_at
+
+
 class User(SQLiteConnection):
     """
     Class representing a user with SQLite connection.
@@ -206,13 +1118,17 @@ class User(SQLiteConnection):
     Attributes:
         registration_date (datetime): The date and time of user registration.
         admin_code (str): The admin code associated with the user.
+        session (UserSession): The session of the last successful authenticate() call.
+        password_iterations (int): The PBKDF2 cost used for new password hashes.
     """
-    def __init__(self):
-        super().__init__()
+    def __init__(self, db_path=None):
+        super().__init__(db_path)
         self.registration_date = datetime.now()
-        self.admin_code = "7798683"
+        self.admin_code = ADMIN_CODE
         self.max_wrong_attempts = 2
         self.wrong_attempts = 0
+        self.session = None
+        self.password_iterations = PASSWORD_ITERATIONS
     def get_user_role(self):
         """
         Prompts the user to choose their role for registration.
@@ -236,14 +1152,20 @@ class User(SQLiteConnection):
         return user_role
     def get_server_role(self, user_id):
         """
-        Retrieves the server role for the specified user from the database.
+        Retrieves the server role for the specified user.
+
+        The role of the current session is answered from memory while the session
+        is fresh; anything else is read from the database.
 
         Args:
             user_id (int): The ID of the user.
 
         Returns:
-            str: The server role of the specified user.
+            tuple: A one-element tuple holding the server role of the specified user.
         """
+        session = self.session
+        if session is not None and session.id == user_id and not session.is_expired():
+            return (session.role,)
         self.cursor.execute(
             "SELECT role_user FROM users WHERE id=?",
             (user_id,),  # Include a comma after user_id to make it a tuple
@@ -264,15 +1186,102 @@ class User(SQLiteConnection):
         Returns:
             bool: True if the user registration was successful, False otherwise.
         """
+        self.insert_user(username, self._hash(password), birthdate, role_user, number_phone)
+
+    def insert_user(self, username, password_hash, birthdate, role_user, number_phone=None):
+        """
+        Stores a new user whose password was already hashed with hash_password().
+
+        Args:
+            username (str): The username of the user.
+            password_hash (str): The stored form of the password.
+            birthdate (str): The birthdate of the user (format: YYYY-MM-DD).
+            role_user (str): The role of the user.
+            number_phone (str, optional): The phone number of the user. Default is None.
+        """
         # Insert user registration data into the "users" table
         self.cursor.execute(
             """INSERT INTO users(
                 username,password,birthdate,number_phone,registration_date,role_user
                 ) VALUES (?,?,?,?,?,?)""",
-            (username, password, birthdate, number_phone, self.registration_date, role_user),
+            (username, password_hash, birthdate, number_phone, self.registration_date,
+             role_user),
         )
         # Commit the changes made to the database
-        self.connector.commit()
+        self._commit()
+
+    def authenticate(self, username, password):
+        """
+        Logs a user in with a single indexed lookup on the unique username.
+
+        The password is verified on the hashing worker pool. Plaintext or
+        outdated hashes are rehashed with the current cost on success.
+
+        Args:
+            username (str): The username of the user.
+            password (str): The password of the user.
+
+        Returns:
+            UserSession: The new session (also kept in self.session),
+                or None if the credentials do not match.
+        """
+        row = self.select_login(username)
+        if row is None or not self._verify(password, row[-1]):
+            return None
+        self._upgrade_hash(row[0], password, row[-1])
+        self.session = UserSession(row[:-1])
+        return self.session
+
+    def select_login(self, username):
+        """
+        Reads what a login needs with a single indexed lookup on the unique username.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            tuple: The UserSession columns followed by the stored password, or None.
+        """
+        self.cursor.execute(
+            f"SELECT {UserSession.COLUMNS}, password FROM users WHERE username = ?",
+            (username,),
+        )
+        return self.cursor.fetchone()
+
+    def set_password_hash(self, user_id, password_hash):
+        """
+        Stores a password that was already hashed with hash_password().
+
+        Args:
+            user_id (int): The ID of the user.
+            password_hash (str): The stored form of the password.
+        """
+        self.cursor.execute(
+            "UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id)
+        )
+        self._commit()
+
+    def _hash(self, password):
+        """
+        Hashes a password on the shared worker pool with this user's cost.
+        """
+        return password_executor().submit(
+            hash_password, password, self.password_iterations
+        ).result()
+
+    def _verify(self, password, stored):
+        """
+        Verifies a password on the shared worker pool.
+        """
+        return password_executor().submit(verify_password, password, stored).result()
+
+    def _upgrade_hash(self, user_id, password, stored):
+        """
+        Rewrites a plaintext or outdated password hash after a successful verify.
+        """
+        if needs_rehash(stored, self.password_iterations):
+            self.set_password_hash(user_id, self._hash(password))
+
     def select_data(self, username, password):
         """
         Selects data from the "users" table where the given username and password match.
@@ -282,15 +1291,16 @@ class User(SQLiteConnection):
             password (str): The password to be used for selection.
 
         Returns:
-            list: A list of tuples containing the selected data from the "users" table.
+            tuple: The username and stored password hash, or None if they do not match.
         """
         self.cursor.execute(
-            "SELECT username, password FROM users WHERE username=? AND password=?",
-            (username, password),
+            "SELECT username, password FROM users WHERE username=?",
+            (username,),
         )
         # Fetch a single row (result) from the executed query
         result = self.cursor.fetchone()
-
+        if result is None or not self._verify(password, result[1]):
+            return None
         return result
 
     def select_user(self, username, password):
@@ -304,57 +1314,49 @@ class User(SQLiteConnection):
         Returns:
             tuple: A tuple containing the selected user data from the "users" table.
         """
-        # Select all columns (*) from the "users" table where the given username and password match
+        # Select all columns (*) from the "users" table where the given username matches
         self.cursor.execute(
-            "SELECT * FROM users WHERE username=? AND password=?",
-            (username, password),
+            "SELECT * FROM users WHERE username=?",
+            (username,),
         )
-        # Fetch all rows that match the executed query
-        rows = self.cursor.fetchall()
-        # Iterate through the rows and return the first row found
-        for row in rows:
+        row = self.cursor.fetchone()
+        # Return the row only if the password verifies against the stored hash
+        if row is not None and self._verify(password, row[2]):
             return row
+        return None
 
     def update_info(self, new_username, new_number_phone, find_id):
         """
         Updates the information of a user based on their ID.
 
+        Blank fields keep their current value. The session of that user, if this
+        object holds it, is updated in place.
+
         Args:
             new_username (str): The new username to be updated.
             new_number_phone (str): The new phone number to be updated.
             find_id (int): The ID of the user to be updated.
 
         Returns:
-            bool: True if the update was successful, False otherwise.
+            tuple: The stored (username, number_phone), or None if the user does not exist.
         """
-        # Check if either new_username or new_number_phone is provided
-        if new_username or new_number_phone:
-            # Update the username and number_phone for the user with find_id
-            self.cursor.execute(
-                "UPDATE users SET username = ?, number_phone = ? WHERE id = ?",
-                (new_username, new_number_phone, find_id),
-            )
-            # Commit the changes to the database
-            self.connector.commit()
-        else:
-            # If neither new_username nor new_number_phone is provided
-            # Retrieve the previous values of username and number_phone for the user with find_id
-            self.cursor.execute(
-                "SELECT username, number_phone FROM users WHERE id = ?",
-                (find_id,),
-            )
-            previous_values = self.cursor.fetchone()
-            if previous_values:
-                previous_username, previous_number_phone = previous_values
-                new_username = new_username or previous_username
-                new_number_phone = new_number_phone or previous_number_phone
-                self.cursor.execute(
-                    "UPDATE users SET username = ?, number_phone = ? WHERE id = ?",
-                    (new_username, new_number_phone, find_id),
-                )
-                self.connector.commit()
-            else:
-                print("User does not exist")
+        # Keep the current value of every blank field
+        self.cursor.execute(
+            """UPDATE users SET username = COALESCE(NULLIF(?, ''), username),
+                number_phone = COALESCE(NULLIF(?, ''), number_phone)
+                WHERE id = ? RETURNING username, number_phone""",
+            (new_username, new_number_phone, find_id),
+        )
+        stored = self.cursor.fetchone()
+        # Commit the changes to the database
+        self._commit()
+        if stored is None:
+            print("User does not exist")
+            return None
+        session = self.session
+        if session is not None and session.id == find_id:
+            session.username, session.number_phone = stored
+        return stored
     def change_password(self, new_password, confirm_password, find_id):
         """
         Changes the password of a user based on their ID.
@@ -369,13 +1371,13 @@ class User(SQLiteConnection):
         """
         # Check if both new_password and confirm_password are provided
         if new_password and confirm_password:
-            # Update the password for the user with find_id using the confirm_password
+            # Store a salted hash of the confirm_password for the user with find_id
             self.cursor.execute(
                 "UPDATE users SET password = ? WHERE id = ?",
-                (confirm_password, find_id),
+                (self._hash(confirm_password), find_id),
             )
             # Commit the changes to the database
-            self.connector.commit()
+            self._commit()
         else:
             # If either new_password or confirm_password is not provided
             # Retrieve the previous value of password for the user with find_id
@@ -386,15 +1388,80 @@ class User(SQLiteConnection):
             previous_values = self.cursor.fetchone()
             if previous_values:
                 # If previous value exists
-                # Use the previous value as the confirm_password
-                confirm_password = previous_values
+                # Keep the previously stored hash
+                confirm_password = previous_values[0]
                 # Update the password for the user with find_id using the confirm_password
                 self.cursor.execute(
                     "UPDATE users SET password = ? WHERE id = ?",
                     (confirm_password, find_id),
                 )
                 # Commit the changes to the database
-                self.connector.commit()
+                self._commit()
+
+    def existing_usernames(self, usernames):
+        """
+        Finds which of the given usernames are already registered.
+
+        Args:
+            usernames (iterable): The usernames to check.
+
+        Returns:
+            set: The usernames that already exist.
+        """
+        usernames = list(usernames)
+        found = set()
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(usernames), 500):
+            chunk = usernames[start:start + 500]
+            self.cursor.execute(
+                f"SELECT username FROM users WHERE username IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update(row[0] for row in self.cursor.fetchall())
+        return found
+
+    def bulk_register_users(self, accounts):
+        """
+        Registers many users and their bank cards in one transaction.
+
+        User IDs are assigned in memory from MAX(id) while the write lock is held, so
+        every card can be linked to its user and both tables are loaded with
+        executemany. Usernames that already exist are skipped, not fatal.
+
+        Args:
+            accounts (list): Tuples of (username, password_hash, birthdate, number_phone,
+                role_user, cards), where cards is a list of (card_name, card_number,
+                card_expire_date, current_card_balance, card_cvv2). Passwords must
+                already be hashed.
+
+        Returns:
+            tuple: (users inserted, cards inserted, set of skipped duplicate usernames).
+        """
+        with self.transaction():
+            duplicates = self.existing_usernames(account[0] for account in accounts)
+            self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM users")
+            next_id = self.cursor.fetchone()[0] + 1
+            user_rows, card_rows = [], []
+            for username, password_hash, birthdate, number_phone, role_user, cards in accounts:
+                if username in duplicates:
+                    continue
+                user_rows.append((next_id, username, password_hash, birthdate, number_phone,
+                                  self.registration_date, role_user))
+                card_rows.extend((next_id, *card) for card in cards)
+                next_id += 1
+            self.cursor.executemany(
+                """INSERT INTO users(
+                    id,username,password,birthdate,number_phone,registration_date,role_user
+                    ) VALUES (?,?,?,?,?,?,?)""",
+                user_rows,
+            )
+            self.cursor.executemany(
+                """INSERT INTO bank_cards(
+                    user_id,card_name,card_number,card_expire_date,current_card_balance,card_cvv2
+                    ) VALUES (?,?,?,?,?,?)""",
+                card_rows,
+            )
+        return len(user_rows), len(card_rows), duplicates
 
     def add_bank_card(
             self,
@@ -429,43 +1496,72 @@ class User(SQLiteConnection):
             ),
         )
         # Commit the changes to the database
-        self.connector.commit()
-    def select_bank_card(self):
+        self._commit()
+    def select_bank_card(self, user_id):
         """
-        Prompts the user to choose their role for registration.
+        Retrieves the bank cards that belong to a user.
+
+        Args:
+            user_id (int): The ID of the user whose cards are listed.
 
         Returns:
-            str: The chosen user role ("Admin user" or "Regular user").
+            list: Tuples of (id, user_id, card_name, card_number, card_expire_date,
+                current_card_balance, ordinal), ordered by card ID. The ordinal is the
+                card's 1-based position among the user's cards, used for display.
         """
-        # Retrieve all rows from the bank_cards table
+        # Retrieve the user's rows from the covering index on bank_cards(user_id, ...)
         self.cursor.execute(
-            "SELECT * FROM bank_cards",
-            (),
+            """SELECT id, user_id, card_name, card_number, card_expire_date,
+                current_card_balance, ROW_NUMBER() OVER (ORDER BY id) AS ordinal
+                FROM bank_cards WHERE user_id = ? ORDER BY id""",
+            (user_id,),
         )
         rows = self.cursor.fetchall()
         # Return the retrieved rows
         return rows
 
-    def check_card_id(self, card_id):
+    def card_id_from_ordinal(self, user_id, ordinal):
+        """
+        Translates the card number shown by select_bank_card() into the card's ID.
+
+        Args:
+            user_id (int): The ID of the user who owns the cards.
+            ordinal (int): The 1-based position of the card in the user's list.
+
+        Returns:
+            int: The card ID, or None if the user has no card at that position.
+        """
+        if ordinal < 1:
+            return None
+        self.cursor.execute(
+            "SELECT id FROM bank_cards WHERE user_id = ? ORDER BY id LIMIT 1 OFFSET ?",
+            (user_id, ordinal - 1),
+        )
+        result = self.cursor.fetchone()
+        return result[0] if result else None
+
+    def check_card_id(self, card_id, user_id):
         """
         Retrieves the card_name and card_number for the bank card 
         with the given card_id from the bank_cards table.
 
         Args:
             card_id (int): The ID of the bank card to be checked.
+            user_id (int): The ID of the user who must own the card.
 
         Returns:
             tuple: A tuple containing the card_name and card_number 
-                for the bank card with the provided card_id.
+                for the bank card with the provided card_id,
+                or None if the user has no such card.
         """
         self.cursor.execute(
-            "SELECT card_name, card_number FROM bank_cards WHERE id = ?",
-            (card_id,),
+            "SELECT card_name, card_number FROM bank_cards WHERE id = ? AND user_id = ?",
+            (card_id, user_id),
         )
         result = self.cursor.fetchone()
         if result is not None:
             return result
-    def update_info_bank_cards(self, card_name, card_number, card_id):
+    def update_info_bank_cards(self, card_name, card_number, card_id, user_id):
         """
         Updates the information of a bank card with the provided card_id.
 
@@ -473,19 +1569,21 @@ class User(SQLiteConnection):
             card_name (str): The new name for the bank card.
             card_number (str): The new number for the bank card.
             card_id (int): The ID of the bank card to be updated.
+            user_id (int): The ID of the user who must own the card.
 
         Returns:
             bool: True if the update was successful, False otherwise.
         """
         if card_name and card_number:
             self.cursor.execute(
-                "UPDATE bank_cards SET card_name = ?, card_number = ? WHERE id = ?",
-                (card_name, card_number, card_id),
+                """UPDATE bank_cards SET card_name = ?, card_number = ?
+                    WHERE id = ? AND user_id = ?""",
+                (card_name, card_number, card_id, user_id),
             )
         else:
             self.cursor.execute(
-                "SELECT card_name, card_number FROM bank_cards WHERE id = ?",
-                (card_id,),
+                "SELECT card_name, card_number FROM bank_cards WHERE id = ? AND user_id = ?",
+                (card_id, user_id),
             )
             previous_values = self.cursor.fetchone()
             if previous_values is not None:
@@ -494,165 +1592,253 @@ class User(SQLiteConnection):
                 new_card_name = card_name or previous_card_name
                 new_card_number = card_number or previous_card_number
                 self.cursor.execute(
-                    "UPDATE bank_cards SET card_name = ?, card_number = ? WHERE id = ?",
-                    (new_card_name, new_card_number, card_id),
+                    """UPDATE bank_cards SET card_name = ?, card_number = ?
+                        WHERE id = ? AND user_id = ?""",
+                    (new_card_name, new_card_number, card_id, user_id),
                 )
                 print("Update bank card was successful")
-        self.connector.commit()
-    def delete_bank_card(self, card_id):
+        self._commit()
+    def delete_bank_card(self, card_id, user_id):
         """
-        Prompts the user to choose their role for registration.
+        Deletes one of a user's bank cards.
+
+        Card IDs are stable primary keys, so only the deleted row changes; the
+        1..n numbering users see is computed by select_bank_card().
+
+        Args:
+            card_id (int): The ID of the bank card to be deleted.
+            user_id (int): The ID of the user who must own the card.
 
         Returns:
-            str: The chosen user role ("Admin user" or "Regular user").
+            bool: True if the card was deleted, False if the user has no such card.
         """
         try:
-            # Delete the bank card based on the provided card ID
-            self.cursor.execute("DELETE FROM bank_cards WHERE id = ?", (card_id,))
-            # Commit the changes to the database
-            self.connector.commit()
-            print("Bank card successfully deleted.")
-
-            # Reset the IDs in the bank_cards table
-            self.cursor.execute("UPDATE bank_cards SET id = id - 1")
-            # Commit the changes to the database
-            self.connector.commit()
-
-            # Reorder the IDs starting from 1
+            # Delete the bank card based on the provided card ID and owner
             self.cursor.execute(
-                "UPDATE bank_cards SET id = ROW_NUMBER() OVER (ORDER BY id)"
+                "DELETE FROM bank_cards WHERE id = ? AND user_id = ?", (card_id, user_id)
             )
             # Commit the changes to the database
-            self.connector.commit()
+            self._commit()
+            if self.cursor.rowcount == 0:
+                print("Bank card not found.")
+                return False
+            print("Bank card successfully deleted.")
+            return True
 
-            print("Bank card IDs reset.")
         except Error as e:
             print(f"An error occurred: {e}")
+            return False
 
-    def show_wallet_balance(self):
+    def show_wallet_balance(self, user_id):
         """
-        Retrieves and prints the current wallet balance from the database.
+        Retrieves a user's wallet balance.
+
+        Args:
+            user_id (int): The ID of the wallet's owner.
+
+        Returns:
+            tuple: A one-element tuple holding the balance (0 for a user without a wallet yet).
         """
-        self.cursor.execute("SELECT * FROM Wallet_balance")
-        rows = self.cursor.fetchone()
-        # Return the retrieved rows
-        return rows
+        self.cursor.execute("SELECT balance FROM wallets WHERE user_id = ?", (user_id,))
+        row = self.cursor.fetchone()
+        # Return the retrieved row
+        return row or (0,)
 
-    def update_wallet_balance(self, wallet_recharge, card_id_wallet,new_card_balance):
+    def update_wallet_balance(self, wallet_recharge, card_id_wallet, user_id):
         """
-        Updates the wallet balance and the current card balance in the database.
+        Transfers money from one of the user's bank cards into their wallet.
+
+        The card debit, the wallet credit and the ledger entry happen in one
+        BEGIN IMMEDIATE transaction. The card balance is checked by the debit's
+        WHERE clause, so concurrent recharges can never overdraw a card.
         
         Args:
-            wallet_recharge (int): The amount to be added to the wallet balance.
-            card_id_wallet (int): The ID of the bank card associated with the wallet.
-            new_card_balance (int): The updated balance of the bank card.
+            wallet_recharge (int): The amount to move from the card to the wallet.
+            card_id_wallet (int): The ID of the bank card to debit.
+            user_id (int): The ID of the user who owns the card and the wallet.
+
+        Returns:
+            bool: True if the transfer happened, False if the card does not belong to
+                the user or its balance is too low.
+
+        Raises:
+            ValueError: If the amount is not a positive whole number.
         """
-        wallet_update_query = "UPDATE Wallet_balance SET Wallet_balance = ?"
-        card_update_query = "UPDATE bank_cards SET current_card_balance = ? WHERE id = ?"
-        self.cursor.execute(wallet_update_query, (wallet_recharge,))
-        self.cursor.execute(card_update_query, (new_card_balance, card_id_wallet))
-        self.connector.commit()
-        print("Recharged wallet balance Successful!")
+        amount = int(wallet_recharge)
+        if amount <= 0:
+            raise ValueError("The recharge amount must be positive")
+        with self.transaction():
+            self.cursor.execute(
+                """UPDATE bank_cards SET current_card_balance = current_card_balance - ?
+                    WHERE id = ? AND user_id = ? AND current_card_balance >= ?""",
+                (amount, card_id_wallet, user_id, amount),
+            )
+            if self.cursor.rowcount != 1:
+                return False
+            self.cursor.execute(
+                """INSERT INTO wallets(user_id, balance) VALUES (?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET balance = balance + excluded.balance""",
+                (user_id, amount),
+            )
+            self.cursor.execute("SELECT balance FROM wallets WHERE user_id = ?", (user_id,))
+            balance_after = self.cursor.fetchone()[0]
+            self.cursor.execute(
+                """INSERT INTO wallet_ledger(user_id, card_id, amount, balance_after, created_at)
+                    VALUES (?, ?, ?, ?, ?)""",
+                (user_id, card_id_wallet, amount, balance_after, int(time.time())),
+            )
+        return True
     def update_subscription(self, new_subscription, user_id):
         """
         Updates the subscription details for a user.
+
+        The session of that user, if this object holds it, is updated in place.
         
         Args:
             new_Subscription (str): The new subscription details.
             user_id (int): The ID of the user whose subscription is being updated.
+
+        Returns:
+            int: The epoch expiry of the new subscription.
         """
         current_date = datetime.now()
-        expiration_date = current_date + timedelta(days=30)
+        expiration_date = current_date + timedelta(days=SUBSCRIPTION_DAYS)
         expiration_date_str = expiration_date.strftime("%Y-%m-%d %H:%M:%S")
-        sql_query = "UPDATE users SET Subscription = ?, subscription_balance = ? WHERE id = ?"
-        query_params = (new_subscription, expiration_date_str, user_id)
+        expires_at = int(expiration_date.timestamp())
+        sql_query = """UPDATE users SET Subscription = ?, subscription_balance = ?,
+            subscription_expires_at = ? WHERE id = ?"""
+        query_params = (new_subscription, expiration_date_str, expires_at, user_id)
         self.cursor.execute(sql_query, query_params)
-        self.connector.commit()
+        self._commit()
+        session = self.session
+        if session is not None and session.id == user_id:
+            session.set_subscription(new_subscription, expires_at)
         print("Update Subscription was Successful!")
+        return expires_at
     def check_subscription(self, user_id):
         """
         Checks the subscription status for a given user.
+
+        This is a read only: an expired subscription is reported as expired here and
+        downgraded to Silver by sweep_expired_subscriptions().
         
         Args:
             user_id (int): The ID of the user whose subscription status needs to be checked.
         
         Returns:
-            bool: True if the user's subscription is active, False otherwise.
+            int or str: The whole days left on an active subscription, otherwise a notice.
+                None if the user does not exist.
         """
-        current_date = datetime.now()
-        # current_date_str = current_date.strftime("%Y-%m-%d %H:%M:%S")
-        self.cursor.execute("SELECT Subscription, subscription_balance FROM users WHERE id = ?",
+        self.cursor.execute("SELECT subscription_expires_at FROM users WHERE id = ?",
                             (user_id,))
         row = self.cursor.fetchone()
-        if row:
-            expiration_date_str = row
-            expiration_date = datetime.strptime(expiration_date_str, "%Y-%m-%d %H:%M:%S")
-            current_date = datetime.now()
-            if current_date <= expiration_date:
-                remaining_days = (expiration_date - current_date).days
-                return remaining_days
-            else:
-                self.cursor.execute(
-                    "UPDATE users SET Subscription = ?, subscription_balance = ? WHERE id = ?",
-                    ("Silver", "You have not purchased any special subscription", user_id)
-                )
-                self.connector.commit()
-                return "Your subscription has expired,and it has changed to the Silver subscription"
-        self.connector.commit()
-    def buy_sanse(self, sanse_id):
+        if row is None:
+            return None
+        return subscription_days_left(row[0])
+    def buy_sanse(self, sanse_id, user_id, user_age=None, seats=1):
         """
-        Buys a sanse with the given ID.
+        Buys tickets for the sanse with the given ID.
         
         Args:
             sanse_id (int): The ID of the sanse to be bought.
+            user_id (int): The ID of the buying user.
+            user_age (int, optional): The buyer's age, checked against the age limit.
+            seats (int, optional): The number of seats. Default is 1.
         
         Returns:
-            None
+            ReservationStatus: The outcome of the reservation.
         """
-        self.cursor.execute("""
-                            SELECT * FROM Sanses WHERE id=?""",(sanse_id,))
-        rows = self.cursor.fetchall()
-        return rows
-    def get_available_sanses(self, user_birthday, user_membership_months):
+        return self.reserve_sans(sanse_id, user_id, seats, user_age)
+    def get_available_sanses(self, user_birthday, today=None):
         """
-        Get a list of available sanses based on user's birthday and membership duration.
+        Get the sanses a user can buy: released, with seats left and within their age.
+
+        The filter runs in SQL over the partial index idx_sanses_available, so the
+        cost grows with the number of matches rather than with the whole table.
         
         Args:
             user_birthday (str): The birthday of the user (format: YYYY-MM-DD).
-            user_membership_months (int): The duration of the user's membership in months.
+            today (date, optional): The reference day. Default is today.
         
         Returns:
-            list: A list of available sanses that meet the given conditions.
-        """
-        available_sanses = []
-        sanses = []
-        today = datetime.date.today()
-        for sans in sanses:
-            release_date = datetime.datetime.strptime(sans["release_date"], "%Y-%m-%d").date()
-            age_limit = sans["age_limit"]
-            if release_date <= today and sans["hall_capacity"] > 0 \
-                    and age_limit <= user_membership_months:
-                if today == user_birthday:
-                    sans["hall_capacity"] /= 2
-                available_sanses.append(sans)
-        return available_sanses
-    def reserve_sans(self, user_age, selected_sans):
-        """
-        Reserve a sans based on user's age and selected sans.
+            list: Tuples of (id, Movie_Name, Release_date, hall_capacity, age_limit),
+                ordered by release date.
+        """
+        today = today or datetime.now().date()
+        self.cursor.execute(
+            f"""SELECT {SANSE_COLUMNS}
+                FROM Sanses
+                WHERE Release_date <= ? AND hall_capacity > 0 AND age_limit <= ?
+                ORDER BY Release_date""",
+            (today.isoformat(), age_on(user_birthday, today)),
+        )
+        return self.cursor.fetchall()
+
+    def reserve_sans(self, sanse_id, user_id, seats=1, user_age=None):
+        """
+        Atomically takes seats from a sanse and records the booking.
+
+        The capacity check and decrement are one conditional UPDATE inside a
+        BEGIN IMMEDIATE transaction, so concurrent buyers can never oversell a
+        sanse. A sold-out sanse is reported immediately, never retried.
         
         Args:
-            user_age (int): The age of the user.
-            selected_sans (str): The name or identifier of the selected sans.
+            sanse_id (int): The ID of the sanse.
+            user_id (int): The ID of the buying user.
+            seats (int, optional): The number of seats. Default is 1.
+            user_age (int, optional): The buyer's age. Default is None (not checked).
         
         Returns:
-            None
+            ReservationStatus: The outcome of the reservation.
+
+        Raises:
+            ValueError: If seats is less than 1.
         """
-        sanses= []
-        if selected_sans in sanses:
-            if selected_sans["hall_capacity"] > 0 and user_age >= selected_sans["age_limit"]:
-                selected_sans["hall_capacity"] -= 1
-                return True
-        return False
+        if seats < 1:
+            raise ValueError("seats must be at least 1")
+        age = user_age if user_age is not None else 1 << 31
+        with self.transaction():
+            self.cursor.execute(
+                """UPDATE Sanses SET hall_capacity = hall_capacity - ?
+                    WHERE id = ? AND hall_capacity >= ? AND age_limit <= ?""",
+                (seats, sanse_id, seats, age),
+            )
+            reserved = self.cursor.rowcount == 1
+            if reserved:
+                self.cursor.execute(
+                    "INSERT INTO bookings(sanse_id, user_id, seats, booked_at) VALUES (?,?,?,?)",
+                    (sanse_id, user_id, seats, int(time.time())),
+                )
+        if reserved:
+            self.catalogue.seats_changed()
+            return ReservationStatus.RESERVED
+        # Only the failure path pays for finding out why
+        self.cursor.execute("SELECT hall_capacity, age_limit FROM Sanses WHERE id = ?",
+                            (sanse_id,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return ReservationStatus.NOT_FOUND
+        if row[1] > age:
+            return ReservationStatus.AGE_RESTRICTED
+        return ReservationStatus.SOLD_OUT
+def sanses_table(sanses):
+    """
+    Renders sanse rows as a table.
+
+    Args:
+        sanses (list): Tuples of (id, Movie_Name, Release_date, hall_capacity, age_limit).
+
+    Returns:
+        str: The rendered table.
+    """
+    # Imported on first use so sessions that never list sanses start faster
+    from prettytable import PrettyTable
+    table = PrettyTable(["ID", "Movie Name", "Release Date", "Hall Capacity", "Age Limit"])
+    for sans in sanses:
+        table.add_row(list(sans[:5]))
+    return table.get_string()
+
+
 class Admin(SQLiteConnection):
     """
     A class representing an admin user.
@@ -660,11 +1846,12 @@ class Admin(SQLiteConnection):
     This class inherits from the `sqlite_connection` class and provides additional functionality
     specific to admin users.
     """
-    def __init__(self):
-        super().__init__()
+    def __init__(self, db_path=None):
+        super().__init__(db_path)
         self.role = UserRole.ADMIN
 
-    def admin_add_sanse(self, movie_name, release_date, hall_capacity, age_limit):
+    def admin_add_sanse(self, movie_name, release_date, hall_capacity, age_limit, hall=1,
+                        ticket_price=0):
         """
         Adds a new sanse for a movie.
         
@@ -673,8 +1860,10 @@ class Admin(SQLiteConnection):
             release_date (str): The release date of the movie.
             hall_capacity (int): The capacity of the movie hall.
             age_limit (int): The age limit for watching the movie.
+            hall (int, optional): The number of the hall. Default is 1.
+            ticket_price (int, optional): The price of one seat. Default is 0.
         """
-        self.add_sanse(movie_name, release_date, hall_capacity, age_limit)
+        self.add_sanse(movie_name, release_date, hall_capacity, age_limit, hall, ticket_price)
 
     def admin_delete_sanse(self, sans_id):
         """
@@ -685,34 +1874,35 @@ class Admin(SQLiteConnection):
         """
         self.delete_sanse(sans_id)
 
-    def admin_get_all_sanses(self):
+    def admin_get_all_sanses(self, page_size=DEFAULT_PAGE_SIZE, order_by="id"):
         """
-        Retrieves all the sanses from the system and displays them in a table.
+        Retrieves all the sanses from the system and displays them page by page.
+
+        Only one page is held in memory at a time, however large the catalogue is.
         
-        Returns:
-            PrettyTable: A table containing the ID, Movie Name, Release Date,
-                        Hall Capacity, and Age Limit of all the sanses.
+        Args:
+            page_size (int, optional): The rows per table. Default is DEFAULT_PAGE_SIZE.
+            order_by (str, optional): "id" or "release_date". Default is "id".
         """
-        sanses = self.get_all_sanses()
-        table = PrettyTable(["ID", "Movie Name", "Release Date", "Hall Capacity", "Age Limit"])
-        separator_row = ["-" * 5, "-" * 20, "-" * 13, "-" * 15, "-" * 9]
-        for sans in sanses:
-            id_movie = sans[0]
-            movie_name = sans[1]
-            release_date = sans[2]
-            hall_capacity = sans[3]
-            age_limit = sans[4]
-            table.add_row([id_movie,movie_name, release_date, hall_capacity, age_limit])
-            table.add_row(separator_row)
-        table.del_row(-1)
-        print(table.get_string())
+        page = self.get_sanses_page(limit=page_size, order_by=order_by)
+        while page.rows:
+            print(sanses_table(page.rows))
+            if page.next_cursor is None:
+                break
+            page = self.get_sanses_page(after=page.next_cursor, limit=page_size,
+                                        order_by=order_by)
 
 
 
 
 if __name__ == "__main__":
     db = SQLiteConnection()
-    db.create_table()
+    # `python users.py` alone just migrates the database
+    db.migrate()
+    # `python users.py sweep` is the entry point for a scheduled (e.g. cron) sweep
+    if sys.argv[1:] == ["sweep"]:
+        print(f"Downgraded {db.sweep_expired_subscriptions()} expired subscriptions.")
+    db.close()
     #db.wallet()
     # myuser = User()
     # sqlite_connection.select_data()